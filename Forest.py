@@ -1,6 +1,97 @@
 import random
-from Species import Species
+from Species import Species, SpeciesSet
 import csv 
+import numpy as np
+from scipy.spatial import cKDTree
+
+from tree_table import TreeTable
+
+PLOT_SIZE = 40. # metres across the unit plot (the Blender forest floor)
+HEGYI_RADIUS = 4. # neighbourhood radius for the Hegyi competition index, in metres
+
+
+def soil_holding_capacity(soil_texture):
+    """
+    Input: Soil texture category (see ClimateByMonth.estimate_soil_water for the table)
+    Output: (min, max) water holding capacity in cm per ft. of soil,
+            or None if the texture isn't recognized
+    """
+    # Holding capacity A
+    if soil_texture == "very_coarse_sand":
+        return 1.016, 1.905
+
+    # Holding capacity B
+    # TODO refine the categories and apply different
+    # sections for each subcategory
+    if soil_texture in ("coarse_sand", "fine_sand", "loamy_sand"):
+        return 1.905, 3.175
+
+    # Holding capacity C
+    if soil_texture in ("sandy_loams", "fine_sandy_loams"):
+        return 3.175, 4.445
+
+    # Holding capacity D
+    if soil_texture in ("very_fine_sandy_loams", "loams", "silt_loams"):
+        return 3.81, 5.842
+
+    # Holding capacity E
+    if soil_texture in ("clay_loams", "silt_clay_loams", "sandy_clay_loams"):
+        return 4.445, 6.35
+
+    # Holding capacity F
+    if soil_texture in ("sandy_clays", "silty_clays", "clays"):
+        return 4.064, 6.35
+
+    return None
+
+
+def basal_area_larger(basal_areas):
+    """
+    Input: Array of basal areas, one per tree
+    Output: Array of competition indices, the basal area of all the trees strictly larger
+            than each tree (BAL) as a share of the total basal area
+
+    The basal areas are sorted once and summed from the largest down, so each tree's BAL
+    is a lookup into the suffix sums. Trees with the same basal area don't count
+    against each other.
+    """
+    basal_areas = np.asarray(basal_areas, dtype=float)
+    total_basal_area = basal_areas.sum()
+    if total_basal_area <= 0:
+        return np.zeros_like(basal_areas)
+
+    sorted_ba = np.sort(basal_areas)
+    # larger_sums[i] is the sum of sorted_ba[i:], with a trailing 0 for the largest trees
+    larger_sums = np.append(np.cumsum(sorted_ba[::-1])[::-1], 0.)
+    first_larger = np.searchsorted(sorted_ba, basal_areas, side='right')
+    return larger_sums[first_larger] / total_basal_area
+
+
+def hegyi_index(positions, basal_areas, radius):
+    """
+    Input: (trees x 2) array of positions, array of basal areas, and the neighbourhood radius
+           in the same units as the positions
+    Output: Array of Hegyi competition indices, for each tree the sum over every other tree
+            within the radius of (dbh_j / dbh_i) / distance_ij
+
+    Neighbours are found with a KD-tree, so only the pairs within the radius are ever
+    looked at, and the pairs are summed into both of their trees with bincount. Trees
+    closer than 1% of the radius are treated as that far apart. Trees with no basal
+    area get an index of 0.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    dbh = np.sqrt(np.asarray(basal_areas, dtype=float)) # dbh ratios are basal area ratios square-rooted
+    num_trees = len(dbh)
+
+    pairs = cKDTree(positions).query_pairs(radius, output_type='ndarray')
+    i, j = pairs[:, 0], pairs[:, 1]
+    inv_distance = 1. / np.maximum(np.linalg.norm(positions[i] - positions[j], axis=1), 0.01 * radius)
+
+    # each pair adds to both trees, weighted by the other tree's dbh
+    pressure = (np.bincount(i, weights=dbh[j] * inv_distance, minlength=num_trees)
+                + np.bincount(j, weights=dbh[i] * inv_distance, minlength=num_trees))
+    return np.divide(pressure, dbh, out=np.zeros(num_trees), where=dbh > 0)
+
 
 class Forest:
     """
@@ -12,18 +103,42 @@ class Forest:
         Input: A list of climate conditions for each month of the year
         Attributes:
             - Climate : [ClimateByMonth]
-            - Trees : [Tree]
+            - species_list : SpeciesSet
+            - Trees : TreeTable     Also available as trees_list
         """
         # create climate list
         self.climate_list = self.read_climate_data(climate)
-
-        # initialize list of trees
-        self.trees_list = []
         self.num_trees = num_trees
 
         # create species list
         self.species_list = self.create_species_list(species)
 
+        # initialize the table of trees
+        self.trees = TreeTable(self.species_list)
+
+
+    @property
+    def species_index(self):
+        """
+        Species name -> species code (index into species_list), kept by the TreeTable
+        """
+        return self.trees.species_index
+
+
+    @property
+    def trees_list(self):
+        """
+        The forest's TreeTable, which iterates and indexes like a list of Trees
+        """
+        return self.trees
+
+
+    @trees_list.setter
+    def trees_list(self, trees):
+        self.trees = TreeTable(self.species_list)
+        for tree in trees:
+            self.add_tree(tree)
+
 
     def read_climate_data(self, climate_filepath):
         """
@@ -47,17 +162,14 @@ class Forest:
     def create_species_list(self, species_file):
         """
         Input: Species CSV filepath
-        Output: A list of Species class instances, one for each species of tree.
+        Output: A SpeciesSet, which indexes and iterates like a list of Species class
+                instances, one for each species of tree.
         """
         # convert CSV to list
         species_csv = self.read_csv(species_file)
 
-        # Create a new Species instance for each listed species
-        species_list = []
-        for species in species_csv:
-            species_instance = Species(*species)
-            species_list.append(species_instance)
-        return species_list
+        # One SpeciesSet row for each listed species
+        return SpeciesSet(species_csv)
 
 
     def read_csv(self, filepath):
@@ -79,9 +191,30 @@ class Forest:
 
     def add_tree(self, tree):
         """ 
-        Adds a Tree object to the forest's list of trees.
+        Adds a Tree object to the forest's table of trees.
+        The tree becomes a view onto its new row, with a new ID.
+        """
+        row = {name: getattr(tree.table, name)[tree.index] for name in ('ba', 'c', 'height', 'dbh', 'lcl', 'c_diam', 'age', 'alive', 'parent')}
+        index = self.trees.append(self.trees.species_code(tree.species), *tree.position, **row)
+        tree.table, tree.index = self.trees, int(index[0])
+
+
+    def species_codes(self, species):
+        """
+        Input: Array of species names, or of species codes
+        Output: Array of species codes, from the TreeTable's index (see TreeTable.species_codes)
+        """
+        return self.trees.species_codes(species)
+
+
+    def add_trees_bulk(self, species_codes, xs, ys, **columns):
+        """
+        Adds a whole batch of trees to the forest's table at once.
+        Input: Species codes or names, x and y positions (arrays, or scalars that broadcast),
+               and optionally values for any of the other tree columns (see TreeTable.append)
+        Output: Array of the row indices of the new trees
         """
-        self.trees_list.append(tree)
+        return self.trees.append(self.species_codes(species_codes), xs, ys, **columns)
 
 
     def print_tree_list(self):
@@ -102,23 +235,26 @@ class Forest:
  {month.frost_days}, {month.soil_water}, {month.max_soil_water}, {month.soil_texture}')
 
 
-    def compute_competition_indices(self):
+    def compute_competition_indices(self, method='bal', radius=HEGYI_RADIUS, plot_size=PLOT_SIZE):
         """
-        Calculates the competition index for each tree in the forest using the BAL theorem.
+        Calculates the competition index for each tree in the forest, either with the BAL
+        theorem over the whole stand ('bal') or from the trees within radius metres of each
+        tree on a plot plot_size metres across ('hegyi'), from the trees' current basal areas
+        (ForestSimulator grows them every month). Only living trees compete; dead trees keep
+        their last index.
+        The allometric equations were fitted for BAL, which runs from 0 to 1, so the
+        unbounded Hegyi index is turned into the share of living trees under strictly
+        less competition (0 for the least crowded trees, towards 1 for the most).
         """
-
-        # Sort the list of trees by basal area (smallest to largest)
-        # That way the competition index calculation can be quick and easy
-
-        total_basal_area = sum(tree.ba for tree in self.trees_list)
-        basal_area_list = sorted(self.trees_list, key=lambda tree: tree.ba)
-        
-        # get the sum of the basal area for all the trees greater than the current tree
-        i = 1
-        for tree in self.trees_list:
-            greater_tree_sum = sum(tree.ba for tree in basal_area_list[i:]) # IF index is greater than tree in basal_area_list 
-            tree.c = greater_tree_sum / total_basal_area
-            i+=1
+        trees = self.trees
+        alive = trees.alive
+        if method == 'bal':
+            trees.c[alive] = basal_area_larger(trees.ba[alive])
+        elif method == 'hegyi':
+            hegyi = hegyi_index(np.column_stack((trees.x[alive], trees.y[alive])), trees.ba[alive], radius / plot_size)
+            trees.c[alive] = np.searchsorted(np.sort(hegyi), hegyi, side='left') / max(len(hegyi), 1)
+        else:
+            raise ValueError(f"Unknown competition index method: {method}")
 
 
     class ClimateByMonth:
@@ -187,44 +323,11 @@ class Forest:
             | clays                 |                       |
             |-----------------------------------------------|
             """
-            # Holding capacity A
-            if soil_texture == "very_coarse_sand":
-                # capacity range
-                soil_min = 1.016
-                soil_max = 1.905
-
-            # Holding capacity B
-            elif soil_texture in ("coarse_sand", "fine_sand", "loamy_sand"):
-                # capacity range - lowest in B
-                soil_min = 1.905
-                soil_max = 3.175
-                # TODO refine the categories and apply different
-                # sections for each subcategory
-                #max = ((max - min) / 3) + min
-
-            # Holding capacity C
-            elif soil_texture in ("sandy_loams", "fine_sandy_loams"):
-                soil_min = 3.175
-                soil_max = 4.445
-
-            # Holding capacity D
-            elif soil_texture in ("very_fine_sandy_loams", "loams", "silt_loams"):
-                soil_min = 3.81
-                soil_max = 5.842
-
-            # Holding capacity E
-            elif soil_texture in ("clay_loams", "silt_clay_loams", "sandy_clay_loams"):
-                soil_min = 4.445
-                soil_max = 6.35
-
-            # Holding capacity F
-            elif soil_texture in ("sandy_clays", "silty_clays", "clays"):
-                soil_min = 4.064
-                soil_max = 6.35
-
-            else:
+            capacity = soil_holding_capacity(soil_texture)
+            if capacity is None:
                 print(f"ERROR Invalid soil texture: {soil_texture}")
                 return None
+            soil_min, soil_max = capacity
 
             soil_water = random.uniform(soil_min,soil_max)
             max_soil_water = soil_max
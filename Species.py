@@ -1,8 +1,143 @@
+import numpy as np
+
+# The qualitative Species attributes, in the order they appear in the species CSV.
+# Each is a '/'-separated list of values.
+QUALITATIVE_FIELDS = ('leaf_shape', 'canopy_density', 'deciduous_evergreen', 'leaf_color', 'tree_form',
+                      'tree_roots', 'habitat', 'bark_texture', 'bark_color')
+
+# The quantitative Species attributes, in the order they appear in the species CSV
+SPECIES_PARAMETERS = ('t_min', 't_opt', 't_max', 'kf', 'fcax_700', 'kd', 'n_theta', 'c_theta',
+                      'p2', 'p20', 'acx', 'sla_1', 'sla_0', 't_sla_mid', 'fn0', 'nfn', 'tc',
+                      'max_age', 'r_age', 'n_age', 'mf', 'mr', 'ms', 'yfx', 'yf0', 'tyf', 'yr',
+                      'nr_max', 'nr_min', 'm_0', 'wsx1000', 'nm', 'k', 'aws', 'nws', 'ah', 'nhb',
+                      'nhc', 'ahl', 'nhlb', 'nhlc', 'ak', 'nkb', 'nkh', 'av', 'nvb', 'nvh', 'nvbh')
+
+# Every column of a species CSV row
+SPECIES_FIELDS = ('name', 'name_scientific') + QUALITATIVE_FIELDS + SPECIES_PARAMETERS
+
+
+class SpeciesSet:
+    """
+    Holds every species of a forest together. The numeric parameters are one float64
+    (species x parameter) matrix, and each qualitative field is interned: its values are
+    stored once in a vocabulary, and each species keeps the codes of its values plus a
+    (species x vocabulary) boolean mask for vectorized lookups.
+    Indexing or iterating gives one Species view per species, so the set can stand in
+    for a list of Species.
+    """
+    def __init__(self, rows):
+        """
+        Input: Species CSV rows (name, scientific name, qualitative fields, then parameters).
+               Parameters missing from the end of a row default to 0.
+        Attributes:
+            - matrix : np.ndarray               (species x parameter) numeric parameters
+            - parameter_index : {str: int}      parameter name -> column of matrix
+            - names, scientific_names : [str]
+            - categories : {str: [str]}         field -> vocabulary, indexed by code
+            - codes : {str: [(int)]}            field -> codes of each species' values, in order
+            - masks : {str: np.ndarray}         field -> (species x vocabulary) bool
+            - species : [Species]               One row view per species
+        """
+        rows = [list(row) for row in rows]
+        num_fields = 2 + len(QUALITATIVE_FIELDS)
+        for row in rows:
+            if not num_fields <= len(row) <= len(SPECIES_FIELDS):
+                raise ValueError(f"Species row has {len(row)} fields, expected {num_fields} to {len(SPECIES_FIELDS)}")
+
+        self.names = [row[0] for row in rows]
+        self.scientific_names = [row[1] for row in rows]
+
+        self.parameter_index = {name: j for j, name in enumerate(SPECIES_PARAMETERS)}
+        self.matrix = np.zeros((len(rows), len(SPECIES_PARAMETERS)))
+        for i, row in enumerate(rows):
+            values = row[num_fields:]
+            self.matrix[i, :len(values)] = [float(value) for value in values]
+
+        self.categories, self.codes, self.masks = {}, {}, {}
+        for j, field in enumerate(QUALITATIVE_FIELDS):
+            vocabulary = {}
+            self.codes[field] = [tuple(vocabulary.setdefault(value, len(vocabulary)) for value in row[2 + j].split('/'))
+                                 for row in rows]
+            self.categories[field] = list(vocabulary)
+            self.masks[field] = np.zeros((len(rows), len(vocabulary)), dtype=bool)
+            for i, codes in enumerate(self.codes[field]):
+                self.masks[field][i, list(codes)] = True
+
+        self.species = [Species.from_set(self, i) for i in range(len(rows))]
+
+
+    def __len__(self):
+        return len(self.species)
+
+
+    def __getitem__(self, index):
+        return self.species[index]
+
+
+    def __iter__(self):
+        return iter(self.species)
+
+
+    def column(self, name):
+        """
+        Input: Parameter name
+        Output: That parameter for every species, a view into the matrix
+        """
+        return self.matrix[:, self.parameter_index[name]]
+
+
+    def values(self, field, i):
+        """
+        Input: Qualitative field and a species index
+        Output: That species' values for the field, as a list of strings
+        """
+        return [self.categories[field][code] for code in self.codes[field][i]]
+
+
+    def has(self, field, value):
+        """
+        Input: Qualitative field and a value, e.g. ('habitat', 'temperate')
+        Output: Bool array, whether each species has that value
+        """
+        if value not in self.categories[field]:
+            return np.zeros(len(self), dtype=bool)
+        return self.masks[field][:, self.categories[field].index(value)].copy()
+
+
+    def parameter_dict(self, names=SPECIES_PARAMETERS):
+        """
+        Output: A dictionary of parameter name -> array with one entry per species
+        """
+        return {name: self.column(name).copy() for name in names}
+
+
+def parameter_property(name):
+    """
+    Output: A property that reads and writes this species' entry of a SpeciesSet parameter
+    """
+    def get_parameter(self):
+        return float(self.species_set.matrix[self.index, self.species_set.parameter_index[name]])
+
+    def set_parameter(self, value):
+        self.species_set.matrix[self.index, self.species_set.parameter_index[name]] = float(value)
+
+    return property(get_parameter, set_parameter)
+
+
+def qualitative_property(field):
+    """
+    Output: A property giving this species' values of a qualitative field, as a list of strings
+    """
+    return property(lambda self: self.species_set.values(field, self.index))
+
+
 class Species:
     """
     Holds information about a specific species.
     Takes in data collected by parameter estimator
 
+    A Species is a view onto one row of a SpeciesSet. A Species created on its own
+    gets a one-species set.
     TODO break up the local variables into smaller, identifiable classes
     """
     def __init__(self, name, name_scientific,leaf_shape, canopy_density, deciduous_evergreen,
@@ -18,72 +153,32 @@ class Species:
         Input from parameter estimation function output, 
         quantitative values default to 0 if not found
         """
-        self.name:str = name
-        self.name_scientific:str = name_scientific
-
-        # Obtained from LLM (all are lists of strings):
-        self.leaf_shape = leaf_shape.split('/')
-        self.leaf_color = leaf_color.split('/')
-
-        self.tree_form = tree_form.split('/')
-        self.tree_roots = tree_roots.split('/')
-
-        self.canopy_density = canopy_density.split('/')
-        self.deciduous_evergreen = deciduous_evergreen.split('/')
-        self.habitat = habitat.split('/')
-
-        self.bark_texture = bark_texture.split('/')
-        self.bark_color = bark_color.split('/')
-
-        # Estimated from knowledge base:
-        self.t_min = float(t_min) # Minimum temperature for growth
-        self.t_opt = float(t_opt)
-        self.t_max = float(t_max)
-        self.kf = float(kf)
-        self.fcax_700 = float(fcax_700)
-        self.kd = float(kd)
-        self.n_theta = float(n_theta)
-        self.c_theta = float(c_theta)
-        self.p2 = float(p2)
-        self.p20 = float(p20)
-        self.acx = float(acx)
-        self.sla_1 = float(sla_1)
-        self.sla_0 = float(sla_0)
-        self.t_sla_mid = float(t_sla_mid)
-        self.fn0 = float(fn0)
-        self.nfn = float(nfn)
-        self.tc = float(tc)
-        self.max_age = float(max_age)
-        self.r_age = float(r_age)
-        self.n_age = float(n_age)
-        self.mf = float(mf)
-        self.mr = float(mr)
-        self.ms = float(ms)
-        self.yfx = float(yfx)
-        self.yf0 = float(yf0)
-        self.tyf = float(tyf)
-        self.yr = float(yr)
-        self.nr_max = float(nr_max)
-        self.nr_min = float(nr_min)
-        self.m_0 = float(m_0)
-        self.wsx1000 = float(wsx1000)
-        self.nm = float(nm)
-        self.k = float(k)
-        self.aws = float(aws)
-        self.nws = float(nws)
-        self.ah = float(ah)
-        self.nhb = float(nhb)
-        self.nhc = float(nhc)
-        self.ahl = float(ahl)
-        self.nhlb = float(nhlb)
-        self.nhlc = float(nhlc)
-        self.ak = float(ak)
-        self.nkb = float(nkb)
-        self.nkh = float(nkh)
-        self.av = float(av)
-        self.nvb = float(nvb)
-        self.nvh = float(nvh)
-        self.nvbh = float(nvbh)
+        fields = locals()
+        species_set = SpeciesSet([[fields[field] for field in SPECIES_FIELDS]])
+        self.bind(species_set, 0)
+        species_set.species[0] = self
+
+
+    @classmethod
+    def from_set(cls, species_set, index):
+        """
+        Input: SpeciesSet and a species index
+        Output: A Species view onto that row
+        """
+        species = cls.__new__(cls)
+        species.bind(species_set, index)
+        return species
+
+
+    def bind(self, species_set, index):
+        """
+        Input: SpeciesSet and a species index
+        Output: None, this Species reads its name and parameters from that row
+        """
+        self.species_set = species_set
+        self.index = index
+        self.name:str = species_set.names[index]
+        self.name_scientific:str = species_set.scientific_names[index]
 
         # Data calculated from 3-PG:
         # species height, species dbh, species live crown length, species crown diameter
@@ -106,4 +201,11 @@ and are commonly found in {", ".join(self.habitat)} climates.')
         print(f'FOLIAGE: {self.name} tend to have a {", ".join(self.tree_form)} form, \
 with {", ".join(self.leaf_color)}, {", ".join(self.leaf_shape)}-type leaves.')
         print(f'WOOD: The bark of {self.name} have a {" or ".join(self.bark_texture)} texture \
-and tend to be {" and ".join(self.bark_color)} in color.\n')
\ No newline at end of file
+and tend to be {" and ".join(self.bark_color)} in color.\n')
+
+
+# Obtained from LLM (all are lists of strings), and estimated from knowledge base
+for _field in QUALITATIVE_FIELDS:
+    setattr(Species, _field, qualitative_property(_field))
+for _name in SPECIES_PARAMETERS:
+    setattr(Species, _name, parameter_property(_name))
@@ -7,10 +7,39 @@ Description: Initializes the coordinates for generated trees using scatter plot
 
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.spatial import distance
 
-from gauss import Gaussian
-from Forest import Forest
+from gauss import Gaussian, GaussianArray
+from placement import sample_tree_positions, place_by_radius, cluster_sample, CLUSTER_KERNELS
+from Forest import Forest, PLOT_SIZE
+from tree_table import TreeTable
+from threepg_engine import species_parameters, stand_dimensions
+
+PARENT_INTENSITY = 8. # clusters of each species in the plot, for clustered spacing
+CLUSTER_RADIUS = 0.08 # size of those clusters, as a fraction of the plot
+
+
+def column_property(name):
+    """
+    Output: A property that reads and writes this tree's row of a TreeTable column
+    """
+    def get_column(self):
+        return getattr(self.table, name)[self.index].item()
+
+    def set_column(self, value):
+        getattr(self.table, name)[self.index] = value
+
+    return property(get_column, set_column)
+
+
+def create_tree_key(name, tree_id):
+    """
+    Input: Species name and the tree's ID (see TreeTable)
+    Output: A string that will uniquely represent the tree.
+            First word of the species name + ID
+            i.e. Ponderosa1843
+    """
+    return name.split()[0] + str(tree_id)
+
 
 class Tree():
     """
@@ -18,8 +47,13 @@ class Tree():
     Inherits information about its species
     Calculates unique dimensions on initialization
     Initialization occurs when the (x,y) coordinates are generated
+
+    A Tree is a view onto one row of a TreeTable. A Tree created on its own gets a
+    one-row table, and is moved onto the forest's table by Forest.add_tree.
     TODO break up into two classes, Qualities and dimensions?
     """
+    __slots__ = ('table', 'index')
+
     def __init__(self, species, x, y):
         """
         Attributes:
@@ -35,27 +69,75 @@ class Tree():
             - dbh
             - lcl
             - c_diam
+            Stored in the table
+            - table : TreeTable
+            - index : int       Row of the table
+        """
+        self.table = TreeTable([species], capacity=1)
+        self.index = int(self.table.append(0, x, y)[0])
+
+
+    @classmethod
+    def from_table(cls, table, index):
         """
-        self.name = species.name
-        self.species = species
-        self.ba = (np.pi * species.b * species.b)/40000 # TODO should b be species specific?
-        self.c = 1. # competition index -> computed later
-        self.bark_texture = species.bark_texture
-        self.bark_color = species.bark_color
-        self.leaf_shape = species.leaf_shape
-        self.tree_form = species.tree_form
-
-        self.position = (x,y)
-        #self.compute_dimensions()
-        # self.height = self.generate_from(species.height)
-        # self.dbh = self.generate_from(species.dbh)
-        # self.lcl = self.generate_from(species.lcl)
-        # self.c_diam = self.generate_from(species.c_diam)
-
-        self.key = self.create_tree_key() # e.g. Ponderosa243123
-
-
-    def generate_from(self, dimension):
+        Input: TreeTable and a row index
+        Output: A Tree view onto that row
+        """
+        tree = cls.__new__(cls)
+        tree.table, tree.index = table, index
+        return tree
+
+
+    ba = column_property('ba')
+    c = column_property('c') # competition index -> computed later
+    height = column_property('height')
+    dbh = column_property('dbh')
+    lcl = column_property('lcl')
+    c_diam = column_property('c_diam')
+    age = column_property('age')
+    alive = column_property('alive')
+    id = column_property('id') # unique within the forest, given when the tree is added
+    parent = column_property('parent') # ID of the tree this one was spawned from, or NO_PARENT
+
+    @property
+    def species(self):
+        return self.table.species_list[self.table.species[self.index]]
+
+    @property
+    def name(self):
+        return self.species.name
+
+    @property
+    def bark_texture(self):
+        return self.species.bark_texture
+
+    @property
+    def bark_color(self):
+        return self.species.bark_color
+
+    @property
+    def leaf_shape(self):
+        return self.species.leaf_shape
+
+    @property
+    def tree_form(self):
+        return self.species.tree_form
+
+    @property
+    def position(self):
+        return (self.table.x[self.index].item(), self.table.y[self.index].item())
+
+    @position.setter
+    def position(self, position):
+        self.table.x[self.index], self.table.y[self.index] = position
+
+    @property
+    def key(self):
+        return self.create_tree_key() # e.g. Ponderosa1843
+
+
+    @staticmethod
+    def generate_from(dimension):
         """
         Input: Some dimension from the species
         Output: A slightly randomized variation of that dimension for the tree
@@ -68,19 +150,23 @@ class Tree():
         return abs(new_dimension) # dimension can't be negative
 
 
-    def create_tree_key(self):
+    @staticmethod
+    def generate_from_array(dimensions, rng=None):
         """
-        Input: Unique position of the tree
-        Output: A string that will uniquely represent the tree.
-                First word of the species name + x + y
-                i.e. Ponderosa184339
+        Input: Array of dimensions, and optionally a numpy Generator
+        Output: generate_from applied to every element at once, drawn from the same
+                truncated Gaussian by GaussianArray
         """
+        dimensions = np.asarray(dimensions, dtype=float)
+        return np.abs(GaussianArray(dimensions, (dimensions + 0.005) / 4, rng))
 
-        name = self.name.split()[0] # First word of the species name
-        x = str(int(self.position[0] * 1000)) # ex. 0.183444 -> '183'
-        y = str(int(self.position[1] * 1000)) # ex. 0.234950 -> '234'
 
-        return name + x + y
+    def create_tree_key(self):
+        """
+        Input: Unique ID of the tree
+        Output: A string that will uniquely represent the tree (see create_tree_key)
+        """
+        return create_tree_key(self.name, self.id)
 
 
     def get_tree_info(self):
@@ -128,36 +214,58 @@ class Tree():
     #     self.dbh = self.generate_from(dbh)
 
 
-def plot_trees(forest:Forest, plot=False, num_trees=50, min_distance=0.05):
+def crown_radii(forest:Forest, min_distance=0.05, plot_size=PLOT_SIZE):
     """
-    Input: Forest class object
-    Output: Forest, but with a populated tree list using tree class objects
-    Used for initial placement of trees
+    Input: Forest class object, the smallest spacing between trees and the width of the
+           plot in metres
+    Output: Exclusion radius of each species in plot units: half its mean crown diameter
+            (from its mean dbh), but never less than min_distance/2
     """
-    
-    def generate_random_point(existing_points, min_distance):
-        """
-        Ensures that there are no overlapping trees to start
-        Makes sure they're evenly spaced
-        """
-        while True:
-            x, z = np.random.rand(), np.random.rand()
-            if all(distance.euclidean([x, z], p) >= min_distance for p in existing_points):
-                return x, z
+    b = np.array([species.b for species in forest.species_list], dtype=float)
+    crown_diameter = stand_dimensions(species_parameters(forest.species_list), b)[2]
+    radii = crown_diameter / 2 / plot_size
+    return np.where(np.isfinite(radii), np.maximum(radii, min_distance / 2), min_distance / 2)
 
-    np.random.seed(np.random.randint(0,100))
-    points = []
-    
-    # Generate the random coordinates
-    for _ in range(num_trees):
-        x, z = generate_random_point(points, min_distance)
-        points.append([x, z])
-    
-    x_values, z_values = np.array(points).T  # Split the points into x and z coordinates
 
-    tree_names = [species.name for species in forest.species_list] # Get species names from the forest
+def plot_trees(forest:Forest, plot=False, num_trees=50, min_distance=0.05, rng=None, spacing='uniform',
+               parent_intensity=PARENT_INTENSITY, cluster_radius=CLUSTER_RADIUS):
+    """
+    Input: Forest class object, optionally a numpy Generator to place the trees with
+           (e.g. a ForestSimulator's, so that placement is reproducible), and the spacing:
+               - 'uniform' : every tree is at least min_distance from every other
+               - 'crown'   : every tree keeps its species' crown radius (crown_radii) clear
+               - 'thomas' or 'matern' : each species grows in clumps (see cluster_sample),
+                           with parent_intensity clusters per plot of cluster_radius
+                           (one value, or one per species)
+    Output: Forest, but with a populated tree list using tree class objects
+    Used for initial placement of trees. Raises ValueError if num_trees can't be placed.
+    """
     
-    tree_name = np.random.choice(tree_names, num_trees)  # Randomly select tree names
+    if rng is None:
+        rng = np.random.default_rng()
+
+    tree_names = np.array([species.name for species in forest.species_list]) # Get species names from the forest
+
+    if spacing == 'uniform':
+        # Generate the random coordinates, evenly spaced with no overlapping trees to start
+        x_values, z_values = sample_tree_positions(num_trees, min_distance, rng=rng).T
+        tree_name = rng.choice(tree_names, num_trees)  # Randomly select tree names
+    elif spacing == 'crown':
+        # Species first, so that each tree can keep its own crown clear
+        species_codes = rng.integers(len(tree_names), size=num_trees)
+        positions = place_by_radius(crown_radii(forest, min_distance)[species_codes], rng=rng)
+        if np.isnan(positions).any():
+            raise ValueError(f"Couldn't fit {num_trees} trees in the plot without their crowns overlapping")
+        x_values, z_values = positions.T
+        tree_name = tree_names[species_codes]
+    elif spacing in CLUSTER_KERNELS:
+        species_counts = rng.multinomial(num_trees, np.full(len(tree_names), 1 / len(tree_names)))
+        positions, species_codes = cluster_sample(species_counts, parent_intensity, cluster_radius,
+                                                  rng=rng, kernel=spacing)
+        x_values, z_values = positions.T
+        tree_name = tree_names[species_codes]
+    else:
+        raise ValueError(f"Invalid spacing: {spacing}")
 
     # Sort tree_name and corresponding x_values and z_values by tree_name
     sorted_indices = np.argsort(tree_name)
@@ -179,12 +287,8 @@ def plot_trees(forest:Forest, plot=False, num_trees=50, min_distance=0.05):
         plt.show()
     # ===========================================
 
-    # Create tree class objects out of the positions and tree names
-    for i in range(num_trees):
-        for species in forest.species_list:
-            if species.name == tree_name[i]:
-                forest.add_tree(Tree(species, x_values[i], z_values[i]))
-                continue
+    # Add the trees to the forest's table in one batch
+    forest.add_trees_bulk(tree_name, x_values, z_values)
     
     return forest
 
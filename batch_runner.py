@@ -0,0 +1,114 @@
+"""
+File: batch_runner.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Runs create_forest for many locations at once on a process pool.
+
+             Jobs are read from a manifest CSV with the columns
+                 climate,species,seed,num_trees,t
+             (plus an optional name column). Each job writes its forest to its own CSV in
+             the output directory as soon as it finishes, and a line is added to
+             batch_results.csv for every job, so a failed job never takes the batch down.
+
+             Usage: python batch_runner.py manifest.csv --workers 64 --output-dir batch_output
+"""
+
+import argparse
+import csv
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from create_forest import create_forest, write_forest_csv
+
+RESULT_FIELDS = ('name', 'status', 'output', 'seconds', 'error')
+
+
+def read_manifest(filepath):
+    """
+    Input: Manifest CSV filepath
+    Output: A list of job dictionaries (name, climate, species, seed, num_trees, t).
+            Jobs without a name are named after their climate file and row.
+    """
+    jobs = []
+    with open(filepath, 'r', encoding='utf-8') as file:
+        for i, row in enumerate(csv.DictReader(file)):
+            if not row.get('climate') or row['climate'].startswith("#"):
+                continue
+            jobs.append({
+                'name': row.get('name') or f"{os.path.splitext(os.path.basename(row['climate']))[0]}_{i}",
+                'climate': row['climate'],
+                'species': row['species'],
+                'seed': int(row['seed']) if row.get('seed') else None,
+                'num_trees': int(row['num_trees']) if row.get('num_trees') else 100,
+                't': int(row['t']) if row.get('t') else 60,
+            })
+    return jobs
+
+
+def run_job(job, output_dir):
+    """
+    Input: A job dictionary and the output directory
+    Output: The filepath of the forest CSV written for the job
+    Runs in a worker process.
+    """
+    # only the soil water draw uses the random module; placement and jitter use the
+    # numpy Generator seeded by create_forest
+    random.seed(job['seed'])
+    forest = create_forest(job['climate'], job['species'], num_trees=job['num_trees'], t=job['t'], seed=job['seed'])
+    filepath = os.path.join(output_dir, f"{job['name']}.csv")
+    write_forest_csv(forest, filepath, job['t'])
+    return filepath
+
+
+def _timed_job(job, output_dir):
+    """ Runs a job, returning its result row instead of raising. """
+    start = time.perf_counter()
+    try:
+        output = run_job(job, output_dir)
+        return {'name': job['name'], 'status': 'ok', 'output': output,
+                'seconds': round(time.perf_counter() - start, 3), 'error': ''}
+    except Exception:
+        return {'name': job['name'], 'status': 'failed', 'output': '',
+                'seconds': round(time.perf_counter() - start, 3), 'error': traceback.format_exc(limit=3)}
+
+
+def run_batch(jobs, output_dir="batch_output", workers=None):
+    """
+    Input: A list of job dictionaries, output directory, number of worker processes
+           (defaults to the number of CPUs)
+    Output: A list of result rows, one per job, in the order the jobs finished.
+            Results are also appended to output_dir/batch_results.csv as they come in.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    with open(os.path.join(output_dir, 'batch_results.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_timed_job, job, output_dir): job for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as error: # the worker itself died
+                    result = {'name': futures[future]['name'], 'status': 'failed', 'output': '',
+                              'seconds': '', 'error': repr(error)}
+                writer.writerow(result)
+                file.flush()
+                results.append(result)
+                print(f"[{len(results)}/{len(jobs)}] {result['name']}: {result['status']}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run create_forest for every job in a manifest CSV.")
+    parser.add_argument('manifest', help="CSV with climate,species,seed,num_trees,t columns")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument('--output-dir', default="batch_output")
+    args = parser.parse_args()
+
+    batch_results = run_batch(read_manifest(args.manifest), args.output_dir, args.workers)
+    failed = [result['name'] for result in batch_results if result['status'] != 'ok']
+    print(f"{len(batch_results) - len(failed)} jobs finished, {len(failed)} failed {failed if failed else ''}")
@@ -0,0 +1,175 @@
+"""
+File: checkpoint.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Saves and restores the full state of a ForestSimulator, so that long runs can be
+             interrupted and resumed without losing the months already simulated.
+
+             A checkpoint is a single compressed .npz file holding the per-species biomass pools,
+             the stem counts, the placed trees, the soil water drawn for the climate, both RNG
+             states, the current month and the simulator's settings (competition index, Hegyi
+             radius, plot size, crown resolution, mortality and recruitment). Checkpoints are
+             written to a temporary file and moved into place, so a crash mid-write never leaves
+             a half-written checkpoint behind.
+"""
+
+import json
+import os
+import random
+
+from create_forest import *
+from recruitment import Recruitment
+
+CHECKPOINT_VERSION = 4
+
+# Per-tree columns saved in a checkpoint
+TREE_FIELDS = ('x', 'y', 'ba', 'c', 'height', 'dbh', 'lcl', 'c_diam', 'age', 'alive', 'id', 'parent')
+
+
+def simulator_settings(simulator:ForestSimulator):
+    """
+    Input: ForestSimulator
+    Output: Dictionary of the simulator's settings, in plain types so it can be stored as JSON
+    """
+    mortality, recruitment = simulator.mortality, simulator.recruitment
+    return {
+        'competition': simulator.competition,
+        'hegyi_radius': float(simulator.hegyi_radius),
+        'plot_size': float(simulator.plot_size),
+        'crowns': simulator.crowns,
+        'mortality': None if mortality is None else {'competition_weight': float(mortality.competition_weight),
+                                                     'size_weight': float(mortality.size_weight)},
+        'recruitment': None if recruitment is None else {
+            'masting_cycle': recruitment.masting_cycle.tolist(),
+            'maturity_age': recruitment.maturity_age.tolist(),
+            'seeds_per_tree': recruitment.seeds_per_tree.tolist(),
+            'dispersal_distance': recruitment.dispersal_distance.tolist(),
+            'cell_size': float(recruitment.cell_size),
+            'width': float(recruitment.size[0]), 'height': float(recruitment.size[1])},
+    }
+
+
+def apply_settings(simulator:ForestSimulator, settings):
+    """
+    Input: ForestSimulator, and settings from simulator_settings
+    Output: None, the simulator's settings are replaced
+    """
+    simulator.competition = settings['competition']
+    simulator.hegyi_radius = settings['hegyi_radius']
+    simulator.plot_size = settings['plot_size']
+    simulator.crowns = settings['crowns']
+    mortality, recruitment = settings['mortality'], settings['recruitment']
+    simulator.mortality = None if mortality is None else Mortality(**mortality)
+    simulator.recruitment = None if recruitment is None else Recruitment(simulator.forest, **recruitment)
+
+
+def save_checkpoint(simulator:ForestSimulator, filepath):
+    """
+    Input: ForestSimulator, checkpoint filepath
+    Output: None, the simulator state is atomically written to filepath
+    """
+    forest = simulator.forest
+    state = simulator.state
+    trees = forest.trees
+
+    data = {
+        'version': np.array(CHECKPOINT_VERSION),
+        'month': np.array(simulator.month),
+        'num_placed': np.array(simulator.num_placed),
+        'forest_num_trees': np.array(forest.num_trees),
+        'species_names': np.array([species.name for species in forest.species_list]),
+        'soil_water': simulator.climate['soil_water'],
+        'foliage': state.foliage,
+        'stem': state.stem,
+        'root': state.root,
+        'num_trees': state.num_trees,
+        'num_trees_died': state.num_trees_died,
+        'b': state.b,
+        'tree_species': trees.species.copy(),
+        'next_tree_id': np.array(trees.next_id),
+        'rng_state': np.array(json.dumps(simulator.rng.bit_generator.state)),
+        'random_state': np.array(json.dumps(random.getstate())),
+        'settings': np.array(json.dumps(simulator_settings(simulator))),
+    }
+    for field in TREE_FIELDS:
+        data['tree_' + field] = getattr(trees, field).copy()
+
+    # write next to the destination, then swap it in
+    temp_filepath = f'{filepath}.tmp'
+    with open(temp_filepath, 'wb') as file:
+        np.savez_compressed(file, **data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_filepath, filepath)
+
+
+def load_checkpoint(filepath, forest:Forest):
+    """
+    Input: Checkpoint filepath, and a Forest read from the same climate and species files
+           as the checkpointed run
+    Output: A ForestSimulator that continues exactly where the checkpoint left off, with
+            the settings it was saved with
+    """
+    with np.load(filepath) as data:
+        if int(data['version']) != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {int(data['version'])} in {filepath}")
+        species_names = [str(name) for name in data['species_names']]
+        if species_names != [species.name for species in forest.species_list]:
+            raise ValueError(f"Checkpoint {filepath} was saved for species {species_names}")
+
+        # soil water is drawn at random when the climate is read, so use the checkpoint's draw
+        for month, soil_water in zip(forest.climate_list, data['soil_water']):
+            month.soil_water = float(soil_water)
+
+        simulator = ForestSimulator(forest)
+        simulator.month = int(data['month'])
+        simulator.num_placed = int(data['num_placed'])
+        apply_settings(simulator, json.loads(str(data['settings'])))
+        for field in ('foliage', 'stem', 'root', 'num_trees', 'num_trees_died', 'b'):
+            setattr(simulator.state, field, data[field].copy())
+        simulator.rng.bit_generator.state = json.loads(str(data['rng_state']))
+        random_state = json.loads(str(data['random_state']))
+        random.setstate((random_state[0], tuple(random_state[1]), random_state[2]))
+
+        simulator.step(0)
+        forest.num_trees = int(data['forest_num_trees'])
+
+        forest.trees = TreeTable(forest.species_list, len(data['tree_species']))
+        forest.trees.append(data['tree_species'], data['tree_x'], data['tree_y'],
+                            **{field: data['tree_' + field] for field in TREE_FIELDS[2:]})
+        forest.trees.next_id = int(data['next_tree_id'])
+
+    return simulator
+
+
+def run_with_autosave(simulator:ForestSimulator, t, filepath, every=120):
+    """
+    Input: ForestSimulator, time to run until (in months), checkpoint filepath,
+           and how many months to simulate between checkpoints
+    Output: The forest after month t. A checkpoint is saved every `every` months
+            and once more at the end.
+    """
+    while simulator.month <= t:
+        simulator.step(min(every, t + 1 - simulator.month))
+        save_checkpoint(simulator, filepath)
+    return simulator.forest
+
+
+def resume_or_start(climate_fp, species_fp, filepath, num_trees=100, seed=None):
+    """
+    Input: Filepaths for climate, species and the checkpoint
+    Output: A ForestSimulator resumed from the checkpoint if it exists,
+            otherwise a new one
+    """
+    forest = Forest(climate_fp, species_fp, num_trees)
+    if os.path.exists(filepath):
+        return load_checkpoint(filepath, forest)
+    return ForestSimulator(forest, seed)
+
+
+if __name__ == '__main__':
+    # example usage: a 100 year run that can be killed and restarted
+    example_simulator = resume_or_start("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv",
+                                        "prineville.npz", num_trees=100)
+    run_with_autosave(example_simulator, 1200, "prineville.npz", every=120)
+    example_simulator.snapshot().print_tree_list()
@@ -19,10 +19,15 @@ Description: Uses 3-PG to calculate various parameters of a tree, which will be
              5. Take the final state of the forest and write to Blender
 """
 
+import copy
+import csv
 import math
 from Tree import *
+from Forest import HEGYI_RADIUS
+from threepg_engine import *
+from mortality import Mortality
+from crowns import resolve_crowns
 
-E = 2.718
 PI = 3.1415
 
 """
@@ -31,225 +36,380 @@ PI = 3.1415
 =====================================================================
 """
 
-INIT_DBH = 0. #9 initial dbh-- was 18 TODO determine init_dbh, and what units?
-
-CO2 = 350 # Atmospheric CO2 (ppm) TODO Implement estimated CO2 function taken from NASA data: https://climate.nasa.gov/vital-signs/carbon-dioxide/?intent=121
-
-# general for GPP
-FERTILITY_RATING = 1 # fertility rating, ranges from 0 to 1
-CONVERSION_RATIO = 0.47 # for making GPP into NPP
-
-START_AGE = 5 # this is the stand's age in years at t = 0
-START_MONTH = 1 # this is the number of the month in which the simulation is beginning
-START_YEAR = 1960 # this is the year the simulation was started. TODO Used for prints only?
-
 def threepg(forest:Forest, t:int):
     """
     Input: Forest (climate, species), time interval (in months)
     Output: Updated forest, with specific dimensions for each species
-            at the time interval?
-    """
-    # Initial biomasses -- all are in tonnes of dry mass per hectare, or tDM/ha
-    # TODO need to figure out what these values should be, and if they should be
-    #       different for each species or even each tree
-    init_foliage_biomass = 7.
-    init_root_biomass = 9.
-    init_stem_biomass = 20.
-
-    # for each of the species in the list:
-    for species in forest.species_list:
-        # initialize biomass
-        last_foliage_biomass = init_foliage_biomass
-        last_stem_biomass = init_stem_biomass
-        last_root_biomass = init_root_biomass
-
-        num_trees_died = 0 # number of trees that died last month. TODO Use this for killing trees
-
-        # for each month in the time interval:
-        for month_t in range(t+1):
-            # get the current month, mean temp for the month
-            climate = forest.climate_list
-            current_month = ((START_MONTH + month_t) % 12)-1 # jan - dec
-            if current_month == 0:
-                current_month = 11
-
-            # function to calculate co2 levels on earth based on the season and year.
-            # estimated from NASA data on Global Climate Change TODO cite source here
-            x = START_YEAR + ((START_MONTH + month_t) / 12) # TODO verify this is correct
-            co2 = ((98/60) * x - 2885.33) + 3 * math.sin(7 * x)
-
-            env_mods, phys_mod = calculate_mods(climate[current_month], species, co2) # env_mods = ft * ff * fn * fc
-
-            # specific leaf area (SLA)
-            exp1 = pow(((START_AGE * 12.) + month_t)/species.t_sla_mid, 2.)
-            sla = species.sla_1 + (species.sla_0 - species.sla_1) * pow(E, (-1 * math.log(2.) * exp1))
-
-            # leaf area index (m^2 / m^2)
-            leaf_area_index = 0.1 * sla * last_foliage_biomass
-
-            # ground area coverage (GAC) by canopy
-            if START_AGE + month_t / 12 < species.tc:
-                ground_area_coverage = (START_AGE + month_t / 12) / species.tc
-            else:
-                ground_area_coverage = 1. # TODO verify this makes sense
-
-            # light absorption --> absorption photosynthetically active radiation (PAR)
-            # Often called o/pa
-            e_exp = (-species.k * leaf_area_index)/ground_area_coverage
-            par = (1 - pow(E, e_exp)) * 2.3 * ground_area_coverage * climate[current_month].solar_rad
-
-            # computing GPP and NPP
-            gpp = env_mods * phys_mod * species.acx * par
-            npp = gpp * CONVERSION_RATIO
-
-            # partitioning ratios
-            # computing m --> linear function of FR (fertility rating)
-            m = species.m_0 + ((1. - species.m_0) * FERTILITY_RATING)
-
-            # root partitioning ratio
-            root_partition_ratio = (species.nr_min * species.nr_max) / (species.nr_min + ((species.nr_max - species.nr_min) * m * phys_mod))
-
-            # compute np and ap, which are used to calculate pfs TODO what are these
-            np = (math.log(species.p20/species.p2))/math.log(10.) # equation A29
-            ap = species.p2/(pow(2., np)) # equation A29
-
-            b = 1 # TODO what is b?
-            pfs = ap * pow(b, np)
-
-            # getting remaining partitioning ratios
-            nf = (pfs * (1. - root_partition_ratio))/(1. + pfs) # TODO foliage partition
-            ns = (1. - root_partition_ratio)/(1. + pfs) # TODO soil partition
-
-            # compute litterfall
-            current_age = START_AGE + t/12 # TODO start_age is in years? This feels wrong
-            # according to 3-PG manual, page 33:
-                # For deciduous species, the litterfall rates yf0 and yfx may be considered
-                # to be 0 because all of the foliage is lost at the end of the growing season anyway.
-            if species.deciduous_evergreen == ['deciduous'] and (species.yf0 == 0 or species.yfx == 0):
-                litterfall_rate = 0  # otherwise we get a divide by zero
-            else:
-                lf_exp = -(current_age/species.tyf) * math.log(1.0 + species.yfx/species.yf0)
-                litterfall_rate = (species.yfx * species.yf0)/(species.yf0 + (species.yfx - species.yf0) * pow(E, lf_exp))
-
-            # compute biomass
-            # setting current = to last month's
-            curr_foliage_biomass = last_foliage_biomass
-            curr_stem_biomass = last_stem_biomass
-            curr_root_biomass = last_root_biomass
-
-            # increment the current using last month's values
-            curr_foliage_biomass += (nf * npp) - (litterfall_rate * last_foliage_biomass) - (species.mf * (last_foliage_biomass / forest.num_trees) * num_trees_died)
-            curr_root_biomass += (root_partition_ratio * npp) - (species.yr * last_root_biomass) - (species.mr * (last_root_biomass / forest.num_trees) * num_trees_died)
-            curr_stem_biomass += (ns * npp) - (species.ms * (last_stem_biomass / forest.num_trees) * num_trees_died)
-
-            # making the current into last month's for the next month
-            if curr_foliage_biomass > 0.:
-                last_foliage_biomass = curr_foliage_biomass
-            if curr_stem_biomass > 0.:
-                last_stem_biomass = curr_stem_biomass
-            if curr_root_biomass > 0.:
-                last_root_biomass = curr_root_biomass
-
-            # check if we need to thin/kill some trees
-            # mortality
-            # max individual tree stem mass (wsx)
-            max_ind_tree_stem_mass_wsx = species.wsx1000 * pow((1000.0/forest.num_trees), species.nm)
-            while last_stem_biomass / forest.num_trees > max_ind_tree_stem_mass_wsx and forest.num_trees > 0:
-                # need to thin
-                forest.num_trees -= 1  # decreasing n
-                num_trees_died += 1 # increasing delta_n counter
-                max_ind_tree_stem_mass_wsx = species.wsx1000 * pow((1000.0/forest.num_trees), species.nm) # recalculating wsx
-
-                # calculating b from mean individual stem mass (inversion of A65 of user manual)
-            ind_stem_mass_iws = last_stem_biomass / forest.num_trees # individual stem mass
-            species.b = pow(ind_stem_mass_iws/species.aws, (1.0/species.nws)) * 100 # TODO what is b?
-
-    return forest
+            at the time interval
 
-
-def calculate_mods(curr_climate, species, co2):
-    """
-    Input: Current climate conditions
-    Output: Computed modifiers for use in GPP/NPP computation.
+    All species are advanced together by the vectorized engine in threepg_engine.py.
+    Each species starts from the forest's stem count and thins on its own, and the
+    forest keeps the lowest surviving stem count of the stand.
     """
-    mean_monthly_temp = (curr_climate.tmax + curr_climate.tmin)/2.
-    # temperature mod (ft)
-    if (mean_monthly_temp > species.t_max) or (mean_monthly_temp < species.t_min):
-        # outside of growth range -> 0
-        temp_mod = 0. # TODO temp mod
-    else:
-        # inside of growth range
-        base = (mean_monthly_temp - species.t_min / (species.t_opt - species.t_min) * (species.t_max - mean_monthly_temp)/(species.t_max - species.t_opt))
-        exp = (species.t_max - species.t_opt)/(species.t_opt - species.t_min)
-        temp_mod = pow(base, exp) #TODO temp mod
-
-    # frost mod
-    frost_days = curr_climate.frost_days # aka df
-    frost_mod = 1. - species.kf * (frost_days/30.) #TODO frost mod
-
-    # nutrition mod
-    nutrition_mod = 1. - (1. - species.fn0) * pow((1. - FERTILITY_RATING), species.nfn) # TODO nutrition mod
-
-    # CO2 mod
-    fcax = species.fcax_700/(2. - species.fcax_700) # the species specific repsonses to changes in atmospheric co2
-    co2_mod = fcax * co2/(350. * (fcax - 1.) + co2) # TODO c02 mod - is '350' need to be changed to co2? Research this formula
-
-    # physical mod - derived from fd, ftheta
-    # vapor pressure deficit (VPD) mod
-    vpd_mod = pow(E, (-species.kd * curr_climate.vpd)) # TODO VPD mod
-
-    # soil water mod
-    base1 = ((1. - curr_climate.soil_water)/curr_climate.max_soil_water)/species.c_theta
-    soil_water_mod = 1./(1. + pow(base1, species.n_theta))
+    state = run_threepg(forest.species_list, forest.climate_list, forest.num_trees, t)
 
-    phys_mod = vpd_mod * soil_water_mod # TODO verify we don't need fa (age_mod)
+    for i, species in enumerate(forest.species_list):
+        species.b = float(state.b[i])
+    forest.num_trees = int(state.num_trees.min())
 
-    return temp_mod * frost_mod * nutrition_mod * co2_mod, phys_mod
+    return forest
 
 
-def compute_dimensions(forest):
+def compute_dimensions(forest, competition='bal', rng=None, radius=HEGYI_RADIUS, plot_size=PLOT_SIZE):
     """
-    Input: Tree class object
-    Output: Computed and slightly randomized dimensions for the tree
+    Input: Forest with placed trees, the competition index method ('bal' or 'hegyi',
+           see Forest.compute_competition_indices), optionally a numpy Generator
+           for the jitter, and the Hegyi radius and plot size, in metres
+    Output: Computed and slightly randomized dimensions for every living tree, written into
+            the columns of the forest's TreeTable. Dead trees keep their last dimensions.
+            Each tree's dimensions come from its own dbh (from its basal area) in place of
+            its species' mean dbh (b), so seedlings come out smaller than the adults.
     TODO the dimensions outputted don't always make sense...
     """
 
-    forest.compute_competition_indices()
-    for tree in forest.trees_list:
-        species = tree.species
+    forest.compute_competition_indices(competition, radius, plot_size)
+    trees = forest.trees
+    alive = np.flatnonzero(trees.alive)
+    species, c, ba = trees.species[alive], trees.c[alive], trees.ba[alive]
+
+    # species parameters, one entry per species
+    params = species_parameters(forest.species_list)
+    b = np.sqrt(ba * 40000 / np.pi) # each tree's own dbh, in cm like the species' b
 
-        # === compute dimensions based on parameters ===
-        # TODO implement relative height
-        # ==============================================
+    # === compute dimensions based on parameters ===
+    # TODO implement relative height
+    # ==============================================
 
-        # bias correction to adjust b TODO implement later?
+    # bias correction to adjust b TODO implement later?
 
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
         # mean tree height TODO what is the difference between species formula and individual tree formula?
         #mean_tree_height = 1.3 + species.ah * pow(np.e, (-species.nhb/species.b)) + species.nhc * species.b # for single tree species
-        mean_tree_height = species.ah * pow(species.b, species.nhb) * pow(tree.c, species.nhc) # A.61
+        mean_tree_height = params['ah'][species] * np.power(b, params['nhb'][species]) * np.power(c, params['nhc'][species]) # A.61
 
         # live crown length TODO same thing
         # live_crown_length = 1.3 + species.ahl * pow(np.e, (-species.nhlb/species.b)) + species.nhlc * species.b
-        live_crown_length = species.ahl * pow(species.b, species.nhlb) * pow(tree.c, species.nhlc) # A.62
+        live_crown_length = params['ahl'][species] * np.power(b, params['nhlb'][species]) * np.power(c, params['nhlc'][species]) # A.62
 
         # crown diameter
         #crown_diameter = species.ak * pow(species.b, species.nkb) * pow(mean_tree_height, species.nkh)
-        crown_diameter = species.ak * pow(species.b, species.nkb) * pow(mean_tree_height, species.nkh) * pow(tree.c, 0) # A.63
+        crown_diameter = params['ak'][species] * np.power(b, params['nkb'][species]) * np.power(mean_tree_height, params['nkh'][species]) # A.63, competition index to the 0
+
+    # stand volume TODO not used
+    #stand_volume = species.av * pow(species.b, species.nvb) * pow(mean_tree_height, species.nvh) * pow(species.b * species.b * mean_tree_height, species.nvbh) * num_trees
+
+    # diameter at breast height
+    dbh = np.sqrt((4 * ba) / np.pi) # trunk of the standing trees
 
-        # stand volume TODO not used
-        #stand_volume = species.av * pow(species.b, species.nvb) * pow(mean_tree_height, species.nvh) * pow(species.b * species.b * mean_tree_height, species.nvbh) * num_trees
+    # Assign to trees, all jittered in one batch
+    dimensions = np.stack((mean_tree_height, live_crown_length, crown_diameter, dbh))
+    dimensions = Tree.generate_from_array(dimensions, rng)
+    trees.height[alive], trees.lcl[alive], trees.c_diam[alive], trees.dbh[alive] = dimensions
+
+
+def b_growth(b, new_b):
+    """
+    Input: Each species' mean dbh (b) before and after some months, in cm
+    Output: (species) change in b, 0 for species whose b is undefined (no stems left)
+    """
+    with np.errstate(invalid='ignore'):
+        return np.nan_to_num(new_b - b, nan=0., posinf=0., neginf=0.)
 
-        # diameter at breast height
-        dbh = np.sqrt((4 * species.ba) / np.pi) # trunk of the standing trees
 
-        # Assign to tree
-        tree.height = tree.generate_from(mean_tree_height)
-        tree.lcl = tree.generate_from(live_crown_length)
-        tree.c_diam = tree.generate_from(crown_diameter)
-        tree.dbh = tree.generate_from(dbh)
+def grow_trees(forest, growth):
+    """
+    Input: Forest with placed trees, and (species) change in each species' mean dbh (b), in cm
+    Output: None. Every living tree's dbh changes by as much as its species' b (down to 0),
+            and its basal area follows, so trees keep their own size as the stand grows
+    """
+    trees = forest.trees
+    alive = np.flatnonzero(trees.alive)
+    dbh = np.maximum(np.sqrt(trees.ba[alive] * 40000 / np.pi) + growth[trees.species[alive]], 0.)
+    trees.ba[alive] = (np.pi * dbh * dbh)/40000
 
 
-def create_forest(climate_fp, species_fp, num_trees = 100, t = 60):
+class ForestSimulator:
+    """
+    Keeps the 3-PG state of a forest between calls, so that the forest can be advanced
+    a few months at a time instead of being recomputed from month 0 for every snapshot.
+    """
+    def __init__(self, forest:Forest, seed=None, competition='bal', hegyi_radius=HEGYI_RADIUS, plot_size=PLOT_SIZE):
+        """
+        Attributes:
+            - forest : Forest
+            - params : {str: np.ndarray}    Species parameters, one entry per species
+            - climate : {str: np.ndarray}   Monthly climate arrays
+            - state : StandState            Biomass pools and stem counts for each species
+            - month : int                   Number of months simulated so far
+            - rng : np.random.Generator     Used to place the trees
+            - num_placed : int              Number of individual trees to place
+            - competition : str             Competition index snapshots and mortality use ('bal' or 'hegyi')
+            - hegyi_radius : float          Neighbourhood radius of the Hegyi index, in metres
+            - plot_size : float             Metres across the plot, for the Hegyi index and crowns
+            - crowns : str                  How snapshots resolve overlapping crowns (see
+                                            CROWN_METHODS), None to leave them
+            - mortality : Mortality         Kills placed trees as the stand thins, None to keep them all
+            - recruitment : Recruitment     Seed dispersal for the placed trees, None for none
+        """
+        self.forest = forest
+        self.params = species_parameters(forest.species_list)
+        self.climate = climate_arrays(forest.climate_list)
+        self.state = StandState(len(forest.species_list), forest.num_trees)
+        self.month = 0
+        self.rng = np.random.default_rng(seed)
+        self.num_placed = forest.num_trees
+        self.competition = competition
+        self.hegyi_radius = hegyi_radius
+        self.plot_size = plot_size
+        self.crowns = None
+        self.mortality = Mortality()
+        self.recruitment = None
+        self.tables = None
+
+
+    def get_tables(self, month_t):
+        """
+        Input: A month that is about to be simulated
+        Output: Precomputed 3-PG tables that reach at least that month.
+                The horizon doubles whenever it runs out.
+        """
+        if self.tables is None or self.tables.t < month_t:
+            horizon = max(month_t, 2 * self.tables.t if self.tables is not None else 120)
+            self.tables = precompute_tables(self.params, self.climate, horizon)
+        return self.tables
+
+
+    def step(self, n_months=1):
+        """
+        Input: Number of months to advance
+        Output: The forest, with each species' b and the stem count updated, and its placed
+                trees grown and thinned along with the stand, aged and, with recruitment, reseeded
+        """
+        if n_months > 0:
+            tables = self.get_tables(self.month + n_months - 1)
+            survival = np.ones((n_months, len(self.forest.species_list)))
+            growth = np.zeros_like(survival)
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                for i, month_t in enumerate(range(self.month, self.month + n_months)):
+                    num_trees, b = self.state.num_trees, self.state.b.copy()
+                    threepg_step(self.params, tables, self.state, month_t)
+                    np.divide(self.state.num_trees, num_trees, out=survival[i], where=num_trees > 0)
+                    growth[i] = b_growth(b, self.state.b)
+            self.update_trees(self.month, survival, growth)
+            self.month += n_months
+
+        for i, species in enumerate(self.forest.species_list):
+            species.b = float(self.state.b[i])
+        self.forest.num_trees = int(self.state.num_trees.min())
+        return self.forest
+
+
+    def update_trees(self, first_month, survival, growth):
+        """
+        Input: First month simulated, (months x species) share of each species' stems
+               that survived each month, and (months x species) change in each species' b
+        Output: None. Month by month, the placed trees grow with their species, die as the
+                stand thinned (weighted by their current size and competition), the rest are
+                a month older, and with recruitment, the month's seedlings are dispersed
+        """
+        trees = self.forest.trees
+        if not len(trees):
+            return
+        if self.recruitment is None and (self.mortality is None or np.all(survival == 1)):
+            grow_trees(self.forest, growth.sum(axis=0))
+            trees.age[:] += len(survival)
+            return
+        for month_t, (month_survival, month_growth) in enumerate(zip(survival, growth), start=first_month):
+            grow_trees(self.forest, month_growth)
+            self.apply_mortality(month_survival)
+            trees.age[:] += 1
+            if self.recruitment is not None:
+                self.recruitment.disperse(self.forest, month_t, self.rng)
+
+
+    def apply_mortality(self, survival):
+        """
+        Input: (species) share of each species' stems that survived the month
+        Output: None. With mortality, the competition indices are brought up to date with
+                the trees' current basal areas and the placed trees thinned along with the stand
+        """
+        if self.mortality is None or np.all(survival >= 1):
+            return
+        self.forest.compute_competition_indices(self.competition, self.hegyi_radius, self.plot_size)
+        self.mortality.apply(self.forest, survival, self.rng)
+
+
+    def stream(self, n_months):
+        """
+        Input: Number of months to advance
+        Output: Yields one record per month simulated, a dictionary of
+                month, species names, and one array entry per species for the
+                biomass pools, stem count, b, height, lcl and crown diameter.
+                Nothing is kept between months, so runs of any length stream
+                in constant memory.
+        """
+        species_names = [species.name for species in self.forest.species_list]
+        for _ in range(n_months):
+            self.step(1)
+            state = self.state
+            height, lcl, c_diam = stand_dimensions(self.params, state.b)
+            yield {'month': self.month - 1, 'species': species_names,
+                   'foliage': state.foliage, 'stem': state.stem, 'root': state.root,
+                   'num_trees': state.num_trees, 'b': state.b,
+                   'height': height, 'lcl': lcl, 'c_diam': c_diam}
+
+
+    def run_until(self, t):
+        """
+        Input: Time (in months)
+        Output: The forest after months 0 through t, same as threepg(forest, t)
+        """
+        if t + 1 < self.month:
+            raise ValueError(f"Simulator is already at month {self.month}, can't run back to t={t}")
+        return self.step(t + 1 - self.month)
+
+
+    def spin_up(self, tol=1e-3, max_years=1000, accelerate=True, atol=1e-6):
+        """
+        Input: Relative tolerance on the year-to-year change of the biomass pools, the most
+               years to spin up for, whether to extrapolate with Aitken's delta-squared, and
+               an absolute tolerance so that pools dying off towards 0 count as settled
+        Output: A dictionary of
+                    - 'converged' : bool        whether the annual cycle settled within tol
+                    - 'years_simulated' : int   years actually stepped through
+                    - 'years_skipped' : int     years jumped over by extrapolation
+                    - 'month' : int             the simulator's month afterwards
+        The climate repeats every 12 months, so the state at the same month of each year is
+        a fixed-point iteration. Whenever the last few years shrink geometrically at a steady
+        rate (and no trees died in between), the pools are moved to the Aitken limit and the
+        simulator's month jumps ahead by the years it would have taken to get within tol.
+        """
+        history = [self._annual_pools()]
+        years_simulated = years_skipped = 0
+        converged = False
+        while years_simulated + years_skipped < max_years:
+            self.step(12)
+            years_simulated += 1
+            history.append(self._annual_pools())
+
+            previous, current = history[-2], history[-1]
+            if np.all(np.abs(current - previous) <= tol * np.abs(current) + atol):
+                converged = True
+                break
+
+            if accelerate and len(history) >= 4:
+                jump = self._aitken_jump(history[-4:], tol, atol, max_years - years_simulated - years_skipped)
+                if jump:
+                    years_skipped += jump
+                    history = [self._annual_pools()]
+
+        self.step(0)
+        return {'converged': converged, 'years_simulated': years_simulated,
+                'years_skipped': years_skipped, 'month': self.month}
+
+
+    def _annual_pools(self):
+        """ Output: The biomass pools and stem counts of every species, as one flat array """
+        state = self.state
+        return np.concatenate([state.foliage, state.stem, state.root, state.num_trees]).astype(float)
+
+
+    def _aitken_jump(self, history, tol, atol, max_jump):
+        """
+        Input: The pools at the end of the last four years, tolerances, and the most years to skip
+        Output: Number of years skipped (0 if the last four years don't look geometric).
+                The state is moved to the extrapolated pools in place.
+        """
+        num_species = len(self.forest.species_list)
+        x0, x1, x2, x3 = history
+        d0, d1, d2 = x1 - x0, x2 - x1, x3 - x2
+        # stem counts must have held still; thinning is a discontinuous jump, not a contraction
+        if np.any(np.stack([d0, d1, d2])[:, 3*num_species:] != 0):
+            return 0
+        moving = np.abs(d2) > tol * np.abs(x3) + atol
+        if not moving.any() or np.any(d0[moving] == 0) or np.any(d1[moving] == 0):
+            return 0
+        # the change must be shrinking by the same ratio year after year
+        ratio, previous_ratio = d2[moving] / d1[moving], d1[moving] / d0[moving]
+        if np.any(ratio <= 0) or np.any(ratio >= 1) or np.any(np.abs(ratio - previous_ratio) > 0.1 * ratio):
+            return 0
+
+        limit = x3.copy()
+        limit[moving] = x3[moving] + d2[moving] * ratio / (1 - ratio)
+        if np.any(limit <= 0):
+            return 0
+        # years for the remaining change to shrink below tol at the observed rate
+        years = np.log((tol * np.abs(limit[moving]) + atol) / np.abs(d2[moving])) / np.log(ratio)
+        jump = min(int(np.ceil(years.max())), max_jump)
+        if jump <= 0:
+            return 0
+
+        state = self.state
+        state.foliage, state.stem, state.root = (limit[i*num_species:(i+1)*num_species] for i in range(3))
+        num_trees = state.num_trees
+        state.num_trees, num_trees_died = solve_self_thinning(state.stem, state.num_trees, self.params['wsx1000'], self.params['nm'])
+        state.num_trees_died = state.num_trees_died + num_trees_died
+        b = state.b
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            state.b = mean_dbh(self.params, state.stem, state.num_trees)
+        if len(self.forest.trees):
+            # skipped years grow, thin and age the trees, but drop no seed
+            grow_trees(self.forest, b_growth(b, state.b))
+            self.apply_mortality(np.divide(state.num_trees, num_trees, out=np.ones(num_species), where=num_trees > 0))
+            self.forest.trees.age[:] += 12 * jump
+        self.month += 12 * jump
+        return jump
+
+
+    def snapshot(self):
+        """
+        Output: The forest with its individual trees placed (on the first call) and their
+                dimensions computed from the current 3-PG state. If crowns is set, a copy of
+                the forest with overlapping crowns resolved, so that the trees suppressed or
+                moved for export stay as they are in the simulation.
+        """
+        if not self.forest.trees_list:
+            plot_trees(self.forest, num_trees=self.num_placed, rng=self.rng)
+        compute_dimensions(self.forest, self.competition, self.rng, self.hegyi_radius, self.plot_size)
+        if self.crowns is None:
+            return self.forest
+        forest = copy.copy(self.forest)
+        forest.trees = self.forest.trees.copy()
+        resolve_crowns(forest, self.crowns, self.plot_size)
+        return forest
+
+
+    def snapshots(self, times):
+        """
+        Input: Increasing times (in months), e.g. range(12, 601, 12)
+        Output: Yields (t, forest) at each time. Each snapshot only simulates the months
+                since the last one.
+        """
+        for t in times:
+            self.run_until(t)
+            yield t, self.snapshot()
+
+
+def write_forest_csv(forest, filepath, t):
+    """
+    Input: Forest with computed tree dimensions, output filepath, time (in months)
+    Output: CSV file with one row per living tree, for placing the trees in Blender
+    """
+    trees = forest.trees
+    alive = trees.alive
+    species = [forest.species_list[code] for code in trees.species[alive].tolist()]
+    x, y = trees.x[alive].tolist(), trees.y[alive].tolist()
+    keys = [create_tree_key(s.name, tree_id) for s, tree_id in zip(species, trees.id[alive].tolist())]
+    with open(filepath, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['tree_key', 't', 'name', 'bark_texture', 'bark_color', 'tree_form',
+                         'x', 'z', 'height', 'dbh', 'lcl', 'c_diameter'])
+        writer.writerows([key, t, s.name, s.bark_texture, s.bark_color, s.tree_form] + row
+                         for key, s, *row in zip(keys, species, x, y, trees.height[alive].tolist(), trees.dbh[alive].tolist(),
+                                                 trees.lcl[alive].tolist(), trees.c_diam[alive].tolist()))
+
+
+def create_forest(climate_fp, species_fp, num_trees = 100, t = 60, seed=None):
     """
     Input: Filepaths for climate and species
     Output: File containing tree specifications for use in Blender.
@@ -260,12 +420,12 @@ def create_forest(climate_fp, species_fp, num_trees = 100, t = 60):
     forest = Forest(climate_fp, species_fp, num_trees)
 
     # 2. Compute 3-PG data for each species
-    forest = threepg(forest, t)
+    simulator = ForestSimulator(forest, seed)
+    simulator.run_until(t)
 
     # 3. Create individual trees from species data
-    forest = plot_trees(forest, num_trees=num_trees) # TODO clean up parameterization
     # Compute dimensions for each tree based on competition index
-    compute_dimensions(forest)
+    forest = simulator.snapshot()
 
     # 4. Repeat for spawned/killed trees
 
@@ -0,0 +1,287 @@
+"""
+File: crowns.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Resolves overlapping crowns once the trees' dimensions are known.
+
+             Trees are placed before their crowns are sized, so neighbouring crowns can overlap.
+             Overlapping pairs are found with uniform grids used as spatial hashes: crowns are
+             split into size classes, each with a grid whose cells are a diameter of its
+             largest crown wide, the trees are sorted by cell, and every tree is only paired
+             with the trees of the neighbouring cells of its own and the larger classes' grids.
+             Crown sizes can span several orders of magnitude in one stand, and this way a few
+             large crowns don't pile every tree into the same few cells. Each pass over the
+             pairs is a handful of array operations, so a tile costs O(n) plus a sort per class.
+
+             Overlaps are resolved by
+                 - 'shrink'   : crowns are scaled down just enough to touch their neighbours,
+                 - 'shift'    : trees are pushed apart (a little), and whatever still overlaps is shrunk,
+                 - 'suppress' : the smaller tree of each overlapping pair dies.
+"""
+
+import numpy as np
+
+from Forest import Forest, PLOT_SIZE
+
+CROWN_METHODS = ('shrink', 'shift', 'suppress')
+MIN_CROWN_SCALE = 0.25 # 'shrink' never takes a crown below this share of its diameter
+SHIFT_ITERATIONS = 20 # rounds of pushing trees apart in 'shift'
+SHIFT_LIMIT = 1. # farthest a tree is moved by 'shift', as a share of its crown radius
+PAIR_CHUNK = 65536 # trees whose candidate pairs are made together
+CROWN_CLASS_RATIO = 2. # largest / smallest radius sharing a grid in crown_overlaps
+
+# Neighbouring cells each cell is paired with, as runs of (row offset, first column offset,
+# last column offset): in its own grid, half of the 3 x 3 block so every pair is found once,
+# and in the grids of larger crowns, the whole block
+HALF_NEIGHBOURHOOD = ((0, 0, 1), (1, -1, 1))
+FULL_NEIGHBOURHOOD = ((-1, -1, 1), (0, -1, 1), (1, -1, 1))
+
+
+def crown_grid(positions, radii, rows, width, height):
+    """
+    Input: (trees x 2) positions, crown radii, the rows of the trees to hash and the plot size
+    Output: (cell_size, shape, keys, rows, positions, radii) of a uniform grid with cells
+            one diameter of the largest of those crowns wide, the trees sorted by cell
+    """
+    cell_size = 2 * radii[rows].max()
+    shape = np.maximum(np.ceil(np.array([width, height]) / cell_size).astype(np.int64), 1)
+    cells = np.clip(np.floor(positions[rows] / cell_size).astype(np.int64), 0, shape - 1)
+    keys = cells[:, 0] * shape[1] + cells[:, 1]
+    order = np.argsort(keys, kind='stable')
+    rows = rows[order]
+    return cell_size, shape, keys[order], rows, positions[rows], radii[rows]
+
+
+def grid_pairs(grid, positions, radii, queries, neighbourhood, own):
+    """
+    Input: A crown_grid, (trees x 2) positions, crown radii, the rows of the trees to look
+           up, the neighbouring cells to look in as runs (row offset, first and last column
+           offset), and whether the queries are the grid's own trees (in its order), so that
+           the trees of a cell only pair with the ones after them
+    Output: Lists of (i, j) arrays, the rows of the overlapping pairs, i from the queries
+            and j from the grid
+    The cells of a run are consecutive keys, so each run is one range of the sorted trees.
+    """
+    cell_size, shape, keys, rows, grid_positions, grid_radii = grid
+    cells = np.clip(np.floor(positions[queries] / cell_size).astype(np.int64), 0, shape - 1)
+    if not own:
+        # in the grid's cell order, so that the lookups run through its keys in order
+        order = np.argsort(cells[:, 0] * shape[1] + cells[:, 1], kind='stable')
+        queries, cells = queries[order], cells[order]
+
+    # candidate pairs are made for a chunk of trees at a time and filtered straight away,
+    # so memory follows the overlapping pairs rather than every candidate
+    pairs_i, pairs_j = [], []
+    for start in range(0, len(queries), PAIR_CHUNK):
+        rank = np.arange(start, min(start + PAIR_CHUNK, len(queries)))
+        query_positions, query_radii = positions[queries[rank]], radii[queries[rank]]
+        for di, first_dj, last_dj in neighbourhood:
+            ni = cells[rank, 0] + di
+            valid = (ni >= 0) & (ni < shape[0])
+            first_key = ni * shape[1] + np.clip(cells[rank, 1] + first_dj, 0, shape[1] - 1)
+            last_key = ni * shape[1] + np.clip(cells[rank, 1] + last_dj, 0, shape[1] - 1)
+            if own and di == 0 and first_dj == 0:
+                low = rank + 1 # only the trees after this one in its own cell
+            else:
+                low = np.searchsorted(keys, first_key, side='left')
+            high = np.searchsorted(keys, last_key, side='right')
+            counts = np.where(valid, np.maximum(high - low, 0), 0)
+
+            total = counts.sum()
+            if not total:
+                continue
+            first = np.repeat(np.arange(len(rank)), counts)
+            second = np.repeat(low - np.cumsum(counts) + counts, counts) + np.arange(total)
+            delta = query_positions[first] - grid_positions[second]
+            overlapping = (np.hypot(delta[:, 0], delta[:, 1])
+                           < query_radii[first] + grid_radii[second])
+            pairs_i.append(queries[rank[first[overlapping]]])
+            pairs_j.append(rows[second[overlapping]])
+    return pairs_i, pairs_j
+
+
+def crown_overlaps(positions, radii, width=1., height=1.):
+    """
+    Input: (trees x 2) positions, crown radii (same units), and the plot size
+    Output: (i, j, distance) arrays, one entry per pair of overlapping crowns (each pair
+            once), and the distance between their trees
+
+    Crowns are split into classes whose radii are within CROWN_CLASS_RATIO of each other,
+    each hashed into its own grid, as place_by_radius does, so a few very large crowns don't
+    put every tree into the same few cells. Each class is paired with itself through half
+    of the 3 x 3 block of its own grid, and with every class of larger crowns through the
+    whole block of theirs.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    radii = np.asarray(radii, dtype=float)
+    empty = np.empty(0, dtype=np.int64)
+    if len(radii) < 2 or not np.any(radii > 0):
+        return empty, empty, np.empty(0)
+
+    # crowns of no size only ever overlap a larger crown, so they're a class of their own
+    class_of = np.full(len(radii), np.iinfo(np.int64).max)
+    positive = radii > 0
+    class_of[positive] = np.floor(np.log(radii.max() / radii[positive]) / np.log(CROWN_CLASS_RATIO))
+
+    pairs_i, pairs_j = [], []
+    grids = []
+    for crown_class in np.unique(class_of): # largest crowns first
+        members = np.flatnonzero(class_of == crown_class)
+        for grid in grids:
+            found_i, found_j = grid_pairs(grid, positions, radii, members, FULL_NEIGHBOURHOOD, own=False)
+            pairs_i += found_i
+            pairs_j += found_j
+        if radii[members].max() > 0:
+            grid = crown_grid(positions, radii, members, width, height)
+            found_i, found_j = grid_pairs(grid, positions, radii, grid[3], HALF_NEIGHBOURHOOD, own=True)
+            pairs_i += found_i
+            pairs_j += found_j
+            grids.append(grid)
+
+    if not pairs_i:
+        return empty, empty, np.empty(0)
+    i, j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+    return i, j, np.hypot(*(positions[i] - positions[j]).T)
+
+
+def shrink_scales(positions, radii, width=1., height=1.):
+    """
+    Input: (trees x 2) positions, crown radii and the plot size
+    Output: Scale of each crown, the largest at most 1 (and at least MIN_CROWN_SCALE) that
+            leaves it touching its neighbours. Both crowns of a pair shrink by the same share,
+            so one pass clears every pair that can be cleared.
+    """
+    i, j, distance = crown_overlaps(positions, radii, width, height)
+    scales = np.ones(len(radii))
+    np.minimum.at(scales, np.concatenate((i, j)), np.tile(distance / (radii[i] + radii[j]), 2))
+    return np.maximum(scales, MIN_CROWN_SCALE)
+
+
+def suppressed_trees(positions, radii, width=1., height=1.):
+    """
+    Input: (trees x 2) positions, crown radii and the plot size
+    Output: bool array of the trees that give way: in every overlapping pair where both are
+            still standing, the smaller crown goes. Rounds of array operations decide every
+            tree that has no larger undecided neighbour, largest crowns first.
+    """
+    i, j, _ = crown_overlaps(positions, radii, width, height)
+    # order by radius, ties by index, so every pair has a strict winner
+    rank = np.empty(len(radii), dtype=np.int64)
+    rank[np.lexsort((np.arange(len(radii)), radii))] = np.arange(len(radii))
+    larger = np.where(rank[i] > rank[j], i, j)
+    smaller = np.where(rank[i] > rank[j], j, i)
+
+    suppressed = np.zeros(len(radii), dtype=bool)
+    kept = np.zeros(len(radii), dtype=bool)
+    while len(larger):
+        # a tree is kept once no larger undecided tree overlaps it
+        waiting = np.zeros(len(radii), dtype=bool)
+        waiting[smaller] = True
+        newly_kept = np.unique(larger[~waiting[larger]])
+        kept[newly_kept] = True
+        suppressed[smaller[kept[larger]]] = True
+
+        decided = kept | suppressed
+        remaining = ~(suppressed[larger] | decided[smaller])
+        larger, smaller = larger[remaining], smaller[remaining]
+    return suppressed
+
+
+def shifted_positions(positions, radii, width=1., height=1., iterations=SHIFT_ITERATIONS):
+    """
+    Input: (trees x 2) positions, crown radii, the plot size and the rounds of pushing
+    Output: New (trees x 2) positions. Every round, each overlapping pair is pushed apart
+            along the line between them by their overlap, the smaller crown moving further.
+            A tree never moves more than SHIFT_LIMIT of its crown radius from where it
+            started, and stays inside the plot.
+    Since trees can only move so far, pairs are looked up once, with every crown widened
+    by that distance, and each round only rechecks those pairs.
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    radii = np.asarray(radii, dtype=float)
+    if len(radii) < 2 or not np.any(radii > 0):
+        return positions.copy()
+    size = np.array([width, height])
+
+    # trees are handled in cell order, so that the pairs of every round touch nearby memory
+    cells = np.floor(positions / (2 * radii.max())).astype(np.int64)
+    order = np.lexsort((cells[:, 1], cells[:, 0]))
+    start, radii = positions[order], radii[order]
+    limit = SHIFT_LIMIT * radii
+    near_i, near_j, _ = crown_overlaps(start, radii + limit, width, height)
+
+    positions = start.copy()
+    for _ in range(iterations):
+        delta = positions[near_j] - positions[near_i]
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        overlapping = distance < radii[near_i] + radii[near_j]
+        if not overlapping.any():
+            break
+        i, j, delta, distance = near_i[overlapping], near_j[overlapping], delta[overlapping], distance[overlapping]
+
+        # trees on top of each other are pushed apart along x
+        direction = np.where((distance > 0)[:, None], delta / np.maximum(distance, 1e-12)[:, None], [1., 0.])
+        overlap = radii[i] + radii[j] - distance
+        share_i = radii[j] / np.maximum(radii[i] + radii[j], 1e-12) # the smaller crown moves further
+
+        push = np.zeros_like(positions)
+        for axis in range(2):
+            push[:, axis] = (np.bincount(j, weights=direction[:, axis] * overlap * (1 - share_i), minlength=len(positions))
+                             - np.bincount(i, weights=direction[:, axis] * overlap * share_i, minlength=len(positions)))
+
+        # no further than the limit from the start
+        moved = positions + push - start
+        moved_distance = np.hypot(moved[:, 0], moved[:, 1])
+        moved *= np.minimum(1., limit / np.maximum(moved_distance, 1e-300))[:, None]
+        positions = np.clip(start + moved, 0., np.nextafter(size, 0))
+
+    shifted = np.empty_like(positions)
+    shifted[order] = positions
+    return shifted
+
+
+def resolve_crowns(forest:Forest, method='shrink', plot_size=PLOT_SIZE, iterations=SHIFT_ITERATIONS):
+    """
+    Input: Forest with computed crown diameters, the method (see CROWN_METHODS), the width
+           of the plot in metres and the rounds of pushing for 'shift'
+    Output: Array of the rows of the trees that were shrunk, moved or suppressed.
+            Only living trees take part.
+    """
+    if method not in CROWN_METHODS:
+        raise ValueError(f"Invalid crown resolution method: {method}")
+    trees = forest.trees
+    rows = np.flatnonzero(trees.alive)
+    positions = np.column_stack((trees.x[rows], trees.y[rows]))
+    radii = np.nan_to_num(trees.c_diam[rows]) / 2 / plot_size
+
+    if method == 'suppress':
+        suppressed = suppressed_trees(positions, radii)
+        trees.alive[rows[suppressed]] = False
+        return rows[suppressed]
+
+    changed = np.zeros(len(rows), dtype=bool)
+    if method == 'shift':
+        shifted = shifted_positions(positions, radii, iterations=iterations)
+        changed = np.any(shifted != positions, axis=1)
+        positions = shifted
+        trees.x[rows], trees.y[rows] = positions.T
+
+    scales = shrink_scales(positions, radii)
+    trees.c_diam[rows] *= scales
+    return rows[changed | (scales < 1)]
+
+
+if __name__ == '__main__':
+    # example usage: a million trees (1000 stems/ha) with crowns up to 4 m across
+    import copy
+    import time
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    example_rng = np.random.default_rng(0)
+    n = 10**6
+    example_forest.add_trees_bulk(example_rng.integers(0, 5, n), example_rng.random(n), example_rng.random(n),
+                                  c_diam=example_rng.uniform(1., 4., n))
+    for example_method in CROWN_METHODS:
+        example_copy = copy.deepcopy(example_forest)
+        start = time.perf_counter()
+        example_changed = resolve_crowns(example_copy, example_method, plot_size=3162.)
+        print(f"{example_method}: {len(example_changed)} trees changed ({time.perf_counter() - start:.2f} s)")
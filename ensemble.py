@@ -0,0 +1,81 @@
+"""
+File: ensemble.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Monte Carlo ensembles of 3-PG runs for uncertainty bands.
+
+             A single run is one sample: the soil water of each month is drawn at random from
+             its texture's holding capacity, and each tree's dimensions get Gaussian jitter.
+             Here K replicates are run together as one vectorized batch, with the replicate as
+             an extra leading array axis, and summarized as per-species means and percentiles.
+"""
+
+from Forest import Forest, soil_holding_capacity
+from gauss import GaussianArray
+from threepg_engine import *
+
+# Quantities summarized for every species
+ENSEMBLE_QUANTITIES = ('foliage', 'stem', 'root', 'num_trees', 'b', 'height', 'lcl', 'c_diam')
+
+
+def draw_soil_water(climate_list, replicates, rng):
+    """
+    Input: A list of 12 ClimateByMonth instances, number of replicates, numpy Generator
+    Output: (replicates x 12) array of soil water, drawn for each month as in
+            ClimateByMonth.estimate_soil_water
+    """
+    capacities = []
+    for month in climate_list:
+        capacity = soil_holding_capacity(month.soil_texture)
+        if capacity is None:
+            raise ValueError(f"Invalid soil texture: {month.soil_texture}")
+        capacities.append(capacity)
+    capacities = np.array(capacities)
+    return rng.uniform(capacities[:, 0], capacities[:, 1], size=(replicates, len(climate_list)))
+
+
+def run_ensemble(forest:Forest, t, replicates=500, seed=None, percentiles=(5, 50, 95), jitter=True):
+    """
+    Input: Forest (climate, species), time interval (in months), number of replicates,
+           seed, which percentiles to report, and whether to jitter the dimensions
+           the way Tree.generate_from does
+    Output: A dictionary with
+                - 'species': species names
+                - 'percentiles': the percentiles reported
+                - one entry per quantity in ENSEMBLE_QUANTITIES, itself a dictionary of
+                  'mean' (species) and 'percentiles' (percentile x species) arrays
+    """
+    rng = np.random.default_rng(seed)
+    params = species_parameters(forest.species_list)
+    climate = climate_arrays(forest.climate_list)
+    climate['soil_water'] = draw_soil_water(forest.climate_list, replicates, rng)
+
+    tables = precompute_tables(params, climate, t)
+    state = StandState(len(forest.species_list), forest.num_trees, shape=(replicates,))
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for month_t in range(t+1):
+            threepg_step(params, tables, state, month_t)
+
+    samples = {'foliage': state.foliage, 'stem': state.stem, 'root': state.root,
+               'num_trees': state.num_trees, 'b': state.b}
+    dimensions = dict(zip(('height', 'lcl', 'c_diam'), stand_dimensions(params, state.b)))
+    for name, dimension in dimensions.items():
+        if jitter:
+            # same spread as Tree.generate_from
+            dimension = np.abs(GaussianArray(dimension, (dimension + 0.005) / 4, rng))
+        samples[name] = dimension
+
+    summary = {'species': [species.name for species in forest.species_list], 'percentiles': tuple(percentiles)}
+    for name in ENSEMBLE_QUANTITIES:
+        summary[name] = {'mean': samples[name].mean(axis=0),
+                         'percentiles': np.percentile(samples[name], percentiles, axis=0)}
+    return summary
+
+
+if __name__ == '__main__':
+    # example usage: uncertainty bands for 10 years of growth
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    example_summary = run_ensemble(example_forest, 120, replicates=1000, seed=0)
+    for i, name in enumerate(example_summary['species']):
+        low, median, high = example_summary['b']['percentiles'][:, i]
+        print(f"{name}: mean dbh {median:.2f} ({low:.2f} - {high:.2f})")
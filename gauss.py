@@ -8,6 +8,7 @@ Description: A Gaussian randomization function to create smoother looking averag
 
 import math
 import random
+import numpy as np
 
 # Define constants
 F_PI = math.pi
@@ -27,6 +28,27 @@ def Gaussian(mean, stddev):
     return mean + numsigma * stddev
 
 
+def GaussianArray(mean, stddev, rng=None):
+    """
+    Vectorized Gaussian: one draw for each element of mean/stddev (arrays that broadcast
+    together), from the same +-3 sigma truncated distribution. Rejected draws are
+    redrawn in batches until every element has been accepted.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    mean, stddev = np.broadcast_arrays(np.asarray(mean, dtype=float), np.asarray(stddev, dtype=float))
+    numsigma = np.empty(mean.shape)
+    pending = np.arange(mean.size)
+    while pending.size:
+        candidates = rng.uniform(-3.0, 3.0, pending.size)
+        p = np.exp(-candidates * candidates / 2.0) / math.sqrt(F_2_PI)
+        level = rng.uniform(0.0, 1.0 / math.sqrt(F_2_PI), pending.size)
+        accepted = p >= level
+        numsigma.flat[pending[accepted]] = candidates[accepted]
+        pending = pending[~accepted]
+
+    return mean + numsigma * stddev
+
+
 def Ranf(low, high):
     return low + (high - low) * random.random()
 
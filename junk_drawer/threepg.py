@@ -13,6 +13,7 @@ import math # for log
 from junk_drawer.threepg_species_data import parse_species_data
 from parse_tree_input import csv_file_to_list
 from junk_drawer.plot_trees_random import init_trees_dont_write_yet
+from threepg_engine import solve_self_thinning
 import csv
 import random
 import itertools
@@ -395,15 +396,9 @@ def compute(environment_data_filename, speciesdata_filename, t, num_trees=1200):
             ns = (1. - root_partition_ratio)/(1. + pfs)
 
             # mortality
-            # max individual tree stem mass (wsx)
-            max_ind_tree_stem_mass_wsx = species.wsx1000 * pow((1000.0/num_trees), species.nm)
-
-            # check if we need to thin
-            while last_stem_biomass / num_trees > max_ind_tree_stem_mass_wsx and num_trees > 0:
-                # need to thin
-                num_trees -= 1  # decreasing n
-                num_trees_died += 1 # increasing delta_n counter
-                max_ind_tree_stem_mass_wsx = species.wsx1000 * pow((1000.0/num_trees), species.nm) # recalculating wsx
+            # thin until the mean stem mass is under the max individual tree stem mass (wsx)
+            num_trees, died = solve_self_thinning(last_stem_biomass, num_trees, species.wsx1000, species.nm)
+            num_trees, num_trees_died = int(num_trees), num_trees_died + int(died)
 
             # litterfall
             current_age = start_age + t/12
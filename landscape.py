@@ -0,0 +1,196 @@
+"""
+File: landscape.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: A landscape of independent 3-PG stands, one per grid cell.
+
+             A Forest is one stand with one climate table. For open worlds we need a whole grid
+             of cells, each with its own temperature offset, soil texture, fertility and species
+             mix, and one Forest per cell doesn't scale past a few thousand cells.
+             Here every per-cell input and every biomass pool is a (cells x species) array,
+             and all cells are advanced together by the vectorized 3-PG step. Cells are
+             independent, so they are simulated in chunks to keep the temporaries small.
+
+             Climate tables that depend on the cell are never stored per month of the run,
+             only per month of the year (and per soil texture), so memory grows with the
+             number of cells and not with the length of the run.
+"""
+
+from Forest import Forest, soil_holding_capacity
+from threepg_engine import *
+
+CHUNK_SIZE = 65536 # cells advanced together
+
+# Per-cell outputs of Landscape.outputs
+LANDSCAPE_OUTPUTS = ('foliage', 'stem', 'root', 'num_trees', 'b', 'height', 'lcl', 'c_diam')
+
+
+class Landscape:
+    """
+    Holds the 3-PG state of every cell of a landscape, with the species and the base
+    12-month climate of a Forest.
+    """
+    def __init__(self, forest:Forest, temp_offset, soil_texture=None, fertility=FERTILITY_RATING,
+                 species_mix=None, seed=None):
+        """
+        Input: Forest (species, base climate and stems per hectare), then per cell:
+                   - temp_offset : (cells)          added to each month's tmax and tmin (C)
+                   - soil_texture : (cells) or None soil texture category, None to keep the
+                                                    base climate's monthly soil water
+                   - fertility : float or (cells)   fertility rating, 0 to 1
+                   - species_mix : (cells x species) or None
+                                                    share of the stems planted for each species,
+                                                    0 where a species is absent
+               and a seed for the soil water drawn for each texture
+        Attributes:
+            - forest : Forest
+            - params : {str: np.ndarray}    Species parameters, one entry per species
+            - climate : {str: np.ndarray}   Base monthly climate arrays
+            - num_cells : int
+            - temp_offset, fertility : np.ndarray   (cells) per-cell inputs
+            - textures : [str]              Soil textures, '' for the base climate
+            - texture_index : np.ndarray    (cells) index into textures
+            - present : np.ndarray          (cells x species) whether a species grows in a cell
+            - phys_mod : np.ndarray         (textures x month of year x species)
+            - state : StandState            Biomass pools and stem counts, (cells x species)
+            - month : int                   Number of months simulated so far
+        """
+        self.forest = forest
+        self.params = species_parameters(forest.species_list)
+        self.climate = climate_arrays(forest.climate_list)
+        num_species = len(forest.species_list)
+
+        self.temp_offset = np.asarray(temp_offset, dtype=float)
+        self.num_cells = len(self.temp_offset)
+        self.fertility = np.broadcast_to(np.asarray(fertility, dtype=float), (self.num_cells,)).copy()
+
+        # soil water only depends on the texture, so phys_mod is kept per texture
+        if soil_texture is None:
+            soil_texture = [''] * self.num_cells
+        soil_texture = np.array(['' if texture is None else texture for texture in soil_texture])
+        textures, self.texture_index = np.unique(soil_texture, return_inverse=True)
+        self.textures = [str(texture) for texture in textures]
+        self.phys_mod = self.texture_phys_mods(np.random.default_rng(seed))
+
+        if species_mix is None:
+            species_mix = np.ones((self.num_cells, num_species))
+        species_mix = np.asarray(species_mix, dtype=float)
+        self.present = species_mix > 0
+
+        self.state = StandState(num_species, forest.num_trees, shape=(self.num_cells,))
+        self.state.num_trees = np.rint(species_mix * forest.num_trees).astype(np.int64)
+        self.month = 0
+        self.tables = None
+
+
+    def texture_phys_mods(self, rng):
+        """
+        Input: numpy Generator for the soil water draws
+        Output: (textures x month of year x species) phys_mod. Soil water is drawn for each
+                texture and month as in ClimateByMonth.estimate_soil_water.
+        """
+        soil_water = np.empty((len(self.textures), 12))
+        max_soil_water = np.empty((len(self.textures), 12))
+        for i, texture in enumerate(self.textures):
+            if texture == '':
+                soil_water[i], max_soil_water[i] = self.climate['soil_water'], self.climate['max_soil_water']
+                continue
+            capacity = soil_holding_capacity(texture)
+            if capacity is None:
+                raise ValueError(f"Invalid soil texture: {texture}")
+            soil_water[i] = rng.uniform(capacity[0], capacity[1], size=12)
+            max_soil_water[i] = capacity[1]
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            return calculate_phys_mod(self.params, self.climate['vpd'][:, None], soil_water[..., None],
+                                      max_soil_water[..., None])
+
+
+    def get_tables(self, month_t):
+        """
+        Input: A month that is about to be simulated
+        Output: Precomputed 3-PG tables reaching at least that month. Only their
+                time tables (age, CO2, month of year) are used, since those are
+                the same for every cell.
+        """
+        if self.tables is None or self.tables.t < month_t:
+            horizon = max(month_t, 2 * self.tables.t if self.tables is not None else 120)
+            self.tables = precompute_tables(self.params, self.climate, horizon)
+        return self.tables
+
+
+    def cell_modifiers(self, tables, month_t, cells):
+        """
+        Input: ThreePGTables, the month being computed, and a slice of cells
+        Output: (env_mods, phys_mod, root_partition_ratio, nf, ns) for those cells,
+                each (cells x species)
+        """
+        current_month = tables.current_month[month_t]
+        offset = self.temp_offset[cells, None]
+        fertility = self.fertility[cells, None]
+        env_mods = calculate_env_mods(self.params, self.climate['tmax'][current_month] + offset,
+                                      self.climate['tmin'][current_month] + offset,
+                                      self.climate['frost_days'][current_month], tables.co2[month_t], fertility)
+        phys_mod = self.phys_mod[self.texture_index[cells], current_month]
+        return (env_mods, phys_mod) + calculate_partitioning(self.params, phys_mod, fertility)
+
+
+    def step(self, n_months=1, chunk_size=CHUNK_SIZE):
+        """
+        Input: Number of months to advance, and how many cells to advance at once
+        Output: None, every cell is advanced by n_months
+        """
+        if n_months <= 0:
+            return
+        tables = self.get_tables(self.month + n_months - 1)
+        fields = ('foliage', 'stem', 'root', 'num_trees', 'num_trees_died', 'b')
+        for start in range(0, self.num_cells, chunk_size):
+            cells = slice(start, min(start + chunk_size, self.num_cells))
+            chunk = StandState(0, 0)
+            for field in fields:
+                setattr(chunk, field, getattr(self.state, field)[cells])
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                for month_t in range(self.month, self.month + n_months):
+                    threepg_step(self.params, tables, chunk, month_t, self.cell_modifiers(tables, month_t, cells))
+            for field in fields:
+                getattr(self.state, field)[cells] = getattr(chunk, field)
+        self.month += n_months
+
+
+    def run_until(self, t, chunk_size=CHUNK_SIZE):
+        """
+        Input: Time (in months)
+        Output: None, every cell has been simulated through month t
+        """
+        if t + 1 < self.month:
+            raise ValueError(f"Landscape is already at month {self.month}, can't run back to t={t}")
+        self.step(t + 1 - self.month, chunk_size)
+
+
+    def outputs(self):
+        """
+        Output: A dictionary of LANDSCAPE_OUTPUTS name -> (cells x species) array,
+                NaN wherever a species is absent from a cell
+        """
+        state = self.state
+        values = {'foliage': state.foliage, 'stem': state.stem, 'root': state.root,
+                  'num_trees': state.num_trees, 'b': state.b}
+        values.update(zip(('height', 'lcl', 'c_diam'), stand_dimensions(self.params, state.b)))
+        return {name: np.where(self.present, values[name], np.nan) for name in LANDSCAPE_OUTPUTS}
+
+
+if __name__ == '__main__':
+    # example usage: 10 years of growth on a 500 x 500 grid with a temperature gradient
+    import time
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    rows, columns = 500, 500
+    example_offsets = np.repeat(np.linspace(-3., 3., rows), columns)
+    example_textures = np.where(np.arange(rows * columns) % columns < columns // 2, "loams", "clay_loams")
+    example_mix = np.random.default_rng(0).random((rows * columns, len(example_forest.species_list))) > 0.3
+    example_landscape = Landscape(example_forest, example_offsets, example_textures,
+                                  fertility=0.8, species_mix=example_mix, seed=0)
+    start = time.perf_counter()
+    example_landscape.run_until(120)
+    print(f"Simulated {example_landscape.num_cells} cells in {time.perf_counter() - start:.1f} s")
+    example_dbh = example_landscape.outputs()['b']
+    for i, species in enumerate(example_forest.species_list):
+        print(f"{species.name}: median dbh {np.nanmedian(example_dbh[:, i]):.2f}")
@@ -0,0 +1,120 @@
+"""
+File: mortality.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Picks which individual trees die when 3-PG thins the stand.
+
+             3-PG only knows how many stems per hectare of each species die in a month.
+             The placed trees of a species die at the same rate: the expected number of
+             deaths is the species' living trees times the share of its stems that died,
+             rounded up or down at random so no fraction of a tree is lost over the months.
+             Which trees die is a weighted draw without replacement (Efraimidis-Spirakis:
+             each tree gets the key log(u) / weight and the largest keys die), with suppressed
+             and small trees more likely to go. Dead trees stay in the table with alive set to
+             False, so nothing is ever removed from the middle of the arrays.
+"""
+
+import numpy as np
+
+from Forest import Forest
+
+COMPETITION_WEIGHT = 1. # power of the competition index in a tree's mortality weight
+SIZE_WEIGHT = 1. # power of (mean basal area / basal area) in a tree's mortality weight
+MIN_COMPETITION = 0.01 # competition index floor, so that the largest trees (BAL of 0) can still die
+MIN_RELATIVE_BA = 1e-6 # basal area floor, as a share of the mean, so that no weight is infinite
+
+
+class Mortality:
+    """
+    Kills the placed trees of a forest in step with the stand's self-thinning.
+    """
+    def __init__(self, competition_weight=COMPETITION_WEIGHT, size_weight=SIZE_WEIGHT):
+        """
+        Input: How strongly the competition index and small size make a tree more likely
+               to die (0 to ignore either)
+        """
+        self.competition_weight = competition_weight
+        self.size_weight = size_weight
+
+
+    def weights(self, trees, rows):
+        """
+        Input: TreeTable and the rows of living trees
+        Output: Mortality weight of each of those trees,
+                (c + MIN_COMPETITION)^competition_weight * (mean ba / ba)^size_weight
+        """
+        ba = trees.ba[rows]
+        mean_ba = ba.mean() if len(ba) else 0.
+        if mean_ba > 0:
+            # trees without basal area are the most likely to die, but still in random order
+            relative_size = mean_ba / np.maximum(ba, MIN_RELATIVE_BA * mean_ba)
+        else:
+            relative_size = np.ones(len(ba))
+        return (np.power(trees.c[rows] + MIN_COMPETITION, self.competition_weight)
+                * np.power(relative_size, self.size_weight))
+
+
+    def deaths(self, trees, survival, rng):
+        """
+        Input: TreeTable, (species) share of each species' stems that survived the month,
+               and a numpy Generator
+        Output: (species) number of living trees of each species that die, stochastically
+                rounded so that it's right on average
+        """
+        living = np.bincount(trees.species[trees.alive], minlength=len(survival))
+        expected = living * (1. - np.clip(survival, 0., 1.))
+        deaths = np.floor(expected + rng.random(len(expected))).astype(np.int64)
+        return np.minimum(deaths, living)
+
+
+    def select(self, trees, deaths, rng):
+        """
+        Input: TreeTable, (species) number of trees of each species that die, numpy Generator
+        Output: Array of the rows of the trees that die, chosen with probability weighted
+                by Mortality.weights
+        """
+        alive = np.flatnonzero(trees.alive)
+        alive = alive[deaths[trees.species[alive]] > 0]
+        if not len(alive):
+            return np.empty(0, dtype=np.int64)
+        with np.errstate(divide='ignore'):
+            keys = np.log(rng.random(len(alive))) / self.weights(trees, alive) # -inf for a draw of 0
+
+        species = trees.species[alive]
+        chosen = []
+        for code in np.flatnonzero(deaths):
+            members = np.flatnonzero(species == code)
+            count = min(deaths[code], len(members))
+            if count < len(members):
+                members = members[np.argpartition(keys[members], len(members) - count)[len(members) - count:]]
+            chosen.append(alive[members])
+        return np.sort(np.concatenate(chosen))
+
+
+    def apply(self, forest:Forest, survival, rng):
+        """
+        Input: Forest with placed trees, (species) share of each species' stems that survived
+               the month, and a numpy Generator
+        Output: Array of the rows of the trees that died, now marked dead
+        """
+        trees = forest.trees
+        deaths = self.deaths(trees, survival, rng)
+        if not deaths.any():
+            return np.empty(0, dtype=np.int64)
+        rows = self.select(trees, deaths, rng)
+        trees.alive[rows] = False
+        return rows
+
+
+if __name__ == '__main__':
+    # example usage: a million placed trees thinned by 10% of each species
+    import time
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    example_rng = np.random.default_rng(0)
+    n = 10**6
+    example_forest.add_trees_bulk(example_rng.integers(0, 5, n), example_rng.random(n), example_rng.random(n),
+                                  ba=example_rng.uniform(0.001, 0.1, n))
+    example_forest.compute_competition_indices()
+    start = time.perf_counter()
+    died = Mortality().apply(example_forest, np.full(5, 0.9), example_rng)
+    print(f"{len(died)} of {n} trees died ({time.perf_counter() - start:.2f} s)")
@@ -0,0 +1,119 @@
+"""
+File: output_sinks.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Sinks for the monthly 3-PG records streamed by ForestSimulator.stream.
+
+             Each sink takes one record at a time and writes one row per species,
+             so a run of any length can be saved (or watched) in constant memory.
+"""
+
+import csv
+from collections import deque
+
+# Columns written for each species, in order
+RECORD_FIELDS = ('month', 'species', 'foliage', 'stem', 'root', 'num_trees', 'b', 'height', 'lcl', 'c_diam')
+
+
+def record_rows(record):
+    """
+    Input: A monthly record from ForestSimulator.stream
+    Output: One list of RECORD_FIELDS values per species
+    """
+    columns = [record[field] for field in RECORD_FIELDS[2:]]
+    return [[record['month'], name] + [column[i].item() for column in columns]
+            for i, name in enumerate(record['species'])]
+
+
+class CSVSink:
+    """
+    Writes records to a CSV file, one row per species per month.
+    """
+    def __init__(self, filepath):
+        self.file = open(filepath, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(RECORD_FIELDS)
+
+    def write(self, record):
+        self.writer.writerows(record_rows(record))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """
+    Writes records to a Parquet file, buffering batch_months months per row group.
+    Requires pyarrow.
+    """
+    def __init__(self, filepath, batch_months=120):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("ParquetSink requires pyarrow (pip install pyarrow)") from error
+        self.pa = pa
+        self.schema = pa.schema([('month', pa.int64()), ('species', pa.string())] +
+                                [(field, pa.float64()) for field in RECORD_FIELDS[2:]])
+        self.writer = pq.ParquetWriter(filepath, self.schema)
+        self.batch_months = batch_months
+        self.rows = []
+        self.months = 0
+
+    def write(self, record):
+        self.rows.extend(record_rows(record))
+        self.months += 1
+        if self.months >= self.batch_months:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            columns = list(zip(*self.rows))
+            self.writer.write_table(self.pa.table({field: list(column) for field, column in zip(RECORD_FIELDS, columns)},
+                                                  schema=self.schema))
+        self.rows = []
+        self.months = 0
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+class RingBufferSink:
+    """
+    Keeps only the last `size` monthly records in memory.
+    """
+    def __init__(self, size=12):
+        self.records = deque(maxlen=size)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+def write_stream(records, *sinks):
+    """
+    Input: An iterable of monthly records (e.g. ForestSimulator.stream(n)) and any number of sinks
+    Output: Number of records written. Every sink is closed once the stream ends.
+    """
+    count = 0
+    try:
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    return count
+
+
+if __name__ == '__main__':
+    # example usage: stream 50 years of monthly output to a CSV
+    from create_forest import Forest, ForestSimulator
+    example_simulator = ForestSimulator(Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000))
+    last_year = RingBufferSink(12)
+    write_stream(example_simulator.stream(600), CSVSink("prineville_monthly.csv"), last_year)
+    print(f"Final month: {last_year.records[-1]['month']}")
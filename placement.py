@@ -0,0 +1,449 @@
+"""
+File: placement.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Point samplers for placing trees in a plot.
+
+             poisson_disk_sample is Bridson's algorithm: new points are tried in the ring
+             between r and 2r around points that are already placed, and a background grid
+             with at most one point per cell means every test only looks at the block of
+             cells around the candidate. Filling a plot is O(n), and unlike rejection
+             sampling against every placed point, it knows when the plot is full.
+
+             place_by_radius places trees that each keep their own radius (e.g. their crown)
+             clear. Trees are split into radius classes, each with its own grid, and placed
+             largest first by rounds of random candidates tested against the grids of their
+             own and the larger classes, so a check stays O(1) however much the radii differ.
+
+             cluster_sample gives clumped patterns instead: Thomas and Matern cluster
+             processes, where points are scattered around random parent points, with their
+             own parents, intensity and cluster radius for each species.
+"""
+
+import math
+import numpy as np
+
+BRIDSON_ATTEMPTS = 30 # candidates in a row that must fail before a point is retired
+BRIDSON_BATCH = 4096 # active points that take their turn together
+BRIDSON_TRIES_PER_TURN = 6 # candidates each of them tries per turn
+
+DART_ROUNDS = 200 # rounds of candidates each tree gets in place_by_radius before it's given up on
+RADIUS_CLASS_RATIO = math.sqrt(2) # largest / smallest radius sharing a grid in place_by_radius
+DART_COVERAGE = 0.3 # share of the plot under trees up to which sample_tree_positions throws darts
+                    # (a full Poisson-disk set covers about 0.48)
+
+CLUSTER_KERNELS = ('thomas', 'matern') # offspring offsets of cluster_sample
+THOMAS_MARGIN = 4 # cluster radii (standard deviations) around the domain where Thomas parents can be
+
+SPARSE_CELLS_PER_TREE = 16 # grids with more cells per tree than this are stored sparsely
+
+REACH = 2 # cells looked at on each side of a cell
+
+
+class CellIndex:
+    """
+    A spatial hash from flat cell indices to rows, kept as sorted arrays so that a whole
+    batch of cells is looked up with one searchsorted. Where a cell has several rows,
+    the first one stored is found (the lowest, among rows stored together).
+    """
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.rows = np.empty(0, dtype=np.int64)
+
+    def insert(self, keys, rows):
+        """
+        Input: Flat cell indices and the row stored for each
+        Output: None. Only the new entries are sorted, and they're merged in after any
+                entries already stored for the same cells, so a batch costs O(stored + batch)
+        """
+        order = np.lexsort((rows, keys))
+        keys, rows = np.asarray(keys, dtype=np.int64)[order], np.asarray(rows, dtype=np.int64)[order]
+        position = np.searchsorted(self.keys, keys, side='right')
+        self.keys, self.rows = np.insert(self.keys, position, keys), np.insert(self.rows, position, rows)
+
+    def lookup(self, keys):
+        """
+        Input: Array of flat cell indices
+        Output: Array of the same shape, the first row stored for each cell or -1
+        """
+        position = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        if not len(self.keys):
+            return np.full(np.shape(keys), -1, dtype=np.int64)
+        return np.where(self.keys[position] == keys, self.rows[position], -1)
+
+    def lookup_runs(self, first, length):
+        """
+        Input: Array of flat cell indices, and the number of consecutive cells from each
+        Output: Array of shape first.shape + (length,), the rows stored in each run of cells,
+                packed to the front and -1 after. Only for indices with at most one row per
+                cell, where one searchsorted per run finds them all.
+        """
+        if not len(self.keys):
+            return np.full(np.shape(first) + (length,), -1, dtype=np.int64)
+        position = np.searchsorted(self.keys, first)[..., None] + np.arange(length)
+        clipped = np.minimum(position, len(self.keys) - 1)
+        found = (position < len(self.keys)) & (np.take(self.keys, clipped) < np.asarray(first)[..., None] + length)
+        return np.where(found, np.take(self.rows, clipped), -1)
+
+
+class SamplingGrid:
+    """
+    A background grid over a width x height domain, with cells small enough that two
+    points at least min_distance apart never share one. Each point is stored with the
+    radius it keeps clear around itself.
+    The grid is stored with REACH ghost cells on every side, so the block around any cell
+    is a fixed set of offsets into the flattened grid. On a periodic domain the ghost cells
+    hold copies of the points from the other side, shifted by the domain size, so plain
+    differences give the distance the shortest way around.
+    A sparse grid keeps its points in a CellIndex instead of one slot per cell, for when
+    there are far fewer points than cells.
+    """
+    def __init__(self, min_distance, width, height, periodic, corners=False, sparse=False):
+        """
+        Input: Minimum distance between points, domain size, whether the domain wraps around,
+               whether the corners of the 5 x 5 block around a cell need to be looked at
+               (only when points can keep more than min_distance clear), and whether the
+               points are stored sparsely
+        Attributes:
+            - size : np.ndarray         (2) width and height of the domain
+            - shape : np.ndarray        (2) number of cells along x and y
+            - cell_size : np.ndarray    (2) cell width and height, which divide the domain exactly
+            - periodic : bool           Whether the domain wraps around (for tiling)
+            - points : np.ndarray       (padded cells x 2) the point in each cell, NaN if empty,
+                                        or (stored points x 2) for a sparse grid
+            - radii : np.ndarray        The radius around each point, laid out like points
+            - index : CellIndex         Cell -> row of points, for a sparse grid
+            - block : np.ndarray        Flat offsets of the cells around a cell that can hold
+                                        a point closer than min_distance
+        """
+        self.size = np.array([width, height], dtype=float)
+        self.shape = np.ceil(self.size / (min_distance / math.sqrt(2))).astype(np.int64)
+        self.cell_size = self.size / self.shape
+        self.periodic = periodic
+        self.stride = int(self.shape[1]) + 2 * REACH
+        self.sparse = sparse
+        if sparse:
+            self.index = CellIndex()
+            self.points, self.radii = np.empty((0, 2)), np.empty(0)
+        else:
+            self.points = np.full(((int(self.shape[0]) + 2 * REACH) * self.stride, 2), np.nan)
+            self.radii = np.full(len(self.points), np.nan)
+
+        # the corners of the 5 x 5 block are at least a cell diagonal (min_distance) away
+        offsets = [(dx, dy) for dx in range(-REACH, REACH + 1) for dy in range(-REACH, REACH + 1)
+                   if corners or not (abs(dx) == REACH and abs(dy) == REACH)]
+        self.block = np.array([dx * self.stride + dy for dx, dy in offsets])
+
+    def cell_of(self, points):
+        """
+        Input: (n x 2) points inside the domain
+        Output: (n x 2) cell indices
+        """
+        return np.minimum((points / self.cell_size).astype(np.int64), self.shape - 1)
+
+    def flat_index(self, cells):
+        """
+        Input: (n x 2) cell indices, which may be up to REACH outside the domain
+        Output: (n) indices into the flattened, padded grid
+        """
+        return (cells[:, 0] + REACH) * self.stride + cells[:, 1] + REACH
+
+    def aliases(self, cells):
+        """
+        Input: (n x 2) cell indices
+        Output: Yields (flat indices, shift) for the cells themselves and, on a periodic
+                domain, for every ghost cell that copies them (-1 where there is none)
+        """
+        yield self.flat_index(cells), np.zeros(2)
+        if not self.periodic:
+            return
+        for kx in range(-REACH, REACH + 1):
+            for ky in range(-REACH, REACH + 1):
+                if kx == ky == 0:
+                    continue
+                shifted = cells + self.shape * [kx, ky]
+                inside = np.all((shifted >= -REACH) & (shifted < self.shape + REACH), axis=1)
+                if inside.any():
+                    yield np.where(inside, self.flat_index(shifted), -1), self.size * [kx, ky]
+
+    def add(self, points, radii):
+        """
+        Input: (n x 2) points, no two in the same cell, and their radii (array or scalar)
+        Output: None, the points are stored in their cells (and ghost cells)
+        """
+        radii = np.broadcast_to(radii, len(points))
+        for index, shift in self.aliases(self.cell_of(points)):
+            keep = index >= 0
+            if self.sparse:
+                self.index.insert(index[keep], np.arange(len(self.points), len(self.points) + keep.sum()))
+                self.points = np.concatenate((self.points, points[keep] + shift))
+                self.radii = np.concatenate((self.radii, radii[keep]))
+            else:
+                self.points[index[keep]] = points[keep] + shift
+                self.radii[index[keep]] = radii[keep]
+
+    def nearby(self, points, radii=None):
+        """
+        Input: (n x 2) points inside the domain, and the radius every stored point keeps
+               clear if it's the same for all of them
+        Output: (n x block x 2) positions and (n x block) radii of the stored points around
+                each point, NaN for empty cells
+        """
+        # np.take rather than fancy indexing: gathering whole rows of points is far faster
+        flat = self.flat_index(self.cell_of(points))[:, None]
+        if self.sparse:
+            # each row of the 5 x 5 block is one run of cells (corners included, which is
+            # only a few more points to test)
+            first = flat + np.arange(-REACH, REACH + 1) * self.stride - REACH
+            rows = self.index.lookup_runs(first, 2 * REACH + 1).reshape(len(points), (2 * REACH + 1) ** 2)
+            if not len(self.points):
+                return np.full(rows.shape + (2,), np.nan), np.full(rows.shape, np.nan) if radii is None else radii
+            found = rows >= 0
+            rows = np.maximum(rows, 0)
+            return (np.where(found[..., None], np.take(self.points, rows, axis=0), np.nan),
+                    np.where(found, np.take(self.radii, rows), np.nan) if radii is None else radii)
+        index = flat + self.block
+        return np.take(self.points, index, axis=0), np.take(self.radii, index) if radii is None else radii
+
+
+def overlaps(points, radii, others, other_radii):
+    """
+    Input: (n x 2) points and their radii, (n x m x 2) other points and (n x m) their radii
+           (NaN for none)
+    Output: (n) bool, whether each point's radius overlaps any of its others'
+    """
+    dx = others[..., 0] - points[:, 0, None]
+    dy = others[..., 1] - points[:, 1, None]
+    reach = np.asarray(radii, dtype=float)[..., None] + other_radii
+    with np.errstate(invalid='ignore'):
+        return (dx * dx + dy * dy < reach * reach).any(axis=1)
+
+
+def settle(grid, chosen, radii):
+    """
+    Input: SamplingGrid, (n x 2) candidates placed in the same turn, no closer to the grid's
+           points than allowed, and their radii
+    Output: (n) bool, the candidates that can be kept. Candidates that overlap each other
+            are settled by index: the lowest index claims its cell, and a candidate loses if
+            any lower index nearby overlaps it.
+    """
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), len(chosen))
+    order = np.arange(len(chosen))
+    cells = grid.cell_of(chosen)
+    claims = CellIndex()
+    for index, _ in grid.aliases(cells):
+        keep = index >= 0
+        claims.insert(index[keep], order[keep])
+
+    flat = grid.flat_index(cells)
+    rivals = claims.lookup(flat[:, None] + grid.block)
+    rivals = np.where(rivals < order[:, None], rivals, -1)
+    rival_points = np.where((rivals >= 0)[..., None], chosen[np.maximum(rivals, 0)], np.nan)
+    if grid.periodic:
+        delta = rival_points - chosen[:, None, :]
+        rival_points = chosen[:, None, :] + delta - grid.size * np.round(delta / grid.size)
+    return (claims.lookup(flat) == order) & ~overlaps(chosen, radii, rival_points, radii[np.maximum(rivals, 0)])
+
+
+def poisson_disk_sample(min_distance, width=1., height=1., rng=None, periodic=False, attempts=BRIDSON_ATTEMPTS):
+    """
+    Input: Minimum distance between points, the width and height of the domain, a numpy
+           Generator (or seed), whether the domain wraps around so that copies of it tile
+           seamlessly, and how many candidates in a row must fail before a point is retired
+    Output: (n x 2) array of points, a maximal set: no point is closer than min_distance to
+            another, and no more points fit (up to Bridson's sampling)
+
+    Up to BRIDSON_BATCH active points take their turn together, each trying a few
+    candidates and keeping the first one that fits against the placed points. Candidates
+    from the same batch that are too close to each other are settled by a random priority,
+    and the losers' points stay active to try again.
+    """
+    rng = np.random.default_rng(rng)
+    if min_distance <= 0:
+        raise ValueError(f"min_distance must be positive, got {min_distance}")
+
+    grid = SamplingGrid(min_distance, width, height, periodic)
+    radius = min_distance / 2 # points keep min_distance / 2 clear, so they stay min_distance apart
+    capacity = int(np.prod(grid.shape))
+    points = np.empty((capacity, 2))
+    points[0] = rng.random(2) * grid.size
+    grid.add(points[:1], radius)
+    num_points = 1
+    active = np.array([0])
+    failures = np.zeros(capacity, dtype=np.int64) # candidates in a row that didn't fit, per point
+
+    while len(active):
+        turn = rng.permutation(len(active))[:BRIDSON_BATCH]
+        centers = points[active[turn]]
+
+        # every point in the batch tries candidates in the ring between r and 2r around it
+        tries = (len(turn), min(BRIDSON_TRIES_PER_TURN, attempts))
+        distance = min_distance * np.sqrt(rng.uniform(1., 4., tries))
+        angle = rng.uniform(0., 2 * math.pi, tries)
+        candidates = centers[:, None, :] + np.stack((distance * np.cos(angle), distance * np.sin(angle)), axis=-1)
+        if periodic:
+            candidates %= grid.size
+            in_domain = np.ones(tries, dtype=bool)
+        else:
+            in_domain = np.all((candidates >= 0) & (candidates < grid.size), axis=-1)
+            candidates = np.clip(candidates, 0, np.nextafter(grid.size, 0))
+
+        flat = candidates.reshape(-1, 2)
+        fits = in_domain & ~overlaps(flat, radius, *grid.nearby(flat, radius)).reshape(tries)
+        has_fit = fits.any(axis=1)
+        chosen = candidates[has_fit, np.argmax(fits[has_fit], axis=1)]
+        accepted = chosen[settle(grid, chosen, radius)]
+
+        new = np.arange(num_points, num_points + len(accepted))
+        points[new] = accepted
+        grid.add(accepted, radius)
+        num_points += len(accepted)
+
+        failures[active[turn]] = np.where(has_fit, 0, failures[active[turn]] + tries[1])
+        active = np.concatenate((active[failures[active] < attempts], new))
+
+    return points[:num_points]
+
+
+def place_by_radius(radii, width=1., height=1., rng=None, periodic=False, rounds=DART_ROUNDS):
+    """
+    Input: (n) radius each tree keeps clear (e.g. its crown radius), the width and height of
+           the domain, a numpy Generator (or seed), whether the domain tiles, and how many
+           candidate positions each tree gets
+    Output: (n x 2) positions, with no two trees closer than the sum of their radii.
+            Trees that couldn't be placed are NaN.
+
+    Trees are placed largest first, in classes whose radii are within RADIUS_CLASS_RATIO of
+    each other. Each class gets its own grid with cells sized to its smallest radius, so a
+    cell holds at most one tree, and a tree only ever checks the 5 x 5 block of cells around
+    it in the grids of its own and the larger classes. Grids of classes with few trees for
+    their cell size are kept in a CellIndex, so memory follows the trees. Every round, all of a class's
+    unplaced trees throw a candidate at once, tested against the grids covering the most of
+    the plot first, and candidates that overlap each other are settled by a random priority.
+    """
+    rng = np.random.default_rng(rng)
+    radii = np.asarray(radii, dtype=float)
+    if np.any(~np.isfinite(radii)) or np.any(radii <= 0):
+        raise ValueError("Tree radii must be positive and finite")
+    size = np.array([width, height], dtype=float)
+    positions = np.full((len(radii), 2), np.nan)
+    if not len(radii):
+        return positions
+
+    class_of = np.floor(np.log(radii.max() / radii) / math.log(RADIUS_CLASS_RATIO)).astype(np.int64)
+    grids, covers = [], []
+    for radius_class in np.unique(class_of):
+        members = np.flatnonzero(class_of == radius_class)
+        min_distance = 2 * radii[members].min()
+        cells = np.prod(np.ceil(size / (min_distance / math.sqrt(2))))
+        grid = SamplingGrid(min_distance, width, height, periodic, corners=True,
+                            sparse=cells > SPARSE_CELLS_PER_TREE * len(members))
+        grids.append(grid)
+        covers.append(0.) # area under the trees placed in each grid
+
+        pending = rng.permutation(members)
+        for _ in range(rounds):
+            if not len(pending):
+                break
+            candidates = rng.random((len(pending), 2)) * size
+            # in cell order, so that neighbouring candidates look at nearby memory
+            by_cell = np.argsort(grid.flat_index(grid.cell_of(candidates)))
+            candidates, pending = candidates[by_cell], pending[by_cell]
+            fits = np.arange(len(pending))
+            # the grids covering the most of the plot first, so that a candidate that
+            # already overlaps isn't checked again
+            for other in np.argsort(covers)[::-1]:
+                fits = fits[~overlaps(candidates[fits], radii[pending[fits]], *grids[other].nearby(candidates[fits]))]
+            order = rng.permutation(fits)
+            kept = order[settle(grid, candidates[order], radii[pending[order]])]
+
+            positions[pending[kept]] = candidates[kept]
+            grid.add(candidates[kept], radii[pending[kept]])
+            covers[-1] += np.pi * np.sum(radii[pending[kept]] ** 2)
+            pending = np.delete(pending, kept)
+
+    return positions
+
+
+def cluster_sample(counts, parent_intensity, cluster_radius, width=1., height=1., rng=None, periodic=False,
+                   kernel='thomas'):
+    """
+    Input: Number of points of each type (e.g. of each species), then for each type (or one
+           value for all of them):
+               - parent_intensity : parents (cluster centres) per unit area
+               - cluster_radius : for kernel='thomas', the standard deviation of the Gaussian
+                                  offsets from the parent; for kernel='matern', the radius of
+                                  the disk the offspring are uniform in
+           domain size, numpy Generator (or seed), whether the domain wraps around and kernel
+    Output: (positions, types): (n x 2) positions and (n) type of each point, grouped by type.
+            Each type is a Neyman-Scott process conditioned on its number of points: parents
+            are Poisson in the domain (plus a margin the clusters can reach in from, unless it
+            wraps around), and every point picks a parent at random. Points that land outside
+            are drawn again, so there are exactly counts of each type.
+    """
+    rng = np.random.default_rng(rng)
+    if kernel not in CLUSTER_KERNELS:
+        raise ValueError(f"Invalid cluster kernel: {kernel}")
+    counts = np.asarray(counts, dtype=np.int64)
+    parent_intensity, cluster_radius = (np.broadcast_to(np.asarray(value, dtype=float), counts.shape)
+                                        for value in (parent_intensity, cluster_radius))
+    if np.any(counts < 0) or np.any(~(parent_intensity > 0)) or np.any(~(cluster_radius > 0)):
+        raise ValueError("Counts can't be negative, and parent intensities and cluster radii must be positive")
+
+    size = np.array([width, height], dtype=float)
+    margin = np.zeros(len(counts)) if periodic else cluster_radius * (THOMAS_MARGIN if kernel == 'thomas' else 1)
+    window = size + 2 * margin[:, None] # (types x 2) where each type's parents can be
+    num_parents = np.maximum(rng.poisson(parent_intensity * window.prod(axis=1)), 1)
+    parent_type = np.repeat(np.arange(len(counts)), num_parents)
+    parents = rng.random((len(parent_type), 2)) * window[parent_type] - margin[parent_type, None]
+    first_parent = np.cumsum(num_parents) - num_parents
+
+    types = np.repeat(np.arange(len(counts)), counts)
+    positions = np.empty((len(types), 2))
+    pending = np.arange(len(types))
+    while len(pending):
+        pending_types = types[pending]
+        parent = first_parent[pending_types] + (rng.random(len(pending)) * num_parents[pending_types]).astype(np.int64)
+        radius = cluster_radius[pending_types, None]
+        if kernel == 'thomas':
+            offsets = rng.normal(size=(len(pending), 2)) * radius
+        else:
+            angle = rng.random(len(pending)) * 2 * np.pi
+            offsets = np.column_stack((np.cos(angle), np.sin(angle))) * np.sqrt(rng.random(len(pending)))[:, None] * radius
+        points = parents[parent] + offsets
+        if periodic:
+            points %= size
+        inside = np.all((points >= 0) & (points < size), axis=1)
+        positions[pending[inside]] = points[inside]
+        pending = pending[~inside]
+    return positions, types
+
+
+def sample_tree_positions(num_trees, min_distance, width=1., height=1., rng=None, periodic=False):
+    """
+    Input: Number of trees, minimum distance between them, domain size, numpy Generator
+           (or seed) and whether the domain tiles
+    Output: (num_trees x 2) positions, spread over the whole plot. Raises ValueError if that
+            many trees can't be that far apart.
+
+    Requests that cover at most DART_COVERAGE of the plot (counting a disk of min_distance / 2
+    around each tree) are dart-thrown with place_by_radius, which stops once every tree is
+    placed and keeps its grid sparse, so the cost follows num_trees rather than the plot's
+    area / min_distance^2. Closer to the packing limit, darts slow down, so the plot is
+    filled with poisson_disk_sample and num_trees of its points are picked at random.
+    """
+    rng = np.random.default_rng(rng)
+    if min_distance <= 0:
+        return rng.random((num_trees, 2)) * [width, height]
+
+    coverage = num_trees * math.pi * min_distance * min_distance / 4 / (width * height)
+    if coverage <= DART_COVERAGE:
+        points = place_by_radius(np.full(num_trees, min_distance / 2), width, height, rng, periodic)
+        if not np.isnan(points).any():
+            return points
+
+    points = poisson_disk_sample(min_distance, width, height, rng, periodic)
+    if len(points) < num_trees:
+        raise ValueError(f"Only {len(points)} trees fit {min_distance} apart in a {width} x {height} plot, "
+                         f"{num_trees} were requested")
+    return points[rng.choice(len(points), num_trees, replace=False)]
@@ -0,0 +1,174 @@
+"""
+File: recruitment.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Seed dispersal and masting, so that forests regenerate.
+
+             Each species masts every few years, all of its mature trees at once. In a mast
+             month every mature tree of the species drops a Poisson number of seedlings, each
+             carried away from its parent by the species' dispersal kernel (an exponential
+             distance in a uniform direction). The whole month is one batch of arrays.
+
+             A seedling needs a free patch of ground, so the plot is divided into an occupancy
+             grid with room for one tree per cell: seedlings that land in a cell that's already
+             taken (or outside the plot) don't make it, and of several landing in the same free
+             cell only one does. Survivors go into the forest in bulk, with their parents' IDs.
+"""
+
+import numpy as np
+
+from Forest import Forest
+
+MASTING_CYCLE = 5 * 12 # months between mast years
+MATURITY_AGE = 6 * 12 # months before a tree bears seed (the 'mature' stage)
+SEEDS_PER_TREE = 20. # mean seedlings a mature tree drops in a mast year
+DISPERSAL_DISTANCE = 0.05 # mean distance seeds travel, as a fraction of the plot (2 m)
+SEEDLING_SPACING = 0.01 # size of an occupancy grid cell, as a fraction of the plot (0.4 m)
+SEEDLING_DBH = 1. # dbh of a new seedling (cm), which then grows with its species
+
+
+class OccupancyGrid:
+    """
+    Marks which cells of the plot already hold a tree, one bool per cell.
+    """
+    def __init__(self, cell_size, width=1., height=1.):
+        """
+        Input: Cell size and plot size
+        Attributes:
+            - cell_size : float
+            - shape : (int, int)        Cells along x and y
+            - occupied : np.ndarray     (cells) whether each cell holds a tree
+        """
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = cell_size
+        self.shape = (int(np.ceil(width / cell_size)), int(np.ceil(height / cell_size)))
+        self.occupied = np.zeros(self.shape[0] * self.shape[1], dtype=bool)
+
+
+    @classmethod
+    def from_trees(cls, trees, cell_size, width=1., height=1.):
+        """
+        Input: TreeTable, cell size and plot size
+        Output: OccupancyGrid with the cells of the living trees marked
+        """
+        grid = cls(cell_size, width, height)
+        grid.mark(trees.x[trees.alive], trees.y[trees.alive])
+        return grid
+
+
+    def cells_of(self, x, y):
+        """
+        Input: Arrays of x and y positions
+        Output: Flat index of the cell each position is in, -1 outside the plot
+        """
+        i = np.floor(np.asarray(x) / self.cell_size).astype(np.int64)
+        j = np.floor(np.asarray(y) / self.cell_size).astype(np.int64)
+        inside = (i >= 0) & (i < self.shape[0]) & (j >= 0) & (j < self.shape[1])
+        return np.where(inside, i * self.shape[1] + j, -1)
+
+
+    def mark(self, x, y):
+        """
+        Input: Arrays of x and y positions
+        Output: None, their cells are marked occupied
+        """
+        cells = self.cells_of(x, y)
+        self.occupied[cells[cells >= 0]] = True
+
+
+    def is_free(self, x, y):
+        """
+        Input: Arrays of x and y positions
+        Output: bool array, whether each position is inside the plot in an empty cell
+        """
+        cells = self.cells_of(x, y)
+        return (cells >= 0) & ~self.occupied[np.maximum(cells, 0)]
+
+
+class Recruitment:
+    """
+    Seed production and dispersal for the species of a forest. Every parameter can be
+    one value for all species, or one per species.
+    """
+    def __init__(self, forest:Forest, masting_cycle=MASTING_CYCLE, maturity_age=MATURITY_AGE,
+                 seeds_per_tree=SEEDS_PER_TREE, dispersal_distance=DISPERSAL_DISTANCE,
+                 cell_size=SEEDLING_SPACING, width=1., height=1.):
+        """
+        Input: Forest (species), then per species:
+                   - masting_cycle : months between mast years, a species masts in the
+                                     months that are a multiple of it
+                   - maturity_age : months before a tree bears seed
+                   - seeds_per_tree : mean seedlings per mature tree and mast
+                   - dispersal_distance : mean distance seeds travel
+               and the occupancy grid's cell size and the plot size
+        """
+        num_species = len(forest.species_list)
+        self.masting_cycle, self.maturity_age, self.seeds_per_tree, self.dispersal_distance = (
+            np.broadcast_to(np.asarray(value), (num_species,)).copy()
+            for value in (masting_cycle, maturity_age, seeds_per_tree, dispersal_distance))
+        if np.any(self.masting_cycle <= 0) or np.any(self.seeds_per_tree < 0) or np.any(self.dispersal_distance < 0):
+            raise ValueError("Masting cycles must be positive, and seed counts and dispersal distances not negative")
+        self.masting_cycle = self.masting_cycle.astype(np.int64)
+        self.seedling_ba = np.pi * SEEDLING_DBH * SEEDLING_DBH / 40000
+        self.cell_size = cell_size
+        self.size = (width, height)
+
+
+    def masting(self, month_t):
+        """
+        Input: Month
+        Output: (species) bool, which species mast that month
+        """
+        return (month_t > 0) & (month_t % self.masting_cycle == 0)
+
+
+    def disperse(self, forest:Forest, month_t, rng):
+        """
+        Input: Forest with placed trees, the current month and a numpy Generator
+        Output: Array of the rows of the seedlings added to the forest this month
+        """
+        trees = forest.trees
+        masting = self.masting(month_t)
+        if not masting.any() or not len(trees):
+            return np.empty(0, dtype=np.int64)
+
+        species = trees.species
+        parents = np.flatnonzero(trees.alive & masting[species] & (trees.age >= self.maturity_age[species]))
+        parents = np.repeat(parents, rng.poisson(self.seeds_per_tree[species[parents]]))
+
+        distance = rng.exponential(self.dispersal_distance[species[parents]])
+        angle = rng.uniform(0, 2 * np.pi, len(parents))
+        x = trees.x[parents] + distance * np.cos(angle)
+        y = trees.y[parents] + distance * np.sin(angle)
+
+        # seedlings in free cells, and the first (in random order) of each cell
+        grid = OccupancyGrid.from_trees(trees, self.cell_size, *self.size)
+        landed = rng.permutation(np.flatnonzero(grid.is_free(x, y)))
+        _, first = np.unique(grid.cells_of(x[landed], y[landed]), return_index=True)
+        keep = np.sort(landed[first])
+
+        return forest.add_trees_bulk(species[parents[keep]], x[keep], y[keep],
+                                     ba=self.seedling_ba, parent=trees.id[parents[keep]])
+
+
+if __name__ == '__main__':
+    # example usage: 30 years of a stand regenerating from 200 trees
+    import time
+    from create_forest import ForestSimulator
+    from tree_table import NO_PARENT
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    example_simulator = ForestSimulator(example_forest, seed=0)
+    example_simulator.num_placed = 200
+    example_simulator.step(12) # a year of growth first, so that the trees aren't placed with a dbh of 0
+    example_simulator.snapshot()
+    example_simulator.recruitment = Recruitment(example_forest)
+    start = time.perf_counter()
+    example_simulator.run_until(371)
+    example_trees = example_simulator.snapshot().trees
+    example_seedlings = example_trees.parent != NO_PARENT
+    print(f"{len(example_trees)} trees after 30 years ({time.perf_counter() - start:.1f} s), "
+          f"{example_seedlings.sum()} of them seedlings")
+    for example_name, example_rows in (('placed trees', ~example_seedlings), ('seedlings', example_seedlings)):
+        example_rows &= example_trees.alive
+        print(f"{example_rows.sum()} living {example_name}, mean dbh {example_trees.dbh[example_rows].mean():.2f} m")
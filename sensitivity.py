@@ -0,0 +1,167 @@
+"""
+File: sensitivity.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: Global sensitivity analysis of the 3-PG outputs to the Species parameters.
+
+             Most of the parameters come from the nearest-neighbour estimate in param_estimator,
+             so it's worth knowing which of them actually drive the height, dbh and crown outputs.
+             Two methods are provided:
+                 - Morris elementary effects (cheap screening, r * (P + 1) runs)
+                 - Sobol first-order and total indices (Saltelli sampling, N * (P + 2) runs)
+
+             Parameter samples are never turned into Species objects. Each sample is one column
+             of the vectorized engine's species axis, so thousands of samples run as one batch.
+"""
+
+import numpy as np
+from scipy.stats import qmc
+
+from Forest import Forest
+from threepg_engine import *
+
+# Outputs analyzed, all taken at the end of the run
+SENSITIVITY_OUTPUTS = ('b', 'height', 'lcl', 'c_diam', 'stem')
+
+BATCH_SIZE = 4096 # samples per vectorized batch
+
+
+def parameter_bounds(species, names=THREEPG_PARAMETERS, spread=0.2):
+    """
+    Input: The Species to analyze, which parameters to vary, and the relative spread
+    Output: (names, lower, upper), each parameter varied by +-spread around the species'
+            value. Parameters that are 0 for the species are left out, since
+            they have nothing to spread around.
+    """
+    names = [name for name in names if getattr(species, name) != 0]
+    values = np.array([getattr(species, name) for name in names])
+    lower = np.minimum(values * (1 - spread), values * (1 + spread))
+    upper = np.maximum(values * (1 - spread), values * (1 + spread))
+    return names, lower, upper
+
+
+def evaluate_samples(species, climate_list, names, samples, t=60, num_trees=1000):
+    """
+    Input: The base Species, climate list, parameter names, (samples x parameters) values,
+           time interval (in months) and initial stems per hectare
+    Output: A dictionary of output name -> array with one value per sample
+    """
+    base = species_parameters([species])
+    climate = climate_arrays(climate_list)
+    outputs = {name: np.empty(len(samples)) for name in SENSITIVITY_OUTPUTS}
+
+    for start in range(0, len(samples), BATCH_SIZE):
+        batch = samples[start:start + BATCH_SIZE]
+        params = {name: np.repeat(value, len(batch)) for name, value in base.items()}
+        for i, name in enumerate(names):
+            params[name] = batch[:, i]
+
+        state = StandState(len(batch), num_trees)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            # not cached, every batch is a new "species set"
+            tables = ThreePGTables(params, climate, t)
+            for month_t in range(t+1):
+                threepg_step(params, tables, state, month_t)
+        height, lcl, c_diam = stand_dimensions(params, state.b)
+        for name, values in zip(SENSITIVITY_OUTPUTS, (state.b, height, lcl, c_diam, state.stem)):
+            outputs[name][start:start + len(batch)] = values
+    return outputs
+
+
+def morris(species, climate_list, t=60, trajectories=50, levels=4, spread=0.2, names=THREEPG_PARAMETERS, seed=None):
+    """
+    Input: The Species to analyze, climate list, time interval (in months), number of
+           Morris trajectories and grid levels, parameter spread and names, seed
+    Output: A dictionary of output name -> {'mu_star': (parameters), 'sigma': (parameters)},
+            plus 'names'. mu_star is the mean absolute elementary effect, in output units
+            per unit of the parameter's (normalized) range.
+    """
+    rng = np.random.default_rng(seed)
+    names, lower, upper = parameter_bounds(species, names, spread)
+    num_params = len(names)
+    delta = levels / (2 * (levels - 1))
+
+    # each trajectory starts on the grid and moves one parameter at a time, in random order
+    starts = rng.integers(0, levels // 2, size=(trajectories, num_params)) / (levels - 1)
+    orders = np.argsort(rng.random((trajectories, num_params)), axis=1)
+    directions = rng.choice([-1., 1.], size=(trajectories, num_params))
+    starts = np.where(directions < 0, starts + delta, starts)
+
+    points = np.repeat(starts[:, None, :], num_params + 1, axis=1)
+    steps = np.zeros((trajectories, num_params, num_params))
+    steps[np.arange(trajectories)[:, None], np.arange(num_params)[None, :], orders] = directions[np.arange(trajectories)[:, None], orders] * delta
+    points[:, 1:, :] += np.cumsum(steps, axis=1)
+
+    samples = lower + points.reshape(-1, num_params) * (upper - lower)
+    outputs = evaluate_samples(species, climate_list, names, samples, t)
+
+    results = {'names': names}
+    for output, values in outputs.items():
+        values = values.reshape(trajectories, num_params + 1)
+        effects = np.diff(values, axis=1) / (directions[np.arange(trajectories)[:, None], orders] * delta)
+        # put the effects back in parameter order
+        ordered = np.empty_like(effects)
+        ordered[np.arange(trajectories)[:, None], orders] = effects
+        ordered = np.where(np.isfinite(ordered), ordered, np.nan)
+        with np.errstate(invalid='ignore'):
+            results[output] = {'mu_star': np.nanmean(np.abs(ordered), axis=0),
+                               'sigma': np.nanstd(ordered, axis=0)}
+    return results
+
+
+def sobol(species, climate_list, t=60, samples=1024, spread=0.2, names=THREEPG_PARAMETERS, seed=None):
+    """
+    Input: The Species to analyze, climate list, time interval (in months), base sample
+           count N (a power of 2), parameter spread and names, seed
+    Output: A dictionary of output name -> {'first_order': (parameters), 'total': (parameters)},
+            plus 'names'. Uses Saltelli's estimator for the first-order indices and
+            Jansen's for the total indices.
+    """
+    names, lower, upper = parameter_bounds(species, names, spread)
+    num_params = len(names)
+    unit = qmc.Sobol(2 * num_params, seed=seed).random(samples)
+    a, b = unit[:, :num_params], unit[:, num_params:]
+
+    # A, B, then each AB_i (A with column i from B)
+    ab = np.repeat(a[None, :, :], num_params, axis=0)
+    ab[np.arange(num_params), :, np.arange(num_params)] = b.T
+    points = np.concatenate([a, b, ab.reshape(-1, num_params)])
+    outputs = evaluate_samples(species, climate_list, names, lower + points * (upper - lower), t)
+
+    results = {'names': names}
+    for output, values in outputs.items():
+        f_a, f_b = values[:samples], values[samples:2 * samples]
+        f_ab = values[2 * samples:].reshape(num_params, samples)
+        finite = np.isfinite(f_a) & np.isfinite(f_b) & np.isfinite(f_ab).all(axis=0)
+        f_a, f_b, f_ab = f_a[finite], f_b[finite], f_ab[:, finite]
+        variance = np.var(np.concatenate([f_a, f_b])) if finite.any() else 0.
+        if variance == 0 or not np.isfinite(variance):
+            results[output] = {'first_order': np.zeros(num_params), 'total': np.zeros(num_params)}
+            continue
+        results[output] = {'first_order': np.mean(f_b * (f_ab - f_a), axis=1) / variance,
+                           'total': 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variance}
+    return results
+
+
+def rank_parameters(results, output, index):
+    """
+    Input: Results from morris or sobol, an output name and which index to rank by
+           (e.g. 'mu_star' or 'total')
+    Output: A list of (parameter, value) from most to least influential
+    """
+    values = np.nan_to_num(results[output][index], nan=0.)
+    order = np.argsort(-values, kind='stable')
+    return [(results['names'][i], float(values[i])) for i in order]
+
+
+if __name__ == '__main__':
+    # example usage: which Douglas Fir parameters drive its mean dbh after 5 years?
+    example_forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv", 1000)
+    douglas_fir = example_forest.species_list[1]
+    # n_theta is held fixed: the soil water mod's base is negative for these soils, so any
+    # non-integer n_theta stops growth altogether and swamps every other parameter
+    example_names = [name for name in THREEPG_PARAMETERS if name != 'n_theta']
+    example_results = sobol(douglas_fir, example_forest.climate_list, t=60, samples=1024, names=example_names, seed=0)
+    print(f"========== Sobol total indices for {douglas_fir.name} mean dbh ==========")
+    for name, value in rank_parameters(example_results, 'b', 'total')[:10]:
+        print(f'{name}: {value:.3f}')
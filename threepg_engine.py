@@ -0,0 +1,406 @@
+"""
+File: threepg_engine.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: A vectorized version of the 3-PG month loop from create_forest.py.
+
+             Every species' parameters and biomass pools are held as NumPy arrays, so one
+             month of 3-PG is a handful of array operations that advance all of the species
+             in the stand together, instead of one Python loop per species.
+
+             Arrays are indexed by species along their last axis. Any leading axes are
+             broadcast, which leaves room for batches of stands later on.
+"""
+
+import math
+import numpy as np
+
+from Species import SPECIES_PARAMETERS, SpeciesSet
+
+E = 2.718
+
+INIT_DBH = 0. #9 initial dbh-- was 18 TODO determine init_dbh, and what units?
+
+CO2 = 350 # Atmospheric CO2 (ppm) TODO Implement estimated CO2 function taken from NASA data: https://climate.nasa.gov/vital-signs/carbon-dioxide/?intent=121
+
+# general for GPP
+FERTILITY_RATING = 1 # fertility rating, ranges from 0 to 1
+CONVERSION_RATIO = 0.47 # for making GPP into NPP
+
+START_AGE = 5 # this is the stand's age in years at t = 0
+START_MONTH = 1 # this is the number of the month in which the simulation is beginning
+START_YEAR = 1960 # this is the year the simulation was started. TODO Used for prints only?
+
+# Initial biomasses -- all are in tonnes of dry mass per hectare, or tDM/ha
+# TODO need to figure out what these values should be, and if they should be
+#       different for each species or even each tree
+INIT_FOLIAGE_BIOMASS = 7.
+INIT_ROOT_BIOMASS = 9.
+INIT_STEM_BIOMASS = 20.
+
+# The quantitative Species attributes, in the order they appear in the species CSV
+THREEPG_PARAMETERS = SPECIES_PARAMETERS
+
+# The ClimateByMonth attributes used by 3-PG
+CLIMATE_FIELDS = ('tmax', 'tmin', 'solar_rad', 'frost_days', 'vpd', 'soil_water', 'max_soil_water')
+
+
+def species_parameters(species_list):
+    """
+    Input: A list of Species class instances, or a SpeciesSet
+    Output: A dictionary of parameter name -> array with one entry per species,
+            plus a boolean 'deciduous' array used by the litterfall equation.
+    """
+    if isinstance(species_list, SpeciesSet):
+        params = species_list.parameter_dict(THREEPG_PARAMETERS)
+    else:
+        params = {name: np.array([getattr(species, name) for species in species_list], dtype=float)
+                  for name in THREEPG_PARAMETERS}
+    params['deciduous'] = np.array([species.deciduous_evergreen == ['deciduous'] for species in species_list])
+    return params
+
+
+def climate_arrays(climate_list):
+    """
+    Input: A list of 12 ClimateByMonth instances
+    Output: A dictionary of climate field -> array of 12 monthly values
+    """
+    return {field: np.array([getattr(month, field) for month in climate_list], dtype=float)
+            for field in CLIMATE_FIELDS}
+
+
+class StandState:
+    """
+    Holds the biomass pools and stem counts of every species in the stand.
+    Each attribute is an array whose last axis is the species.
+    """
+    def __init__(self, num_species, num_trees, shape=()):
+        """
+        Attributes:
+            - foliage : np.ndarray      Foliage biomass (tDM/ha)
+            - stem : np.ndarray         Stem biomass (tDM/ha)
+            - root : np.ndarray         Root biomass (tDM/ha)
+            - num_trees : np.ndarray    Stems per hectare
+            - num_trees_died : np.ndarray   Trees thinned so far, used by the mf/mr/ms loss terms
+            - b : np.ndarray            Mean dbh, inverted from mean individual stem mass
+        """
+        full_shape = tuple(shape) + (num_species,)
+        self.foliage = np.full(full_shape, INIT_FOLIAGE_BIOMASS)
+        self.stem = np.full(full_shape, INIT_STEM_BIOMASS)
+        self.root = np.full(full_shape, INIT_ROOT_BIOMASS)
+        self.num_trees = np.full(full_shape, num_trees, dtype=np.int64)
+        self.num_trees_died = np.zeros(full_shape, dtype=np.int64)
+        self.b = np.zeros(full_shape)
+
+
+def calculate_env_mods(params, tmax, tmin, frost_days, co2, fertility=FERTILITY_RATING):
+    """
+    Input: Species parameters, the current temperature and frost days (arrays that
+           broadcast against the species axis) and the atmospheric CO2 level
+    Output: ft * ff * fn * fc, the modifiers that don't depend on soil water or VPD
+    """
+    mean_monthly_temp = (tmax + tmin)/2.
+
+    # temperature mod (ft) -- 0 outside of the growth range
+    t_min, t_opt, t_max = params['t_min'], params['t_opt'], params['t_max']
+    base = (mean_monthly_temp - t_min / (t_opt - t_min) * (t_max - mean_monthly_temp)/(t_max - t_opt))
+    exp = (t_max - t_opt)/(t_opt - t_min)
+    in_range = (mean_monthly_temp <= t_max) & (mean_monthly_temp >= t_min)
+    temp_mod = np.where(in_range, np.power(base, exp), 0.)
+
+    # frost mod
+    frost_mod = 1. - params['kf'] * (frost_days/30.)
+
+    # nutrition mod
+    nutrition_mod = 1. - (1. - params['fn0']) * np.power((1. - fertility), params['nfn'])
+
+    # CO2 mod
+    fcax = params['fcax_700']/(2. - params['fcax_700'])
+    co2_mod = fcax * co2/(350. * (fcax - 1.) + co2)
+
+    return temp_mod * frost_mod * nutrition_mod * co2_mod
+
+
+def calculate_phys_mod(params, vpd, soil_water, max_soil_water):
+    """
+    Input: Species parameters and the current VPD and soil water (arrays that
+           broadcast against the species axis)
+    Output: phys_mod, derived from the VPD and soil water mods
+    """
+    # vapor pressure deficit (VPD) mod
+    vpd_mod = np.power(E, (-params['kd'] * vpd))
+
+    # soil water mod
+    base1 = ((1. - soil_water)/max_soil_water)/params['c_theta']
+    soil_water_mod = 1./(1. + np.power(base1, params['n_theta']))
+
+    return vpd_mod * soil_water_mod # TODO verify we don't need fa (age_mod)
+
+
+def calculate_mods(params, tmax, tmin, frost_days, vpd, soil_water, max_soil_water, co2,
+                   fertility=FERTILITY_RATING):
+    """
+    Input: Species parameters, the current climate conditions (arrays that broadcast
+           against the species axis) and the atmospheric CO2 level
+    Output: Computed modifiers for use in GPP/NPP computation,
+            as (ft * ff * fn * fc, phys_mod) arrays.
+    """
+    return (calculate_env_mods(params, tmax, tmin, frost_days, co2, fertility),
+            calculate_phys_mod(params, vpd, soil_water, max_soil_water))
+
+
+def calculate_partitioning(params, phys_mod, fertility=FERTILITY_RATING):
+    """
+    Input: Species parameters, phys_mod and the fertility rating (arrays that broadcast
+           against the species axis)
+    Output: (root_partition_ratio, nf, ns), the shares of NPP that go to roots,
+            foliage and stems
+    """
+    m = params['m_0'] + ((1. - params['m_0']) * fertility)
+    nr_min, nr_max = params['nr_min'], params['nr_max']
+    root_partition_ratio = (nr_min * nr_max) / (nr_min + ((nr_max - nr_min) * m * phys_mod))
+
+    np_ = (np.log(params['p20']/params['p2']))/math.log(10.) # equation A29
+    ap = params['p2']/(np.power(2., np_)) # equation A29
+    b = 1 # TODO what is b?
+    pfs = ap * np.power(b, np_)
+
+    nf = (pfs * (1. - root_partition_ratio))/(1. + pfs)
+    ns = (1. - root_partition_ratio)/(1. + pfs)
+    return root_partition_ratio, nf, ns
+
+
+def month_index(month_t):
+    """
+    Input: Months since the start of the simulation (int or array)
+    Output: Index into the 12-month climate list for that month, jan - dec
+    """
+    current_month = ((START_MONTH + np.asarray(month_t)) % 12)-1
+    return np.where(current_month == 0, 11, current_month)
+
+
+def co2_curve(month_t):
+    """
+    Input: Months since the start of the simulation (int or array)
+    Output: Atmospheric CO2 (ppm) for that month, based on the season and year.
+            Estimated from NASA data on Global Climate Change
+    """
+    x = START_YEAR + ((START_MONTH + np.asarray(month_t)) / 12)
+    return ((98/60) * x - 2885.33) + 3 * np.sin(7 * x)
+
+
+def solve_self_thinning(stem_biomass, num_trees, wsx1000, nm):
+    """
+    Input: Stem biomass (tDM/ha), stems per hectare and the species' self-thinning
+           parameters (scalars or arrays that broadcast together)
+    Output: (surviving stems per hectare, number of trees that died)
+
+    Gives the same integer result as removing one tree at a time while the mean stem
+    mass is over wsx = wsx1000 * (1000/N)^nm. Since the mean stem mass only crosses wsx
+    once, the survivor count is estimated in closed form from
+    N* = (ws / (wsx1000 * 1000^nm))^(1/(1-nm)), and bisection on the exact thinning test
+    settles the last tree or two.
+    """
+    stem_biomass, wsx1000, nm = np.asarray(stem_biomass, dtype=float), np.asarray(wsx1000, dtype=float), np.asarray(nm, dtype=float)
+    num_trees = np.asarray(num_trees, dtype=np.int64)
+
+    def over_max_stem_mass(n):
+        # the thinning test, only ever asked for n >= 1
+        n = np.maximum(n, 1)
+        return stem_biomass / n > wsx1000 * np.power(1000.0/n, nm)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        thinning = (num_trees > 0) & over_max_stem_mass(num_trees)
+
+        # closed-form estimate of the survivor count
+        estimate = np.power(stem_biomass / (wsx1000 * np.power(1000., nm)), 1. / (1. - nm))
+        estimate = np.where(np.isfinite(estimate), np.floor(np.minimum(estimate, num_trees)), 0.).astype(np.int64)
+
+        # bracket the answer: lo is 0 or passes the test, hi fails it
+        lo = np.clip(estimate - 1, 0, num_trees)
+        hi = np.clip(estimate + 1, 0, num_trees)
+        bad_bracket = ((lo > 0) & over_max_stem_mass(lo)) | ~over_max_stem_mass(hi)
+        lo = np.where(bad_bracket, 0, lo)
+        hi = np.where(thinning, np.where(bad_bracket, num_trees, hi), lo)
+
+        # bisection on the exact thinning test
+        while (hi - lo > 1).any():
+            mid = (lo + hi) // 2
+            over = over_max_stem_mass(mid)
+            searching = hi - lo > 1
+            hi = np.where(searching & over, mid, hi)
+            lo = np.where(searching & ~over, mid, lo)
+
+    survivors = np.where(thinning, lo, num_trees)
+    return survivors, num_trees - survivors
+
+
+class ThreePGTables:
+    """
+    Holds every part of the 3-PG month loop that depends only on time, climate and
+    species, precomputed once per run so that the month loop only has to handle
+    the biomass recurrence.
+    Time tables have a time axis (months 0 through t) followed by the species axis.
+    The soil water and VPD parts only change with the month of the year, so they are
+    kept by month of the year. Leading axes of the climate arrays (e.g. replicates
+    with different soil water) carry through to the tables that use them.
+    """
+    def __init__(self, params, climate, t, fertility=FERTILITY_RATING):
+        """
+        Attributes:
+            - current_month : np.ndarray    (time) index into the 12-month climate list
+            - co2 : np.ndarray              (time) atmospheric CO2 (ppm)
+            - env_mods : np.ndarray         (time x species) ft * ff * fn * fc
+            - leaf_area : np.ndarray        (time x species) 0.1 * SLA, times foliage biomass gives LAI
+            - ground_area_coverage : np.ndarray (time x species) canopy GAC ramp
+            - litterfall_rate : np.ndarray  (time x species)
+            - solar_rad : np.ndarray        (month of year) solar radiation
+            - phys_mod : np.ndarray         (month of year x species)
+            - root_partition_ratio, nf, ns : np.ndarray (month of year x species) partitioning ratios
+        """
+        months = np.arange(t+1)
+        self.t = t
+        self.current_month = month_index(months)
+        self.co2 = co2_curve(months)
+
+        # the climate for each month of the simulation, as a column against the species axis
+        monthly = {field: climate[field][..., self.current_month, None] for field in ('tmax', 'tmin', 'frost_days')}
+        self.env_mods = calculate_env_mods(params, monthly['tmax'], monthly['tmin'], monthly['frost_days'],
+                                           self.co2[:, None], fertility)
+
+        # specific leaf area (SLA)
+        exp1 = np.power(((START_AGE * 12.) + months[:, None])/params['t_sla_mid'], 2.)
+        sla = params['sla_1'] + (params['sla_0'] - params['sla_1']) * np.power(E, (-1 * math.log(2.) * exp1))
+        self.leaf_area = 0.1 * sla
+
+        # ground area coverage (GAC) by canopy
+        stand_age = START_AGE + months[:, None] / 12
+        self.ground_area_coverage = np.where(stand_age < params['tc'], stand_age / params['tc'], 1.)
+
+        # litterfall, from the stand age of each month so that month m never depends on
+        # how long the run will be
+        current_age = START_AGE + months[:, None]/12
+        yfx, yf0 = params['yfx'], params['yf0']
+        lf_exp = -(current_age/params['tyf']) * np.log(1.0 + yfx/yf0)
+        litterfall_rate = (yfx * yf0)/(yf0 + (yfx - yf0) * np.power(E, lf_exp))
+        # deciduous species with no litterfall rates lose all foliage at the end of the season anyway
+        self.litterfall_rate = np.where(params['deciduous'] & ((yf0 == 0) | (yfx == 0)), 0., litterfall_rate)
+
+        # modifiers and partitioning by month of the year
+        self.solar_rad = climate['solar_rad'][..., :, None]
+        self.phys_mod = calculate_phys_mod(params, climate['vpd'][..., :, None], climate['soil_water'][..., :, None],
+                                           climate['max_soil_water'][..., :, None])
+
+        self.root_partition_ratio, self.nf, self.ns = calculate_partitioning(params, self.phys_mod, fertility)
+
+    def monthly_modifiers(self, month_t):
+        """
+        Input: The month being computed
+        Output: (env_mods, phys_mod, root_partition_ratio, nf, ns) for that month
+        """
+        current_month = self.current_month[month_t]
+        return (self.env_mods[..., month_t, :], self.phys_mod[..., current_month, :],
+                self.root_partition_ratio[..., current_month, :],
+                self.nf[..., current_month, :], self.ns[..., current_month, :])
+
+
+# Precomputed tables, keyed by (climate, species set, horizon, fertility)
+_TABLE_CACHE = {}
+TABLE_CACHE_SIZE = 16
+
+
+def precompute_tables(params, climate, t, fertility=FERTILITY_RATING):
+    """
+    Input: Species parameters, climate arrays, time interval (in months)
+    Output: ThreePGTables for the run, reused when the same climate, species set
+            and horizon are simulated again
+    """
+    key = (tuple((field, climate[field].shape, climate[field].tobytes()) for field in sorted(climate)),
+           tuple((name, params[name].tobytes()) for name in sorted(params)),
+           t, float(fertility))
+    tables = _TABLE_CACHE.get(key)
+    if tables is None:
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            tables = ThreePGTables(params, climate, t, fertility)
+        if len(_TABLE_CACHE) >= TABLE_CACHE_SIZE:
+            _TABLE_CACHE.pop(next(iter(_TABLE_CACHE)))
+        _TABLE_CACHE[key] = tables
+    return tables
+
+
+def threepg_step(params, tables, state, month_t, modifiers=None):
+    """
+    Input: Species parameters, the precomputed ThreePGTables, the StandState
+           and the month being computed. modifiers optionally replaces the tables'
+           (env_mods, phys_mod, root_partition_ratio, nf, ns) for the month, e.g. with
+           values computed for each cell of a landscape.
+    Output: None, the StandState is advanced by one month in place.
+    """
+    current_month = tables.current_month[month_t]
+    if modifiers is None:
+        modifiers = tables.monthly_modifiers(month_t)
+    env_mods, phys_mod, root_partition_ratio, nf, ns = modifiers
+
+    # absorption of photosynthetically active radiation (PAR)
+    leaf_area_index = tables.leaf_area[month_t] * state.foliage
+    ground_area_coverage = tables.ground_area_coverage[month_t]
+    e_exp = (-params['k'] * leaf_area_index)/ground_area_coverage
+    par = (1 - np.power(E, e_exp)) * 2.3 * ground_area_coverage * tables.solar_rad[..., current_month, :]
+
+    # computing GPP and NPP
+    gpp = env_mods * phys_mod * params['acx'] * par
+    npp = gpp * CONVERSION_RATIO
+
+    # compute biomass from last month's values
+    n, died = state.num_trees, state.num_trees_died
+    curr_foliage_biomass = state.foliage + ((nf * npp) - (tables.litterfall_rate[month_t] * state.foliage) - (params['mf'] * (state.foliage / n) * died))
+    curr_root_biomass = state.root + ((root_partition_ratio * npp) - (params['yr'] * state.root) - (params['mr'] * (state.root / n) * died))
+    curr_stem_biomass = state.stem + ((ns * npp) - (params['ms'] * (state.stem / n) * died))
+
+    # biomass pools never drop to zero or below
+    state.foliage = np.where(curr_foliage_biomass > 0., curr_foliage_biomass, state.foliage)
+    state.stem = np.where(curr_stem_biomass > 0., curr_stem_biomass, state.stem)
+    state.root = np.where(curr_root_biomass > 0., curr_root_biomass, state.root)
+
+    # mortality -- thin the stand until the mean stem mass is under the
+    # max individual tree stem mass (wsx)
+    state.num_trees, num_trees_died = solve_self_thinning(state.stem, state.num_trees, params['wsx1000'], params['nm'])
+    state.num_trees_died = state.num_trees_died + num_trees_died
+
+    state.b = mean_dbh(params, state.stem, state.num_trees)
+
+
+def mean_dbh(params, stem_biomass, num_trees):
+    """
+    Input: Species parameters, stem biomass and stems per hectare for each species
+    Output: Mean dbh (b) from mean individual stem mass (inversion of A65 of user manual)
+    """
+    ind_stem_mass_iws = stem_biomass / num_trees
+    return np.power(ind_stem_mass_iws/params['aws'], (1.0/params['nws'])) * 100
+
+
+def stand_dimensions(params, b):
+    """
+    Input: Species parameters and mean dbh (b) for each species
+    Output: Mean tree height, live crown length and crown diameter for each species
+            (A.61 - A.63 with a competition index of 1)
+    """
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        height = params['ah'] * np.power(b, params['nhb'])
+        live_crown_length = params['ahl'] * np.power(b, params['nhlb'])
+        crown_diameter = params['ak'] * np.power(b, params['nkb']) * np.power(height, params['nkh'])
+    return height, live_crown_length, crown_diameter
+
+
+def run_threepg(species_list, climate_list, num_trees, t, fertility=FERTILITY_RATING):
+    """
+    Input: Species list, climate list, initial stems per hectare, time interval (in months)
+    Output: The StandState of every species after months 0 through t
+    """
+    params = species_parameters(species_list)
+    tables = precompute_tables(params, climate_arrays(climate_list), t, fertility)
+    state = StandState(len(species_list), num_trees)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for month_t in range(t+1):
+            threepg_step(params, tables, state, month_t)
+    return state
@@ -0,0 +1,222 @@
+"""
+File: tree_table.py
+Author: Grace Todd
+Date: October 17, 2026
+Description: A columnar store for the individual trees of a forest.
+
+             Every tree is one row of a set of NumPy columns (position, species code,
+             basal area, competition index, dimensions, age and whether it's alive),
+             so passes over the whole forest are array operations instead of Python loops,
+             and a million trees take tens of megabytes instead of gigabytes.
+             Tree objects are only created on demand, as views onto one row.
+
+             Every tree gets an integer ID when it's added, from a counter that only goes
+             up, and the ID of the tree it was spawned from (if any), so the parent and
+             child columns double as a lineage table. Human-readable keys are only
+             rendered from the IDs when trees are exported.
+"""
+
+import numpy as np
+
+# Columns of a TreeTable, and their dtypes
+TREE_COLUMNS = {'x': float, 'y': float, 'species': np.int64, 'ba': float, 'c': float,
+                'height': float, 'dbh': float, 'lcl': float, 'c_diam': float,
+                'age': float, 'alive': bool, 'id': np.int64, 'parent': np.int64}
+
+NO_PARENT = -1 # parent ID of trees that weren't spawned from another tree
+
+MIN_CAPACITY = 64 # rows allocated for a new table by default, doubled whenever it fills up
+
+
+class TreeTable:
+    """
+    Holds every tree of a forest as a struct of arrays. Columns are read as attributes
+    (e.g. table.height) and are views of the first len(table) rows, so writing into
+    them writes into the table.
+    Indexing or iterating gives Tree views, so the table can stand in for a list of trees.
+    """
+    def __init__(self, species_list, capacity=MIN_CAPACITY):
+        """
+        Input: The forest's list of Species, which the species codes index into,
+               and the number of rows to allocate up front (e.g. 1 for a standalone tree)
+        Attributes:
+            - species_list : [Species]
+            - species_index : {str: int}    species name -> species code
+            - size : int                    Number of trees in the table
+            - next_id : int                 ID the next tree added will get. IDs increase
+                                            with the row, and are never reused.
+        """
+        self.species_list = species_list
+        self.species_index = {species.name: i for i, species in enumerate(species_list)}
+        self.size = 0
+        self.next_id = 0
+        self._columns = {name: np.empty(capacity, dtype=dtype)
+                         for name, dtype in TREE_COLUMNS.items()}
+
+
+    def __getattr__(self, name):
+        # only called for names that aren't ordinary attributes, i.e. the columns
+        if name in TREE_COLUMNS and '_columns' in self.__dict__:
+            return self._columns[name][:self.size]
+        raise AttributeError(f"'TreeTable' object has no attribute '{name}'")
+
+
+    def __len__(self):
+        return self.size
+
+
+    def __getitem__(self, index):
+        """
+        Input: Row index
+        Output: A Tree view onto that row (a list of views for a slice)
+        """
+        from Tree import Tree # Tree.py imports Forest, which imports this module
+        if isinstance(index, slice):
+            return [Tree.from_table(self, i) for i in range(self.size)[index]]
+        return Tree.from_table(self, range(self.size)[index])
+
+
+    def __iter__(self):
+        return (self[i] for i in range(self.size))
+
+
+    def species_code(self, species):
+        """
+        Input: A Species, or a species name
+        Output: The species code used in the species column
+        """
+        name = getattr(species, 'name', species)
+        if name not in self.species_index:
+            raise ValueError(f"Species {name} isn't in this forest")
+        return self.species_index[name]
+
+
+    def species_codes(self, species):
+        """
+        Input: Array of species names, or of species codes
+        Output: Array of species codes. Names are looked up once per distinct name.
+                Raises ValueError for species that aren't in this forest.
+        """
+        species = np.asarray(species)
+        if species.dtype.kind in 'iu':
+            codes = species.astype(np.int64)
+            if np.any((codes < 0) | (codes >= len(self.species_list))):
+                raise ValueError(f"Species codes must be between 0 and {len(self.species_list) - 1}")
+            return codes
+        if species.size == 0:
+            return np.empty(species.shape, dtype=np.int64)
+        names, inverse = np.unique(species, return_inverse=True)
+        unknown = [str(name) for name in names if name not in self.species_index]
+        if unknown:
+            raise ValueError(f"Species {unknown} aren't in this forest")
+        return np.array([self.species_index[name] for name in names], dtype=np.int64)[inverse].reshape(species.shape)
+
+
+    def reserve(self, capacity):
+        """
+        Input: Number of rows needed
+        Output: None, the columns are grown (at least doubling) to hold that many rows
+        """
+        current = len(self._columns['x'])
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, 2 * current)
+        for name, column in self._columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self._columns[name] = grown
+
+
+    def append(self, species, x, y, **columns):
+        """
+        Input: Species codes, x and y positions (scalars or arrays that broadcast together),
+               and optionally values for any of the other TREE_COLUMNS
+        Output: Array of the row indices of the new trees.
+                Unless given, basal area comes from the species' mean dbh (b), the competition
+                index is 1, the dimensions are NaN until computed, age is 0, trees are alive,
+                have no parent and get the next IDs. Given IDs (e.g. from a checkpoint) must
+                increase, and be larger than any ID already used.
+        """
+        species, x, y = np.broadcast_arrays(np.asarray(species, dtype=np.int64),
+                                            np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        species, x, y = species.ravel(), x.ravel(), y.ravel()
+        unknown = set(columns) - set(TREE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown tree columns: {sorted(unknown)}")
+
+        count = len(species)
+        if 'id' in columns:
+            ids = np.broadcast_to(np.asarray(columns['id'], dtype=np.int64), (count,))
+            if count and (ids[0] < self.next_id or np.any(np.diff(ids) <= 0)):
+                raise ValueError(f"Tree IDs must increase, starting from at least {self.next_id}")
+        else:
+            ids = np.arange(self.next_id, self.next_id + count)
+        columns['id'] = ids
+        start = self.size
+        self.reserve(start + count)
+        rows = slice(start, start + count)
+
+        if 'ba' not in columns:
+            b = np.array([s.b for s in self.species_list], dtype=float)[species]
+            columns['ba'] = (np.pi * b * b)/40000
+        defaults = {'c': 1., 'height': np.nan, 'dbh': np.nan, 'lcl': np.nan, 'c_diam': np.nan,
+                    'age': 0., 'alive': True, 'parent': NO_PARENT}
+        self._columns['species'][rows] = species
+        self._columns['x'][rows] = x
+        self._columns['y'][rows] = y
+        for name, default in defaults.items():
+            self._columns[name][rows] = columns.get(name, default)
+        self._columns['ba'][rows] = columns['ba']
+        self._columns['id'][rows] = ids
+
+        self.size += count
+        if count:
+            self.next_id = int(ids[-1]) + 1
+        return np.arange(start, start + count)
+
+
+    def rows_of(self, ids):
+        """
+        Input: Tree IDs
+        Output: Array of the rows of those trees. Raises ValueError for IDs that aren't in the table.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.id, ids), max(self.size - 1, 0))
+        if self.size == 0 or np.any(self.id[rows] != ids):
+            raise ValueError("Some of the tree IDs aren't in this table")
+        return rows
+
+
+    def lineage(self):
+        """
+        Output: (parents, children) arrays of IDs, one entry per tree that was spawned
+                from another tree
+        """
+        spawned = self.parent != NO_PARENT
+        return self.parent[spawned], self.id[spawned]
+
+
+    def children(self, tree_id):
+        """
+        Input: A tree ID
+        Output: Array of the IDs of the trees spawned from it
+        """
+        return self.id[self.parent == tree_id]
+
+
+    def copy(self):
+        """
+        Output: A new TreeTable with copies of the columns (and the same IDs and species list)
+        """
+        table = TreeTable(self.species_list, capacity=self.size)
+        for name in TREE_COLUMNS:
+            table._columns[name][:self.size] = self._columns[name][:self.size]
+        table.size, table.next_id = self.size, self.next_id
+        return table
+
+
+    def column_dict(self):
+        """
+        Output: A dictionary of column name -> a copy of that column
+        """
+        return {name: self._columns[name][:self.size].copy() for name in TREE_COLUMNS}
@@ -0,0 +1,40 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from batch_runner import *
+
+
+class TestBatchRunner(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.directory.name, 'manifest.csv')
+        with open(self.manifest, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['name', 'climate', 'species', 'seed', 'num_trees', 't'])
+            writer.writerow(['prineville', 'test_data/prineville_oregon_climate.csv', 'test_data/param_est_output.csv', 1, 20, 24])
+            writer.writerow(['', 'test_data/prineville_oregon_climate.csv', 'test_data/param_est_output.csv', 2, 10, 12])
+            writer.writerow(['bend', 'test_data/bend_oregon_climate.csv', 'test_data/param_est_output.csv', 3, 10, 12]) # no vpd column
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_manifest(self):
+        jobs = read_manifest(self.manifest)
+        self.assertEqual([job['name'] for job in jobs], ['prineville', 'prineville_oregon_climate_1', 'bend'])
+        self.assertEqual(jobs[0]['num_trees'], 20)
+
+    def test_failed_job_does_not_abort_batch(self):
+        output_dir = os.path.join(self.directory.name, 'output')
+        results = run_batch(read_manifest(self.manifest), output_dir, workers=2)
+        status = {result['name']: result['status'] for result in results}
+        self.assertEqual(status, {'prineville': 'ok', 'prineville_oregon_climate_1': 'ok', 'bend': 'failed'})
+
+        with open(os.path.join(output_dir, 'prineville.csv'), newline='') as file:
+            self.assertEqual(len(list(csv.reader(file))), 21)
+        with open(os.path.join(output_dir, 'batch_results.csv'), newline='') as file:
+            self.assertEqual(len(list(csv.DictReader(file))), 3)
+
+if __name__ == '__main__':
+    unittest.main()
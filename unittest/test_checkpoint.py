@@ -0,0 +1,86 @@
+import os
+import random
+import tempfile
+import unittest
+
+from checkpoint import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, 'forest.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_resume_matches_uninterrupted_run(self):
+        random.seed(11)
+        uninterrupted = ForestSimulator(Forest(CLIMATE, SPECIES, 1000), seed=4)
+        uninterrupted.num_placed = 30
+        uninterrupted.run_until(60)
+        uninterrupted.snapshot()
+        random_state = random.getstate()
+        uninterrupted.run_until(240)
+        expected = [(tree.key, tree.height, tree.c_diam) for tree in uninterrupted.snapshot().trees_list]
+
+        random.seed(11)
+        interrupted = ForestSimulator(Forest(CLIMATE, SPECIES, 1000), seed=4)
+        interrupted.num_placed = 30
+        interrupted.run_until(60)
+        interrupted.snapshot()
+        random.setstate(random_state)
+        save_checkpoint(interrupted, self.filepath)
+
+        random.seed(99) # a fresh process draws different soil water
+        resumed = load_checkpoint(self.filepath, Forest(CLIMATE, SPECIES, 1000))
+        self.assertEqual(resumed.month, 61)
+        resumed.run_until(240)
+        self.assertEqual([(tree.key, tree.height, tree.c_diam) for tree in resumed.snapshot().trees_list], expected)
+        self.assertEqual(resumed.forest.num_trees, uninterrupted.forest.num_trees)
+
+    def test_autosave_and_resume(self):
+        simulator = resume_or_start(CLIMATE, SPECIES, self.filepath, num_trees=500, seed=2)
+        self.assertEqual(simulator.month, 0)
+        run_with_autosave(simulator, 100, self.filepath, every=30)
+        self.assertFalse(os.path.exists(self.filepath + '.tmp'))
+
+        resumed = resume_or_start(CLIMATE, SPECIES, self.filepath, num_trees=500)
+        self.assertEqual(resumed.month, 101)
+        self.assertEqual(list(resumed.state.stem), list(simulator.state.stem))
+
+    def test_resume_keeps_settings(self):
+        simulator = ForestSimulator(Forest(CLIMATE, SPECIES, 1000), seed=5, competition='hegyi',
+                                    hegyi_radius=6., plot_size=80.)
+        simulator.num_placed = 40
+        simulator.crowns = 'shrink'
+        simulator.mortality = Mortality(competition_weight=2., size_weight=0.5)
+        simulator.recruitment = Recruitment(simulator.forest, masting_cycle=[12, 24, 36, 48, 60], seeds_per_tree=3)
+        simulator.run_until(12)
+        save_checkpoint(simulator, self.filepath)
+
+        resumed = load_checkpoint(self.filepath, Forest(CLIMATE, SPECIES, 1000))
+        self.assertEqual((resumed.competition, resumed.crowns), ('hegyi', 'shrink'))
+        self.assertEqual((resumed.hegyi_radius, resumed.plot_size), (6., 80.))
+        self.assertEqual((resumed.mortality.competition_weight, resumed.mortality.size_weight), (2., 0.5))
+        np.testing.assert_array_equal(resumed.recruitment.masting_cycle, [12, 24, 36, 48, 60])
+        np.testing.assert_array_equal(resumed.recruitment.seeds_per_tree, 3)
+
+        simulator.mortality = simulator.recruitment = None
+        save_checkpoint(simulator, self.filepath)
+        resumed = load_checkpoint(self.filepath, Forest(CLIMATE, SPECIES, 1000))
+        self.assertIsNone(resumed.mortality)
+        self.assertIsNone(resumed.recruitment)
+
+    def test_rejects_other_species(self):
+        simulator = ForestSimulator(Forest(CLIMATE, SPECIES, 100))
+        simulator.forest.species_list[0].name = "Not A Tree"
+        save_checkpoint(simulator, self.filepath)
+        with self.assertRaises(ValueError):
+            load_checkpoint(self.filepath, Forest(CLIMATE, SPECIES, 100))
+
+if __name__ == '__main__':
+    unittest.main()
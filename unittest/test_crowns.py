@@ -0,0 +1,123 @@
+import unittest
+
+from crowns import *
+from create_forest import ForestSimulator
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+def reference_overlaps(positions, radii):
+    """ Every overlapping pair, from the distances between every pair of trees """
+    i, j = np.triu_indices(len(radii), 1)
+    overlapping = np.hypot(*(positions[i] - positions[j]).T) < radii[i] + radii[j]
+    return set(zip(i[overlapping].tolist(), j[overlapping].tolist()))
+
+def overlap_depth(positions, radii):
+    i, j, distance = crown_overlaps(positions, radii)
+    return np.sum(radii[i] + radii[j] - distance)
+
+
+class TestCrownOverlaps(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.positions = rng.random((400, 2))
+        self.radii = rng.uniform(0.005, 0.04, 400)
+
+    def test_matches_every_pair(self):
+        i, j, distance = crown_overlaps(self.positions, self.radii)
+        self.assertEqual({(min(a, b), max(a, b)) for a, b in zip(i, j)},
+                         reference_overlaps(self.positions, self.radii))
+        np.testing.assert_allclose(distance, np.hypot(*(self.positions[i] - self.positions[j]).T))
+
+    def test_skewed_radii(self):
+        # a few crowns far larger than the rest, and some of no size at all
+        rng = np.random.default_rng(3)
+        positions = rng.random((3000, 2))
+        radii = np.minimum(np.exp(rng.normal(np.log(0.002), 1.5, 3000)), 0.05)
+        radii[:3], radii[3:10] = 0.3, 0.
+        i, j, distance = crown_overlaps(positions, radii)
+        self.assertEqual({(min(a, b), max(a, b)) for a, b in zip(i, j)},
+                         reference_overlaps(positions, radii))
+
+    def test_no_crowns(self):
+        self.assertEqual(len(crown_overlaps(self.positions, np.zeros(400))[0]), 0)
+        self.assertEqual(len(crown_overlaps(self.positions[:1], self.radii[:1])[0]), 0)
+
+    def test_shrink_leaves_crowns_touching(self):
+        scales = shrink_scales(self.positions, self.radii)
+        self.assertTrue(np.all((scales >= MIN_CROWN_SCALE) & (scales <= 1)))
+        shrunk = self.radii * scales
+        i, j, distance = crown_overlaps(self.positions, shrunk * (1 - 1e-9))
+        # only pairs that would have needed shrinking past the floor still overlap
+        self.assertTrue(np.all((scales[i] == MIN_CROWN_SCALE) | (scales[j] == MIN_CROWN_SCALE)))
+        isolated = np.ones(400, dtype=bool)
+        isolated[np.concatenate(crown_overlaps(self.positions, self.radii)[:2])] = False
+        np.testing.assert_array_equal(scales[isolated], 1.)
+
+    def test_suppress_keeps_larger_crowns_first(self):
+        suppressed = suppressed_trees(self.positions, self.radii)
+        standing = ~suppressed
+        self.assertEqual(len(crown_overlaps(self.positions[standing], self.radii[standing])[0]), 0)
+        # same as deciding one tree at a time, largest first
+        expected = np.zeros(400, dtype=bool)
+        pairs = reference_overlaps(self.positions, self.radii)
+        for tree in np.argsort(-self.radii, kind='stable'):
+            expected[tree] = any(not expected[other] and self.radii[other] > self.radii[tree]
+                                 for other in range(400) if (min(tree, other), max(tree, other)) in pairs)
+        np.testing.assert_array_equal(suppressed, expected)
+
+    def test_shift_pushes_crowns_apart(self):
+        radii = self.radii / 2 # a quarter of the plot under crowns
+        shifted = shifted_positions(self.positions, radii)
+        self.assertLess(overlap_depth(shifted, radii), 0.2 * overlap_depth(self.positions, radii))
+        moved = np.hypot(*(shifted - self.positions).T)
+        self.assertTrue(np.all(moved <= SHIFT_LIMIT * radii * (1 + 1e-9)))
+        self.assertTrue(np.all((shifted >= 0) & (shifted < 1)))
+
+
+class TestResolveCrowns(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        rng = np.random.default_rng(1)
+        self.forest.add_trees_bulk(rng.integers(0, 5, 300), rng.random(300), rng.random(300),
+                                   c_diam=rng.uniform(1., 3., 300), alive=np.arange(300) < 250)
+
+    def test_methods(self):
+        trees = self.forest.trees
+        c_diam, x = trees.c_diam.copy(), trees.x.copy()
+        rows = resolve_crowns(self.forest, 'shrink')
+        self.assertTrue(np.all(rows < 250))
+        self.assertTrue(np.all(trees.c_diam[rows] < c_diam[rows]))
+        np.testing.assert_array_equal(trees.c_diam[250:], c_diam[250:])
+
+        rows = resolve_crowns(self.forest, 'shift')
+        self.assertGreater(len(rows), 0)
+        np.testing.assert_array_equal(trees.x[250:], x[250:])
+
+        rows = resolve_crowns(self.forest, 'suppress')
+        self.assertFalse(trees.alive[rows].any())
+        with self.assertRaises(ValueError):
+            resolve_crowns(self.forest, 'prune')
+
+    def test_simulator_snapshot(self):
+        simulator = ForestSimulator(Forest(CLIMATE, SPECIES, 1000), seed=2)
+        simulator.num_placed = 100
+        simulator.run_until(120)
+        simulator.snapshot() # places the trees
+        simulated = simulator.forest.trees.column_dict()
+        simulator.crowns = 'suppress'
+        trees = simulator.snapshot().trees
+        alive = trees.alive
+        radii = trees.c_diam[alive] / 2 / PLOT_SIZE
+        self.assertEqual(len(crown_overlaps(np.column_stack((trees.x[alive], trees.y[alive])), radii)[0]), 0)
+        self.assertLess(alive.sum(), simulated['alive'].sum())
+        # only the exported copy is thinned, the simulated stand is left as it was
+        self.assertIsNot(trees, simulator.forest.trees)
+        np.testing.assert_array_equal(simulator.forest.trees.alive, simulated['alive'])
+        simulator.crowns = 'shift'
+        simulator.snapshot()
+        np.testing.assert_array_equal(simulator.forest.trees.x, simulated['x'])
+
+if __name__ == '__main__':
+    unittest.main()
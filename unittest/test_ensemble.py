@@ -0,0 +1,49 @@
+import random
+import unittest
+
+from ensemble import *
+from gauss import Gaussian
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestEnsemble(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+
+    def test_replicates_match_single_runs(self):
+        soil_water = draw_soil_water(self.forest.climate_list, 3, np.random.default_rng(7))
+        summary = run_ensemble(self.forest, 60, replicates=3, seed=7, percentiles=(0, 100), jitter=False)
+
+        stems = []
+        for replicate in soil_water:
+            for month, water in zip(self.forest.climate_list, replicate):
+                month.soil_water = water
+            stems.append(run_threepg(self.forest.species_list, self.forest.climate_list, 1000, 60).stem)
+        np.testing.assert_allclose(summary['stem']['mean'], np.mean(stems, axis=0))
+        np.testing.assert_allclose(summary['stem']['percentiles'], [np.min(stems, axis=0), np.max(stems, axis=0)])
+
+    def test_unknown_soil_texture(self):
+        self.forest.climate_list[3].soil_texture = "gravel"
+        with self.assertRaisesRegex(ValueError, "gravel"):
+            draw_soil_water(self.forest.climate_list, 3, np.random.default_rng(0))
+
+    def test_summary_shape(self):
+        summary = run_ensemble(self.forest, 24, replicates=50, seed=1)
+        num_species = len(self.forest.species_list)
+        self.assertEqual(summary['percentiles'], (5, 50, 95))
+        for name in ENSEMBLE_QUANTITIES:
+            self.assertEqual(summary[name]['mean'].shape, (num_species,))
+            self.assertEqual(summary[name]['percentiles'].shape, (3, num_species))
+
+    def test_gaussian_array_matches_gaussian(self):
+        samples = GaussianArray(np.full(20000, 7.), 2., np.random.default_rng(0))
+        random.seed(0)
+        scalar = [Gaussian(7., 2.) for _ in range(20000)]
+        self.assertTrue(np.all(np.abs(samples - 7.) <= 6.))
+        self.assertAlmostEqual(samples.mean(), np.mean(scalar), delta=0.06)
+        self.assertAlmostEqual(samples.std(), np.std(scalar), delta=0.06)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+
+from Forest import Forest, basal_area_larger, hegyi_index
+from Tree import Tree
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+def reference_bal(basal_areas):
+    """ Sum of the basal area of every strictly larger tree, one tree at a time """
+    total = sum(basal_areas)
+    return [sum(other for other in basal_areas if other > ba) / total for ba in basal_areas]
+
+
+def reference_hegyi(positions, basal_areas, radius):
+    """ Hegyi index from every pair of trees """
+    indices = []
+    for i, (p, ba) in enumerate(zip(positions, basal_areas)):
+        index = 0.
+        for j, (q, other) in enumerate(zip(positions, basal_areas)):
+            distance = np.hypot(*(p - q))
+            if i != j and distance <= radius:
+                index += np.sqrt(other / ba) / max(distance, 0.01 * radius)
+        indices.append(index)
+    return indices
+
+
+class TestCompetitionIndices(unittest.TestCase):
+    def test_matches_pairwise_sum(self):
+        basal_areas = np.random.default_rng(0).gamma(2., 0.01, size=500)
+        np.testing.assert_allclose(basal_area_larger(basal_areas), reference_bal(basal_areas))
+
+    def test_ties_do_not_compete(self):
+        np.testing.assert_allclose(basal_area_larger([1., 2., 2., 3.]), [7/8, 3/8, 3/8, 0.])
+
+    def test_empty_stand(self):
+        self.assertEqual(len(basal_area_larger([])), 0)
+        np.testing.assert_array_equal(basal_area_larger([0., 0.]), [0., 0.])
+
+    def test_forest_assigns_each_tree_its_own_index(self):
+        forest = Forest(CLIMATE, SPECIES, 1000)
+        for i, species in enumerate(forest.species_list):
+            species.b = 10. + i
+        for i in range(20):
+            forest.add_tree(Tree(forest.species_list[i % len(forest.species_list)], i / 20, i / 20))
+        forest.compute_competition_indices()
+        expected = reference_bal([tree.ba for tree in forest.trees_list])
+        np.testing.assert_allclose([tree.c for tree in forest.trees_list], expected)
+
+
+class TestHegyiIndex(unittest.TestCase):
+    def test_matches_pairwise_sum(self):
+        rng = np.random.default_rng(1)
+        positions, basal_areas = rng.random((300, 2)), rng.gamma(2., 0.01, size=300)
+        np.testing.assert_allclose(hegyi_index(positions, basal_areas, 0.1),
+                                   reference_hegyi(positions, basal_areas, 0.1))
+
+    def test_isolated_tree_has_no_competition(self):
+        indices = hegyi_index([[0., 0.], [0.05, 0.], [0.9, 0.9]], [1., 4., 1.], radius=0.1)
+        np.testing.assert_allclose(indices, [2 / 0.05, 0.5 / 0.05, 0.])
+
+    def test_forest_method(self):
+        forest = Forest(CLIMATE, SPECIES, 1000)
+        forest.species_list[0].b = 10.
+        for x in (0.1, 0.15, 0.8):
+            forest.add_tree(Tree(forest.species_list[0], x, 0.5))
+        forest.compute_competition_indices('hegyi', radius=4.)
+        self.assertEqual([tree.c for tree in forest.trees_list][2], 0.)
+        with self.assertRaises(ValueError):
+            forest.compute_competition_indices('crowding')
+
+    def test_forest_method_is_bounded_like_bal(self):
+        forest = Forest(CLIMATE, SPECIES, 1000)
+        rng = np.random.default_rng(2)
+        forest.add_trees_bulk(rng.integers(0, 5, 500), rng.random(500), rng.random(500), ba=rng.gamma(2., 0.01, 500))
+        forest.compute_competition_indices('hegyi', radius=4.)
+        hegyi = hegyi_index(np.column_stack((forest.trees.x, forest.trees.y)), forest.trees.ba, 0.1)
+        c = forest.trees.c
+        self.assertTrue(np.all((c >= 0) & (c < 1)))
+        # same order as the raw index
+        np.testing.assert_array_equal(np.argsort(c, kind='stable'), np.argsort(hegyi, kind='stable'))
+        # the radius is in metres, so a plot twice as wide needs twice the radius
+        c = c.copy()
+        forest.compute_competition_indices('hegyi', radius=8., plot_size=80.)
+        np.testing.assert_array_equal(forest.trees.c, c)
+        forest.compute_competition_indices('hegyi', radius=8.)
+        self.assertFalse(np.array_equal(forest.trees.c, c))
+
+class TestBulkInsertion(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES)
+
+    def test_names_and_codes(self):
+        names = [self.forest.species_list[i].name for i in (2, 0, 2)]
+        np.testing.assert_array_equal(self.forest.species_codes(names), [2, 0, 2])
+        np.testing.assert_array_equal(self.forest.species_codes(np.array([1, 4])), [1, 4])
+        with self.assertRaises(ValueError):
+            self.forest.species_codes(["Not a tree"])
+        with self.assertRaises(ValueError):
+            self.forest.species_codes([len(self.forest.species_list)])
+        self.assertIs(self.forest.species_index, self.forest.trees.species_index)
+
+    def test_matches_add_tree(self):
+        codes = np.array([3, 1, 1, 4])
+        xs, ys = np.linspace(0.1, 0.4, 4), np.linspace(0.9, 0.6, 4)
+        rows = self.forest.add_trees_bulk(codes, xs, ys)
+        np.testing.assert_array_equal(rows, np.arange(4))
+
+        one_at_a_time = Forest(CLIMATE, SPECIES)
+        for code, x, y in zip(codes, xs, ys):
+            one_at_a_time.add_tree(Tree(one_at_a_time.species_list[code], x, y))
+        for name, column in one_at_a_time.trees.column_dict().items():
+            np.testing.assert_array_equal(getattr(self.forest.trees, name), column)
+        self.assertEqual(self.forest.trees[2].key, one_at_a_time.trees[2].key)
+
+    def test_extra_columns(self):
+        self.forest.add_trees_bulk([0, 1], [0.2, 0.3], [0.5, 0.5], age=[3., 7.])
+        self.forest.add_trees_bulk([], [], [])
+        np.testing.assert_array_equal(self.forest.trees.age, [3., 7.])
+
+if __name__ == '__main__':
+    unittest.main()
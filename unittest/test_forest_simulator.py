@@ -0,0 +1,146 @@
+import copy
+import random
+import unittest
+
+from create_forest import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestForestSimulator(unittest.TestCase):
+    def setUp(self):
+        random.seed(5)
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+
+    def test_stepping_matches_full_run(self):
+        expected = threepg(copy.deepcopy(self.forest), 300)
+        simulator = ForestSimulator(self.forest)
+        simulator.step(7)
+        simulator.run_until(150)
+        simulator.run_until(300)
+        self.assertEqual(simulator.month, 301)
+        self.assertEqual(self.forest.num_trees, expected.num_trees)
+        for species, expected_species in zip(self.forest.species_list, expected.species_list):
+            self.assertEqual(species.b, expected_species.b)
+
+    def test_snapshots_reuse_placement(self):
+        simulator = ForestSimulator(self.forest, seed=1)
+        simulator.num_placed = 20
+        positions = None
+        for t, forest in simulator.snapshots([12, 24, 36]):
+            self.assertEqual(simulator.month, t + 1)
+            self.assertEqual(len(forest.trees_list), 20)
+            if positions is None:
+                positions = [tree.position for tree in forest.trees_list]
+            self.assertEqual([tree.position for tree in forest.trees_list], positions)
+
+    def test_competition_follows_growth(self):
+        simulator = ForestSimulator(self.forest, seed=2)
+        simulator.num_placed = 200
+        simulator.run_until(11)
+        trees = simulator.snapshot().trees
+        mean_bal = lambda: np.array([trees.c[trees.species == code].mean() for code in (2, 3)])
+        first = mean_bal()
+        self.assertLess(first[0], first[1]) # the third species starts out the larger
+        for _ in simulator.stream(228):
+            pass
+        b = np.array([species.b for species in self.forest.species_list])
+        np.testing.assert_allclose(trees.ba, np.pi * b[trees.species]**2 / 40000)
+        simulator.snapshot()
+        last = mean_bal()
+        self.assertGreater(last[0], last[1]) # and is overtaken by the fourth
+
+    def test_cannot_run_backwards(self):
+        simulator = ForestSimulator(self.forest)
+        simulator.run_until(24)
+        with self.assertRaises(ValueError):
+            simulator.run_until(12)
+
+    def settling_simulator(self, forest):
+        """ A stand whose annual cycle settles: constant SLA and litterfall, no CO2 effect,
+        no thinning, wet soil and some past mortality to balance stem growth """
+        for species in forest.species_list:
+            species.fcax_700, species.sla_0, species.yf0, species.yfx, species.wsx1000 = 1., species.sla_1, 0.02, 0.02, 1e9
+        simulator = ForestSimulator(forest)
+        simulator.climate['soil_water'][:] = 1.
+        simulator.state.num_trees_died[:] = 100
+        return simulator
+
+    def test_spin_up_matches_brute_force(self):
+        expected = self.settling_simulator(copy.deepcopy(self.forest))
+        expected_report = expected.spin_up(tol=1e-4, accelerate=False)
+        simulator = self.settling_simulator(self.forest)
+        report = simulator.spin_up(tol=1e-4)
+
+        self.assertTrue(expected_report['converged'])
+        self.assertTrue(report['converged'])
+        self.assertGreater(report['years_skipped'], 0)
+        self.assertLess(report['years_simulated'], expected_report['years_simulated'])
+        self.assertEqual(simulator.month, 12 * (report['years_simulated'] + report['years_skipped']))
+        for pool in ('foliage', 'stem', 'root'):
+            np.testing.assert_allclose(getattr(simulator.state, pool), getattr(expected.state, pool), rtol=1e-3, atol=1e-5)
+        for i, species in enumerate(self.forest.species_list):
+            self.assertEqual(species.b, simulator.state.b[i])
+
+    def test_spin_up_reports_no_convergence(self):
+        simulator = ForestSimulator(self.forest)
+        report = simulator.spin_up(max_years=20)
+        self.assertFalse(report['converged'])
+        self.assertEqual(report['years_simulated'] + report['years_skipped'], 20)
+        self.assertEqual(simulator.month, 240)
+
+class TestComputeDimensions(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        rng = np.random.default_rng(0)
+        self.forest.add_trees_bulk(rng.integers(0, 5, 2000), rng.random(2000), rng.random(2000),
+                                   ba=rng.uniform(0.005, 0.05, 2000))
+
+    def test_jitter_within_three_sigma_of_allometry(self):
+        compute_dimensions(self.forest, rng=np.random.default_rng(1))
+        trees = self.forest.trees
+        for i, tree in enumerate(trees[:200]):
+            species, b = tree.species, math.sqrt(tree.ba * 40000 / math.pi)
+            height = species.ah * pow(b, species.nhb) * pow(tree.c, species.nhc)
+            expected = {'height': height,
+                        'lcl': species.ahl * pow(b, species.nhlb) * pow(tree.c, species.nhlc),
+                        'c_diam': species.ak * pow(b, species.nkb) * pow(height, species.nkh),
+                        'dbh': math.sqrt(4 * tree.ba / math.pi)}
+            for name, value in expected.items():
+                self.assertLessEqual(abs(getattr(tree, name) - value), 3 * (value + 0.005) / 4 + 1e-9)
+
+    def test_seedlings_come_out_smaller(self):
+        trees = self.forest.trees
+        seedlings = self.forest.add_trees_bulk(trees.species[:200], trees.x[:200], trees.y[:200],
+                                               ba=np.pi / 40000) # 1 cm, under the first 200 trees
+        compute_dimensions(self.forest, rng=np.random.default_rng(4))
+        self.assertTrue(np.all(trees.dbh[seedlings] < trees.dbh[:200]))
+        for name in ('height', 'lcl', 'c_diam'):
+            self.assertLess(getattr(trees, name)[seedlings].mean(), getattr(trees, name)[:200].mean())
+
+    def test_seeded(self):
+        compute_dimensions(self.forest, rng=np.random.default_rng(2))
+        first = self.forest.trees.column_dict()
+        compute_dimensions(self.forest, rng=np.random.default_rng(2))
+        for name, column in first.items():
+            np.testing.assert_array_equal(getattr(self.forest.trees, name), column)
+
+    def test_simulator_hegyi_competition(self):
+        simulator = ForestSimulator(Forest(CLIMATE, SPECIES, 1000), seed=4)
+        simulator.num_placed = 200
+        simulator.competition = 'hegyi'
+        simulator.run_until(24)
+        trees = simulator.snapshot().trees
+        self.assertTrue(np.all((trees.c >= 0) & (trees.c < 1)))
+        self.assertFalse(np.isnan(trees.height).any())
+
+    def test_batched_jitter_matches_generate_from(self):
+        samples = Tree.generate_from_array(np.full(20000, 4.), np.random.default_rng(3))
+        reference = [Tree.generate_from(4.) for _ in range(20000)]
+        self.assertTrue(np.all(np.abs(samples - 4.) <= 3 * 4.005 / 4))
+        self.assertAlmostEqual(samples.mean(), np.mean(reference), delta=0.03)
+        self.assertAlmostEqual(samples.std(), np.std(reference), delta=0.03)
+
+if __name__ == '__main__':
+    unittest.main()
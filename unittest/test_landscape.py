@@ -0,0 +1,52 @@
+import unittest
+
+from landscape import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestLandscape(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+
+    def test_base_cells_match_single_stand(self):
+        expected = run_threepg(self.forest.species_list, self.forest.climate_list, 1000, 60)
+        landscape = Landscape(self.forest, np.zeros(5))
+        landscape.run_until(30)
+        landscape.run_until(60)
+        self.assertEqual(landscape.month, 61)
+        for cell in range(5):
+            np.testing.assert_allclose(landscape.state.stem[cell], expected.stem)
+            np.testing.assert_array_equal(landscape.state.num_trees[cell], expected.num_trees)
+
+    def test_chunks_match_one_pass(self):
+        offsets = np.linspace(-4., 4., 9)
+        textures = ["loams", "clays", None] * 3
+        landscapes = [Landscape(self.forest, offsets, textures, fertility=np.linspace(0.2, 1., 9), seed=3)
+                      for _ in range(2)]
+        landscapes[0].step(48)
+        landscapes[1].step(48, chunk_size=2)
+        np.testing.assert_array_equal(landscapes[0].state.stem, landscapes[1].state.stem)
+
+    def test_each_cell_has_its_own_climate(self):
+        landscape = Landscape(self.forest, [-3., 0., 3.])
+        landscape.step(36)
+        self.assertEqual(len(np.unique(landscape.state.stem[:, 0])), 3)
+
+    def test_absent_species_are_nan(self):
+        mix = np.ones((2, len(self.forest.species_list)))
+        mix[1, 0] = 0.
+        landscape = Landscape(self.forest, np.zeros(2), species_mix=mix)
+        landscape.step(12)
+        outputs = landscape.outputs()
+        self.assertEqual(set(outputs), set(LANDSCAPE_OUTPUTS))
+        self.assertTrue(np.isnan(outputs['b'][1, 0]))
+        self.assertFalse(np.isnan(outputs['b'][0, 0]))
+
+    def test_invalid_texture(self):
+        with self.assertRaises(ValueError):
+            Landscape(self.forest, np.zeros(2), ["loams", "gravel"])
+
+if __name__ == '__main__':
+    unittest.main()
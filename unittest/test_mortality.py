@@ -0,0 +1,96 @@
+import random
+import unittest
+
+from mortality import *
+from create_forest import ForestSimulator, compute_dimensions, plot_trees
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestMortality(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        rng = np.random.default_rng(0)
+        self.forest.add_trees_bulk(np.repeat([0, 1], 1000), rng.random(2000), rng.random(2000), ba=0.01)
+
+    def test_deaths_follow_the_stand(self):
+        deaths = Mortality().deaths(self.forest.trees, np.array([0.9, 0.995, 1., 1., 1.]), np.random.default_rng(1))
+        self.assertEqual(deaths[0], 100)
+        self.assertIn(deaths[1], (5, 6)) # 5.0 up to rounding error
+        np.testing.assert_array_equal(deaths[2:], 0)
+        # 0.5 expected deaths a month come out right on average
+        rng = np.random.default_rng(2)
+        monthly = [Mortality().deaths(self.forest.trees, np.array([0.9995, 1, 1, 1, 1]), rng)[0] for _ in range(2000)]
+        self.assertAlmostEqual(np.mean(monthly), 0.5, delta=0.05)
+
+    def test_suppressed_and_small_trees_die_first(self):
+        trees = self.forest.trees
+        trees.c[:] = np.where(np.arange(2000) % 2, 1., 0.) # odd rows are suppressed
+        rows = Mortality(size_weight=0.).select(trees, np.array([200, 0, 0, 0, 0]), np.random.default_rng(3))
+        self.assertEqual(len(rows), 200)
+        self.assertTrue(np.all(trees.species[rows] == 0))
+        self.assertGreater(np.mean(rows % 2), 0.9)
+
+        trees.c[:] = 1.
+        trees.ba[:1000] = np.where(np.arange(1000) < 500, 0.001, 0.05)
+        rows = Mortality(competition_weight=0.).select(trees, np.array([200, 0, 0, 0, 0]), np.random.default_rng(4))
+        self.assertGreater(np.mean(rows < 500), 0.9)
+
+    def test_dead_trees_stay_dead(self):
+        mortality = Mortality()
+        rng = np.random.default_rng(5)
+        first = mortality.apply(self.forest, np.array([0.5, 1, 1, 1, 1]), rng)
+        second = mortality.apply(self.forest, np.array([0., 1, 1, 1, 1]), rng)
+        self.assertEqual(len(first), 500)
+        self.assertEqual(len(second), 500)
+        self.assertEqual(len(np.intersect1d(first, second)), 0)
+        self.assertFalse(self.forest.trees.alive[:1000].any())
+        self.assertTrue(self.forest.trees.alive[1000:].all())
+        self.assertEqual(len(self.forest.trees), 2000)
+
+    def test_dimensions_only_for_living_trees(self):
+        trees = self.forest.trees
+        compute_dimensions(self.forest, rng=np.random.default_rng(6))
+        last_height = trees.height.copy()
+        Mortality().apply(self.forest, np.array([0.5, 0.5, 1, 1, 1]), np.random.default_rng(7))
+        dead = ~trees.alive
+        trees.ba[:] = 0.02
+        compute_dimensions(self.forest, rng=np.random.default_rng(8))
+        np.testing.assert_array_equal(trees.height[dead], last_height[dead])
+        self.assertFalse(np.any(trees.height[~dead] == last_height[~dead]))
+
+    def test_simulator_keeps_trees_in_step_with_the_stand(self):
+        random.seed(5) # soil water
+        forest = Forest(CLIMATE, SPECIES, 50000)
+        simulator = ForestSimulator(forest, seed=6)
+        plot_trees(forest, num_trees=1000, min_distance=0.01, rng=simulator.rng)
+        placed = np.bincount(forest.trees.species, minlength=5)
+        simulator.run_until(240)
+        alive = np.bincount(forest.trees.species[forest.trees.alive], minlength=5)
+        survival = simulator.state.num_trees / 50000
+        self.assertLess(survival.min(), 0.9) # the stand did thin
+        np.testing.assert_allclose(alive / placed, survival, atol=0.03)
+
+    def test_placed_trees_grow_and_outlive_seedlings(self):
+        random.seed(5) # soil water
+        forest = Forest(CLIMATE, SPECIES, 50000)
+        simulator = ForestSimulator(forest, seed=6)
+        plot_trees(forest, num_trees=1000, min_distance=0.01, rng=simulator.rng)
+        trees = forest.trees
+        self.assertFalse(trees.ba.any()) # placed before any growth
+        simulator.run_until(23)
+        b = np.array([species.b for species in forest.species_list])
+        np.testing.assert_allclose(trees.ba, np.pi * b[trees.species]**2 / 40000)
+
+        placed = len(trees)
+        forest.add_trees_bulk(np.zeros(200, dtype=np.int64), simulator.rng.random(200), simulator.rng.random(200),
+                              ba=np.pi / 40000) # 1 cm seedlings
+        simulator.run_until(71) # the first species thins
+        adults = trees.species[:placed] == 0
+        self.assertLess(simulator.state.num_trees[0], 50000)
+        self.assertTrue(trees.alive[:placed][adults].all())
+        self.assertLess(trees.alive[placed:].mean(), 0.9)
+
+if __name__ == '__main__':
+    unittest.main()
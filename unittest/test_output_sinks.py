@@ -0,0 +1,53 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+
+from create_forest import *
+from output_sinks import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestOutputSinks(unittest.TestCase):
+    def setUp(self):
+        random.seed(2)
+        self.simulator = ForestSimulator(Forest(CLIMATE, SPECIES, 1000))
+        self.num_species = len(self.simulator.forest.species_list)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stream_matches_stepping(self):
+        records = list(self.simulator.stream(24))
+        self.assertEqual([record['month'] for record in records], list(range(24)))
+        self.assertEqual(list(records[-1]['b']), [species.b for species in self.simulator.forest.species_list])
+        self.assertEqual(records[-1]['stem'].shape, (self.num_species,))
+
+    def test_csv_and_ring_buffer(self):
+        filepath = os.path.join(self.directory.name, 'monthly.csv')
+        ring = RingBufferSink(6)
+        self.assertEqual(write_stream(self.simulator.stream(30), CSVSink(filepath), ring), 30)
+        self.assertEqual([record['month'] for record in ring.records], list(range(24, 30)))
+        with open(filepath, newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(tuple(rows[0]), RECORD_FIELDS)
+        self.assertEqual(len(rows), 1 + 30 * self.num_species)
+        self.assertEqual(rows[-1][1], self.simulator.forest.species_list[-1].name)
+
+    def test_parquet(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+        filepath = os.path.join(self.directory.name, 'monthly.parquet')
+        write_stream(self.simulator.stream(30), ParquetSink(filepath, batch_months=7))
+        table = pq.read_table(filepath)
+        self.assertEqual(table.num_rows, 30 * self.num_species)
+        self.assertEqual(table.column_names, list(RECORD_FIELDS))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from placement import *
+from Tree import Forest, crown_radii, plot_trees
+
+
+def nearest_distances(points, boxsize=None):
+    return cKDTree(points, boxsize=boxsize).query(points, 2)[0][:, 1]
+
+def crown_overlaps(points, radii, boxsize=None):
+    pairs = cKDTree(points, boxsize=boxsize).query_pairs(2 * radii.max(), output_type='ndarray')
+    delta = np.abs(points[pairs[:, 0]] - points[pairs[:, 1]])
+    if boxsize is not None:
+        delta = np.minimum(delta, np.asarray(boxsize) - delta)
+    return np.sum(np.hypot(*delta.T) < radii[pairs[:, 0]] + radii[pairs[:, 1]])
+
+
+class TestPoissonDisk(unittest.TestCase):
+    def test_points_are_spaced_and_inside(self):
+        points = poisson_disk_sample(0.02, 2., 1., rng=0)
+        self.assertTrue(np.all(nearest_distances(points) >= 0.02))
+        self.assertTrue(np.all((points >= 0) & (points < [2., 1.])))
+
+    def test_plot_is_filled(self):
+        # maximal Poisson-disk sets cover the plane with density around 0.7 / r^2
+        points = poisson_disk_sample(0.02, rng=1)
+        self.assertGreater(len(points), 0.6 / 0.02**2)
+
+    def test_periodic_tiles(self):
+        points = poisson_disk_sample(0.05, 1., 0.5, rng=2, periodic=True)
+        self.assertTrue(np.all(nearest_distances(points, boxsize=[1., 0.5]) >= 0.05))
+
+    def test_seeded(self):
+        np.testing.assert_array_equal(poisson_disk_sample(0.05, rng=3), poisson_disk_sample(0.05, rng=3))
+
+    def test_tree_positions(self):
+        positions = sample_tree_positions(100, 0.05, rng=4)
+        self.assertEqual(positions.shape, (100, 2))
+        self.assertTrue(np.all(nearest_distances(positions) >= 0.05))
+
+    def test_sparse_request_stops_at_num_trees(self):
+        # a full set 1e-4 apart would be tens of millions of points
+        positions = sample_tree_positions(100, 1e-4, rng=6)
+        self.assertEqual(positions.shape, (100, 2))
+        self.assertTrue(np.all(nearest_distances(positions) >= 1e-4))
+
+    def test_close_to_packing_limit(self):
+        positions = sample_tree_positions(200, 0.05, rng=7) # most of a full set
+        self.assertEqual(positions.shape, (200, 2))
+        self.assertTrue(np.all(nearest_distances(positions) >= 0.05))
+
+    def test_too_dense(self):
+        with self.assertRaises(ValueError):
+            sample_tree_positions(1000, 0.05, rng=5)
+
+
+class TestPlaceByRadius(unittest.TestCase):
+    def setUp(self):
+        self.radii = np.random.default_rng(0).choice([0.002, 0.004, 0.01, 0.03], 3000, p=[0.6, 0.3, 0.09, 0.01])
+
+    def test_crowns_dont_overlap(self):
+        positions = place_by_radius(self.radii, rng=6)
+        self.assertFalse(np.isnan(positions).any())
+        self.assertTrue(np.all((positions >= 0) & (positions < 1)))
+        self.assertEqual(crown_overlaps(positions, self.radii), 0)
+
+    def test_periodic_tiles(self):
+        positions = place_by_radius(self.radii, 1., 0.5, rng=7, periodic=True)
+        self.assertEqual(crown_overlaps(positions, self.radii, boxsize=[1., 0.5]), 0)
+
+    def test_unplaced_trees_are_nan(self):
+        # only a handful of crowns this size fit in the plot
+        positions = place_by_radius(np.full(50, 0.2), rng=8)
+        placed = ~np.isnan(positions[:, 0])
+        self.assertTrue(0 < placed.sum() < 50)
+        self.assertEqual(crown_overlaps(positions[placed], np.full(placed.sum(), 0.2)), 0)
+
+    def test_seeded(self):
+        np.testing.assert_array_equal(place_by_radius(self.radii, rng=9), place_by_radius(self.radii, rng=9))
+
+    def test_invalid_radii(self):
+        with self.assertRaises(ValueError):
+            place_by_radius([0.01, 0.])
+
+class TestClusterSample(unittest.TestCase):
+    def test_counts_and_bounds(self):
+        for kernel in CLUSTER_KERNELS:
+            positions, types = cluster_sample([300, 0, 500], [5., 1., 20.], 0.03, 2., 1., rng=11, kernel=kernel)
+            np.testing.assert_array_equal(np.bincount(types, minlength=3), [300, 0, 500])
+            self.assertTrue(np.all((positions >= 0) & (positions < [2., 1.])))
+
+    def test_clumped(self):
+        # a few tight clusters leave points much closer together than uniform ones
+        positions, _ = cluster_sample([2000], 4., 0.02, rng=12)
+        uniform = np.random.default_rng(12).random((2000, 2))
+        self.assertLess(nearest_distances(positions).mean(), 0.5 * nearest_distances(uniform).mean())
+
+    def test_matern_stays_in_disk(self):
+        positions, _ = cluster_sample([500], 0.001, 0.05, rng=13, periodic=True, kernel='matern')
+        # one parent (at least one is always drawn), so every point is within 0.1 of every other
+        delta = np.abs(positions[:, None] - positions[None])
+        delta = np.minimum(delta, 1. - delta)
+        self.assertLessEqual(np.hypot(*delta.T).max(), 0.1)
+
+    def test_seeded(self):
+        first, second = (cluster_sample([100, 100], 5., 0.05, rng=14)[0] for _ in range(2))
+        np.testing.assert_array_equal(first, second)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            cluster_sample([10], 5., 0.05, kernel='poisson')
+        with self.assertRaises(ValueError):
+            cluster_sample([10, 10], [5., 0.], 0.05)
+
+
+class TestCrownSpacing(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest("test_data/prineville_oregon_climate.csv", "test_data/param_est_output.csv")
+        for species in self.forest.species_list:
+            species.b = 20.
+
+    def test_radii_follow_crowns(self):
+        radii = crown_radii(self.forest, min_distance=0.01)
+        # species without crown parameters fall back to min_distance / 2
+        self.assertEqual(radii[0], 0.005)
+        self.assertAlmostEqual(radii[1], 0.65 * 20**0.69 / 2 / 40.)
+
+    def test_plot_trees_by_crown(self):
+        plot_trees(self.forest, num_trees=40, min_distance=0.01, rng=np.random.default_rng(10), spacing='crown')
+        trees = self.forest.trees
+        self.assertEqual(len(trees), 40)
+        radii = crown_radii(self.forest, min_distance=0.01)[trees.species]
+        self.assertEqual(crown_overlaps(np.column_stack((trees.x, trees.y)), radii), 0)
+
+    def test_plot_trees_clustered(self):
+        plot_trees(self.forest, num_trees=200, rng=np.random.default_rng(15), spacing='thomas')
+        self.assertEqual(len(self.forest.trees), 200)
+        self.assertTrue(np.all((self.forest.trees.x >= 0) & (self.forest.trees.x < 1)))
+
+    def test_invalid_spacing(self):
+        with self.assertRaises(ValueError):
+            plot_trees(self.forest, spacing='random')
+
+if __name__ == '__main__':
+    unittest.main()
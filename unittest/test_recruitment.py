@@ -0,0 +1,72 @@
+import unittest
+
+from recruitment import *
+from create_forest import ForestSimulator
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestOccupancyGrid(unittest.TestCase):
+    def test_marks_cells(self):
+        grid = OccupancyGrid(0.1)
+        grid.mark([0.05, 0.95], [0.05, 0.55])
+        np.testing.assert_array_equal(grid.is_free([0.01, 0.09, 0.91, 0.5, 1.2, -0.1], [0.02, 0.15, 0.51, 0.5, 0.5, 0.5]),
+                                      [False, True, False, True, False, False])
+
+    def test_dead_trees_leave_their_cell(self):
+        forest = Forest(CLIMATE, SPECIES)
+        forest.add_trees_bulk([0, 1], [0.25, 0.75], [0.5, 0.5], alive=[True, False])
+        grid = OccupancyGrid.from_trees(forest.trees, 0.1)
+        np.testing.assert_array_equal(grid.is_free([0.25, 0.75], [0.5, 0.5]), [False, True])
+
+
+class TestRecruitment(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        rng = np.random.default_rng(0)
+        self.forest.add_trees_bulk(rng.integers(0, 5, 300), rng.random(300), rng.random(300),
+                                   age=np.where(np.arange(300) < 200, 100., 10.))
+        self.recruitment = Recruitment(self.forest, masting_cycle=[12, 12, 12, 12, 24], cell_size=0.005)
+
+    def test_only_masting_species_and_mature_trees_seed(self):
+        np.testing.assert_array_equal(self.recruitment.masting(12), [True] * 4 + [False])
+        self.assertFalse(self.recruitment.masting(0).any())
+        self.assertEqual(len(self.recruitment.disperse(self.forest, 13, np.random.default_rng(1))), 0)
+
+        rows = self.recruitment.disperse(self.forest, 12, np.random.default_rng(1))
+        trees = self.forest.trees
+        self.assertGreater(len(rows), 0)
+        parent_rows = trees.rows_of(trees.parent[rows])
+        self.assertTrue(np.all(parent_rows < 200))
+        np.testing.assert_array_equal(trees.species[rows], trees.species[parent_rows])
+        self.assertTrue(np.all(trees.species[rows] != 4))
+        self.assertTrue(np.all(trees.age[rows] == 0))
+
+    def test_one_tree_per_cell(self):
+        rows = self.recruitment.disperse(self.forest, 12, np.random.default_rng(2))
+        trees = self.forest.trees
+        cells = OccupancyGrid(0.005).cells_of(trees.x[rows], trees.y[rows])
+        self.assertTrue(np.all(cells >= 0))
+        self.assertEqual(len(np.unique(cells)), len(rows))
+        parents = OccupancyGrid(0.005)
+        parents.mark(trees.x[:300], trees.y[:300])
+        self.assertTrue(parents.is_free(trees.x[rows], trees.y[rows]).all())
+
+    def test_simulator_ages_trees_and_recruits(self):
+        simulator = ForestSimulator(self.forest, seed=3)
+        simulator.recruitment = self.recruitment
+        simulator.step(12) # months 0 to 11
+        self.assertEqual(len(self.forest.trees), 300)
+        simulator.step(1)
+        trees = self.forest.trees
+        self.assertGreater(len(trees), 300)
+        self.assertEqual(trees.age[0], 113.)
+        self.assertTrue(np.all(trees.age[300:] == 0)) # dropped in the last month simulated
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            Recruitment(self.forest, masting_cycle=0)
+
+if __name__ == '__main__':
+    unittest.main()
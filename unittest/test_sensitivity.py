@@ -0,0 +1,45 @@
+import random
+import unittest
+
+from sensitivity import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestSensitivity(unittest.TestCase):
+    def setUp(self):
+        random.seed(8)
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        self.species = self.forest.species_list[1]
+        self.names = [name for name in THREEPG_PARAMETERS if name != 'n_theta']
+
+    def test_evaluate_samples_matches_engine(self):
+        names, lower, upper = parameter_bounds(self.species, self.names)
+        base = np.array([getattr(self.species, name) for name in names])
+        outputs = evaluate_samples(self.species, self.forest.climate_list, names, np.array([base, lower]), t=36)
+        expected = run_threepg([self.species], self.forest.climate_list, 1000, 36)
+        self.assertAlmostEqual(outputs['b'][0], expected.b[0])
+        self.assertAlmostEqual(outputs['stem'][0], expected.stem[0])
+        self.assertNotAlmostEqual(outputs['stem'][1], expected.stem[0])
+
+    def test_morris_screens_out_unused_parameters(self):
+        results = morris(self.species, self.forest.climate_list, t=24, trajectories=10, names=self.names, seed=0)
+        self.assertNotIn('nkh', results['names']) # 0 for this species
+        ranked = dict(rank_parameters(results, 'b', 'mu_star'))
+        self.assertEqual(ranked['max_age'], 0.) # not used by 3-PG here
+        self.assertEqual(ranked['ak'], 0.) # crown diameter only
+        self.assertGreater(ranked['aws'], 0.)
+        self.assertGreater(dict(rank_parameters(results, 'c_diam', 'mu_star'))['ak'], 0.)
+
+    def test_sobol_indices(self):
+        results = sobol(self.species, self.forest.climate_list, t=24, samples=256, names=self.names, seed=0)
+        num_params = len(results['names'])
+        for output in SENSITIVITY_OUTPUTS:
+            self.assertEqual(results[output]['total'].shape, (num_params,))
+        total = dict(rank_parameters(results, 'b', 'total'))
+        self.assertEqual(total['nkb'], 0.)
+        self.assertGreater(total['nws'], 0.)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+import numpy as np
+
+from Forest import Forest
+from Species import *
+from threepg_engine import species_parameters
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestSpeciesSet(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        self.species_set = self.forest.species_list
+
+    def test_parameters_are_one_matrix(self):
+        self.assertEqual(self.species_set.matrix.shape, (len(self.species_set), len(SPECIES_PARAMETERS)))
+        douglas_fir = self.species_set[1]
+        self.assertEqual(douglas_fir.nhc, 0.00576)
+        douglas_fir.nhc = 0.5
+        self.assertEqual(self.species_set.column('nhc')[1], 0.5)
+
+    def test_set_parameters_match_species_list(self):
+        from_set = species_parameters(self.species_set)
+        from_list = species_parameters(list(self.species_set))
+        self.assertEqual(set(from_set), set(from_list))
+        for name in from_set:
+            np.testing.assert_array_equal(from_set[name], from_list[name])
+
+    def test_qualitative_fields_are_interned(self):
+        douglas_fir = self.species_set[1]
+        self.assertEqual(douglas_fir.bark_color, ['red', 'brown'])
+        self.assertEqual(self.species_set.categories['bark_color'].count('brown'), 1)
+        deciduous = self.species_set.has('deciduous_evergreen', 'deciduous')
+        np.testing.assert_array_equal(deciduous, [s.deciduous_evergreen == ['deciduous'] for s in self.species_set])
+        self.assertFalse(self.species_set.has('habitat', 'lunar').any())
+
+    def test_standalone_species(self):
+        species = Species("Test Pine", "Pinus testus", "needle", "medium", "evergreen", "green/blue",
+                          "pyramidal", "deep", "temperate", "furrows", "gray", t_min="2.5", nvbh=1)
+        self.assertIs(species.species_set[0], species)
+        self.assertEqual(species.leaf_color, ['green', 'blue'])
+        self.assertEqual(species.t_min, 2.5)
+        self.assertEqual(species.nvbh, 1.)
+        self.assertEqual(species.t_opt, 0.)
+
+    def test_row_length_is_checked(self):
+        with self.assertRaises(ValueError):
+            SpeciesSet([["Too Short", "Brevis"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import math
+import random
+import unittest
+
+from Forest import Forest
+from threepg_engine import *
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+def reference_threepg(species, climate, num_trees, t):
+    """ The original per-species month loop from create_forest.threepg, kept as a reference.
+    Litterfall uses the stand age of each month. """
+    foliage, stem, root = INIT_FOLIAGE_BIOMASS, INIT_STEM_BIOMASS, INIT_ROOT_BIOMASS
+    num_trees_died = 0
+    b = 0
+    for month_t in range(t+1):
+        current_month = ((START_MONTH + month_t) % 12)-1
+        if current_month == 0:
+            current_month = 11
+        month = climate[current_month]
+        x = START_YEAR + ((START_MONTH + month_t) / 12)
+        co2 = ((98/60) * x - 2885.33) + 3 * math.sin(7 * x)
+
+        temp = (month.tmax + month.tmin)/2.
+        if temp > species.t_max or temp < species.t_min:
+            temp_mod = 0.
+        else:
+            base = (temp - species.t_min / (species.t_opt - species.t_min) * (species.t_max - temp)/(species.t_max - species.t_opt))
+            temp_mod = pow(base, (species.t_max - species.t_opt)/(species.t_opt - species.t_min))
+        frost_mod = 1. - species.kf * (month.frost_days/30.)
+        nutrition_mod = 1. - (1. - species.fn0) * pow((1. - FERTILITY_RATING), species.nfn)
+        fcax = species.fcax_700/(2. - species.fcax_700)
+        co2_mod = fcax * co2/(350. * (fcax - 1.) + co2)
+        base1 = ((1. - month.soil_water)/month.max_soil_water)/species.c_theta
+        phys_mod = pow(E, (-species.kd * month.vpd)) * (1./(1. + pow(base1, species.n_theta)))
+        env_mods = temp_mod * frost_mod * nutrition_mod * co2_mod
+
+        sla = species.sla_1 + (species.sla_0 - species.sla_1) * pow(E, (-1 * math.log(2.) * pow(((START_AGE * 12.) + month_t)/species.t_sla_mid, 2.)))
+        lai = 0.1 * sla * foliage
+        gac = (START_AGE + month_t / 12) / species.tc if START_AGE + month_t / 12 < species.tc else 1.
+        par = (1 - pow(E, (-species.k * lai)/gac)) * 2.3 * gac * month.solar_rad
+        npp = env_mods * phys_mod * species.acx * par * CONVERSION_RATIO
+
+        m = species.m_0 + ((1. - species.m_0) * FERTILITY_RATING)
+        nr = (species.nr_min * species.nr_max) / (species.nr_min + ((species.nr_max - species.nr_min) * m * phys_mod))
+        np_ = (math.log(species.p20/species.p2))/math.log(10.)
+        pfs = species.p2/(pow(2., np_))
+        nf = (pfs * (1. - nr))/(1. + pfs)
+        ns = (1. - nr)/(1. + pfs)
+
+        age = START_AGE + month_t/12
+        if species.deciduous_evergreen == ['deciduous'] and (species.yf0 == 0 or species.yfx == 0):
+            litterfall = 0
+        else:
+            lf_exp = -(age/species.tyf) * math.log(1.0 + species.yfx/species.yf0)
+            litterfall = (species.yfx * species.yf0)/(species.yf0 + (species.yfx - species.yf0) * pow(E, lf_exp))
+
+        new_foliage = foliage + (nf * npp) - (litterfall * foliage) - (species.mf * (foliage / num_trees) * num_trees_died)
+        new_root = root + (nr * npp) - (species.yr * root) - (species.mr * (root / num_trees) * num_trees_died)
+        new_stem = stem + (ns * npp) - (species.ms * (stem / num_trees) * num_trees_died)
+        foliage = new_foliage if new_foliage > 0. else foliage
+        stem = new_stem if new_stem > 0. else stem
+        root = new_root if new_root > 0. else root
+
+        wsx = species.wsx1000 * pow((1000.0/num_trees), species.nm)
+        while stem / num_trees > wsx and num_trees > 0:
+            num_trees -= 1
+            num_trees_died += 1
+            wsx = species.wsx1000 * pow((1000.0/num_trees), species.nm)
+        b = pow((stem / num_trees)/species.aws, (1.0/species.nws)) * 100
+    return foliage, stem, root, num_trees, b
+
+
+class TestThreePGEngine(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+
+    def test_matches_per_species_loop(self):
+        for t in (0, 13, 240):
+            state = run_threepg(self.forest.species_list, self.forest.climate_list, 1000, t)
+            for i, species in enumerate(self.forest.species_list):
+                foliage, stem, root, num_trees, b = reference_threepg(species, self.forest.climate_list, 1000, t)
+                self.assertAlmostEqual(state.foliage[i], foliage, places=9)
+                self.assertAlmostEqual(state.stem[i], stem, places=9)
+                self.assertAlmostEqual(state.root[i], root, places=9)
+                self.assertEqual(state.num_trees[i], num_trees)
+                self.assertAlmostEqual(state.b[i] / b, 1., places=12)
+
+    def test_species_axis_is_independent(self):
+        together = run_threepg(self.forest.species_list, self.forest.climate_list, 1000, 120)
+        for i, species in enumerate(self.forest.species_list):
+            alone = run_threepg([species], self.forest.climate_list, 1000, 120)
+            self.assertEqual(together.stem[i], alone.stem[0])
+            self.assertEqual(together.num_trees[i], alone.num_trees[0])
+
+    def test_tables_are_cached_per_run(self):
+        params = species_parameters(self.forest.species_list)
+        climate = climate_arrays(self.forest.climate_list)
+        tables = precompute_tables(params, climate, 60)
+        self.assertIs(precompute_tables(params, climate_arrays(self.forest.climate_list), 60), tables)
+        self.assertIsNot(precompute_tables(params, climate, 61), tables)
+        self.assertEqual(tables.env_mods.shape, (61, len(self.forest.species_list)))
+        self.assertEqual(tables.phys_mod.shape, (12, len(self.forest.species_list)))
+        self.assertEqual(list(tables.current_month[:13]), [11, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, -1, 11])
+
+    def test_self_thinning_matches_decrement_loop(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            stem, num_trees = rng.uniform(0, 5000), rng.randint(1, 5000)
+            wsx1000, nm = rng.choice([0., rng.uniform(50, 500)]), rng.choice([0.5, 1., rng.uniform(1.2, 2.5)])
+
+            expected_trees, expected_died = num_trees, 0
+            while stem / expected_trees > wsx1000 * pow(1000.0/expected_trees, nm):
+                expected_trees -= 1
+                expected_died += 1
+                if expected_trees == 0:
+                    break
+
+            survivors, died = solve_self_thinning(stem, num_trees, wsx1000, nm)
+            self.assertEqual((survivors, died), (expected_trees, expected_died))
+
+    def test_self_thinning_is_vectorized(self):
+        survivors, died = solve_self_thinning([3000., 10., 3000.], [5000, 5000, 1000], 200., 1.5)
+        self.assertEqual(list(survivors + died), [5000, 5000, 1000])
+        self.assertEqual(died[1], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import copy
+import unittest
+
+import numpy as np
+
+from Forest import Forest
+from Tree import Tree
+from tree_table import TreeTable
+
+CLIMATE = "test_data/prineville_oregon_climate.csv"
+SPECIES = "test_data/param_est_output.csv"
+
+
+class TestTreeTable(unittest.TestCase):
+    def setUp(self):
+        self.forest = Forest(CLIMATE, SPECIES, 1000)
+        for i, species in enumerate(self.forest.species_list):
+            species.b = 10. + i
+
+    def test_append_grows_columns(self):
+        table = TreeTable(self.forest.species_list)
+        table.append(1, 0.5, 0.5)
+        rows = table.append(np.arange(200) % 5, np.linspace(0, 1, 200), 0.25, c=0.5)
+        self.assertEqual(len(table), 201)
+        np.testing.assert_array_equal(rows, np.arange(1, 201))
+        self.assertEqual(table.c[0], 1.)
+        np.testing.assert_array_equal(table.c[1:], 0.5)
+        self.assertTrue(np.isnan(table.height).all())
+        self.assertTrue(table.alive.all())
+        self.assertAlmostEqual(table.ba[0], np.pi * 11. * 11. / 40000)
+        with self.assertRaises(ValueError):
+            table.append(0, 0., 0., girth=1.)
+
+    def test_trees_are_views(self):
+        self.forest.trees.append([0, 3], [0.1, 0.2], [0.3, 0.4])
+        tree = self.forest.trees_list[1]
+        self.assertEqual(tree.name, self.forest.species_list[3].name)
+        self.assertEqual(tree.position, (0.2, 0.4))
+        tree.height = 12.
+        self.assertEqual(self.forest.trees.height[1], 12.)
+        self.assertEqual([t.position for t in self.forest.trees_list], [(0.1, 0.3), (0.2, 0.4)])
+
+    def test_add_tree_moves_row_into_forest(self):
+        tree = Tree(self.forest.species_list[2], 0.25, 0.75)
+        tree.c = 0.3
+        self.forest.add_tree(tree)
+        self.assertIs(tree.table, self.forest.trees)
+        self.assertEqual(self.forest.trees.species[0], 2)
+        self.assertEqual(self.forest.trees.c[0], 0.3)
+        self.assertEqual(tree.key, "Western0")
+
+    def test_standalone_tree_has_one_row(self):
+        tree = Tree(self.forest.species_list[0], 0.5, 0.5)
+        self.assertEqual(len(tree.table._columns['x']), 1)
+        table = TreeTable(self.forest.species_list, capacity=0)
+        table.append(0, np.linspace(0, 1, 5), 0.)
+        self.assertEqual(len(table), 5)
+
+    def test_ids_are_unique_and_never_reused(self):
+        table = TreeTable(self.forest.species_list)
+        table.append(0, [0.5, 0.5], [0.5, 0.5]) # same position, different trees
+        table.append(1, np.linspace(0, 1, 30000), 0.)
+        self.assertEqual(len(np.unique(table.id)), len(table))
+        np.testing.assert_array_equal(table.id, np.arange(30002))
+        self.assertEqual(table[0].key, "Ponderosa0")
+        self.assertNotEqual(table[0].key, table[1].key)
+        self.assertEqual(table.next_id, 30002)
+        with self.assertRaises(ValueError):
+            table.append(0, 0., 0., id=5)
+
+    def test_lineage(self):
+        table = TreeTable(self.forest.species_list)
+        table.append([0, 1], [0.1, 0.2], 0.5)
+        table.append(0, [0.11, 0.12], 0.5, parent=0)
+        table.append(1, 0.21, 0.5, parent=1)
+        parents, children = table.lineage()
+        np.testing.assert_array_equal(parents, [0, 0, 1])
+        np.testing.assert_array_equal(children, [2, 3, 4])
+        np.testing.assert_array_equal(table.children(0), [2, 3])
+        self.assertEqual(table[4].parent, 1)
+        np.testing.assert_array_equal(table.rows_of([4, 0]), [4, 0])
+        with self.assertRaises(ValueError):
+            table.rows_of([7])
+
+    def test_deepcopy(self):
+        self.forest.trees.append(0, 0.1, 0.2)
+        copied = copy.deepcopy(self.forest)
+        copied.trees.x[0] = 0.9
+        self.assertEqual(self.forest.trees.x[0], 0.1)
+        self.assertEqual(len(copied.trees_list), 1)
+
+if __name__ == '__main__':
+    unittest.main()